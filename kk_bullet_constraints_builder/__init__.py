@@ -154,6 +154,8 @@ from builder import *          # Contains constraints builder function
 from builder_fm import *       # Contains constraints builder function for Fracture Modifier (custom Blender version required)
 from builder_prep import *     # Contains preparation steps functions called by the builder
 from builder_setc import *     # Contains constraints settings functions called by the builder
+from damage import *           # Contains streaming damage statistics for the baking monitor
+from dispatcher import *       # Contains unified frame change event handler dispatcher
 from file_io import *          # Contains file input & output functions
 from formula import *          # Contains formula assistant functions
 from formula_props import *    # Contains formula assistant properties classes
@@ -162,6 +164,7 @@ from global_vars import *      # Contains global variables
 from gui import *              # Contains graphical user interface layout class
 from gui_buttons import *      # Contains graphical user interface button classes
 from monitor import *          # Contains baking monitor event handler
+from telemetry import *        # Contains telemetry recorder for the baking monitor
 from tools import *            # Contains smaller independently working tools
 
 ########################################
@@ -208,6 +211,7 @@ classes = [ \
     OBJECT_OT_bcb_export_ascii,
     OBJECT_OT_bcb_export_ascii_fm,
     OBJECT_OT_bcb_bake,
+    OBJECT_OT_bcb_bake_resume,
     
     OBJECT_OT_bcb_add,
     OBJECT_OT_bcb_dup,
@@ -245,6 +249,7 @@ classes = [ \
     OBJECT_OT_bcb_postproc_tool_export_force_history,
     OBJECT_OT_bcb_postproc_tool_visualize_forces,
     OBJECT_OT_bcb_postproc_tool_detect_cavities,
+    OBJECT_OT_bcb_tool_sweep_export,
     OBJECT_OT_bcb_postproc_tool_run_python_script
     ]
 
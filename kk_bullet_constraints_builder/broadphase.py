@@ -0,0 +1,397 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Written within the scope of Inachus FP7 Project (607522):
+# "Technological and Methodological Solutions for Integrated
+# Wide Area Situation Awareness and Survivor Localisation to
+# Support Search and Rescue (USaR) Teams"
+# Versions 1 & 2 were developed at the Laurea University of Applied Sciences,
+# Finland. Later versions are independently developed.
+# Copyright (C) 2015-2018 Kai Kostack
+#
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+################################################################################
+################################################################################
+
+### This module has no dependencies to Blender so the parallel connection search can be tested and benchmarked from a regular Python interpreter:
+### python broadphase.py benchmark [--objects <count per axis>] [--processes <count>] [--search <distance>] [--limit <count>] [--accurate]
+
+import sys, os, time, shutil, tempfile, multiprocessing
+import numpy
+
+### Names of the arrays exported per build (all objects concatenated, *Ofs arrays hold the start index per object plus the total)
+broadphase_arrayNames = ("verts",          # World space vertex coordinates
+                         "vertOfs",        # Vertex offsets per object
+                         "bbMin", "bbMax", # World space boundary boxes per object
+                         "locs",           # Object locations
+                         "dims",           # Object dimensions
+                         "nonMan",         # Non-manifold flags per object
+                         "nearest",        # Nearest objects by location per object for connectionCountLimit (empty if disabled)
+                         "faceCenters",    # World space face centers
+                         "faceAreas",      # Face areas
+                         "faceOfs",        # Face offsets per object
+                         "faceLoopStart",  # Index of the first vertex per face in faceLoopVerts
+                         "faceLoopTotal",  # Vertex count per face
+                         "faceLoopVerts")  # Global vertex indices of all faces
+
+broadphase_shared = {}  # Shared arrays mapped into the current process
+
+################################################################################
+
+def broadphase_calcAABBs(verts, vertOfs):
+
+    ### Calculates boundary boxes per object from concatenated vertex arrays
+    bbMin = numpy.minimum.reduceat(verts, vertOfs[:-1], axis=0)
+    bbMax = numpy.maximum.reduceat(verts, vertOfs[:-1], axis=0)
+    return bbMin, bbMax
+
+########################################
+
+def broadphase_calcNearest(locs, cnt, chunkSize=1000):
+
+    ### Finds the nearest objects by location per object sorted by distance (the first item is the object itself)
+    cnt = min(cnt, len(locs))
+    nearest = numpy.empty((len(locs), cnt), dtype=numpy.int64)
+    for i in range(0, len(locs), chunkSize):
+        dists = numpy.linalg.norm(locs[i:i +chunkSize, None, :] -locs[None, :, :], axis=2)
+        rows = numpy.arange(len(dists))[:, None]
+        idx = numpy.argpartition(dists, cnt -1, axis=1)[:, :cnt]
+        order = numpy.argsort(dists[rows, idx], axis=1, kind='mergesort')
+        nearest[i:i +chunkSize] = idx[rows, order]
+    return nearest
+
+################################################################################
+
+def broadphase_exportShared(arrays, path=None):
+
+    ### Writes the object arrays into shared memory (/dev/shm if available) so all worker processes can map them without copying
+    if path == None:
+        if os.path.isdir("/dev/shm"): pathBase = "/dev/shm"
+        else: pathBase = tempfile.gettempdir()
+        path = tempfile.mkdtemp(prefix="bcb-broadphase-", dir=pathBase)
+    for name in broadphase_arrayNames:
+        numpy.save(os.path.join(path, name +".npy"), numpy.ascontiguousarray(arrays[name]))
+    return path
+
+########################################
+
+def broadphase_removeShared(path):
+
+    ### Removes the shared arrays again
+    shutil.rmtree(path, ignore_errors=True)
+    if broadphase_shared.get("path") == path: broadphase_shared.clear()
+
+########################################
+
+def broadphase_initWorker(path):
+
+    ### Maps the shared arrays read-only into the current process (used as pool initializer)
+    broadphase_shared.clear()
+    for name in broadphase_arrayNames:
+        broadphase_shared[name] = numpy.load(os.path.join(path, name +".npy"), mmap_mode='r')
+    broadphase_shared["path"] = path
+
+########################################
+
+def broadphase_runPool(path, func, tasks, processes=None, pythonExe=None):
+
+    ### Runs the tasks in a pool of worker processes, in-process if only one process is requested
+    if processes == None: processes = os.cpu_count() or 1
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        broadphase_initWorker(path)
+        return [func(*task) for task in tasks]
+    # Spawn fresh interpreters so workers don't inherit the Blender process, inside Blender the bundled Python executable is required
+    ctx = multiprocessing.get_context("spawn")
+    if pythonExe: ctx.set_executable(pythonExe)
+    with ctx.Pool(processes, initializer=broadphase_initWorker, initargs=(path,)) as pool:
+        return pool.starmap(func, tasks)
+
+################################################################################
+
+def broadphase_findPairsChunk(objStart, objEnd, searchDistance, connectionCountLimit):
+
+    ### Finds candidate pairs by boundary box intersection for a range of objects (same as findConnectionsByBoundaryBoxIntersection)
+    sh = broadphase_shared
+    searchDistanceHalf = searchDistance /2
+    bbMin = numpy.array(sh["bbMin"]) -searchDistanceHalf
+    bbMax = numpy.array(sh["bbMax"]) +searchDistanceHalf
+    locs = numpy.array(sh["locs"])
+    ### Objects sorted by boundary box minimum on X so only a window of objects needs to be tested
+    order = numpy.argsort(bbMin[:, 0], kind='mergesort')
+    bbMinXSorted = bbMin[order, 0]
+    sizeXMax = (bbMax[:, 0] -bbMin[:, 0]).max()
+    pairsA = []; pairsB = []; dists = []
+    for k in range(objStart, objEnd):
+        if connectionCountLimit:
+            aIndex = numpy.array(sh["nearest"][k])
+            aIndex = aIndex[aIndex != k]
+        else:
+            lo = numpy.searchsorted(bbMinXSorted, bbMin[k, 0] -sizeXMax, side='left')
+            hi = numpy.searchsorted(bbMinXSorted, bbMax[k, 0], side='left')
+            aIndex = order[lo:hi]
+            aIndex = aIndex[aIndex != k]
+        ### Calculate overlap per axis of both intersecting boundary boxes
+        overlap = numpy.minimum(bbMax[k], bbMax[aIndex]) -numpy.maximum(bbMin[k], bbMin[aIndex])
+        aIndex = aIndex[numpy.all(overlap > 0, axis=1)]
+        aDist = numpy.linalg.norm(locs[aIndex] -locs[k], axis=1)
+        if not connectionCountLimit:
+            # Sort by distance like a kd-tree range search
+            idx = numpy.argsort(aDist, kind='mergesort')
+            aIndex = aIndex[idx]; aDist = aDist[idx]
+        pairsA.append(numpy.minimum(aIndex, k)); pairsB.append(numpy.maximum(aIndex, k)); dists.append(aDist)
+    if not len(pairsA): return numpy.empty((0, 2), dtype=numpy.int64), numpy.empty(0)
+    return numpy.column_stack((numpy.concatenate(pairsA), numpy.concatenate(pairsB))), numpy.concatenate(dists)
+
+########################################
+
+def broadphase_findPairs(path, searchDistance, connectionCountLimit=0, processes=None, pythonExe=None, chunkSize=2000):
+
+    ### Finds candidate pairs for all objects in parallel and merges them in the same order as the serial search
+    cntObjs = len(numpy.load(os.path.join(path, "locs.npy"), mmap_mode='r'))
+    tasks = [(i, min(i +chunkSize, cntObjs), searchDistance, connectionCountLimit) for i in range(0, cntObjs, chunkSize)]
+    results = broadphase_runPool(path, broadphase_findPairsChunk, tasks, processes, pythonExe)
+    if not len(results): return [], []
+    pairs = numpy.concatenate([result[0] for result in results]).reshape(-1, 2)
+    dists = numpy.concatenate([result[1] for result in results])
+    ### Remove doubles but keep the first occurrence
+    keys, idx = numpy.unique(pairs[:, 0] *cntObjs +pairs[:, 1], return_index=True)
+    idx.sort()
+    return pairs[idx].tolist(), dists[idx].tolist()
+
+################################################################################
+
+def broadphase_boundaryBoxFaces(k, selMin, selMax):
+
+    ### Calculates boundary box and area of the faces of an object whose centers are within the given box (same as boundaryBoxFaces)
+    sh = broadphase_shared
+    faceStart = sh["faceOfs"][k]; faceEnd = sh["faceOfs"][k +1]
+    centers = sh["faceCenters"][faceStart:faceEnd]
+    sel = numpy.flatnonzero(numpy.all((selMax > centers) & (selMin < centers), axis=1))
+    if not len(sel): return None, None, None, 0
+    selArea = float(sh["faceAreas"][faceStart:faceEnd][sel].sum())
+    loopStart = sh["faceLoopStart"]; loopTotal = sh["faceLoopTotal"]; loopVerts = sh["faceLoopVerts"]
+    selVerts = numpy.concatenate([loopVerts[loopStart[f]:loopStart[f] +loopTotal[f]] for f in sel +faceStart])
+    co = numpy.array(sh["verts"][numpy.unique(selVerts)])
+    bbMin = co.min(axis=0); bbMax = co.max(axis=0)
+    return bbMin, bbMax, (bbMin +bbMax) /2, selArea
+
+########################################
+
+def broadphase_contactGeometry(a, b, searchDist, surfaceThickness, surfaceForced, qAccurate):
+
+    ###### Calculates contact geometry for a single pair of objects (same as calculateContactAreaBasedOnBoundaryBoxesForPair)
+    sh = broadphase_shared
+    qNonManifold = sh["nonMan"][a] or sh["nonMan"][b]
+
+    ### Calculate boundary box corners
+    bbAMin = numpy.array(sh["bbMin"][a]); bbAMax = numpy.array(sh["bbMax"][a])
+    bbBMin = numpy.array(sh["bbMin"][b]); bbBMax = numpy.array(sh["bbMax"][b])
+    bbAMinBak, bbAMaxBak = bbAMin, bbAMax
+    bbBMinBak, bbBMaxBak = bbBMin, bbBMax
+
+    ### Determine faces within search range of both objects and return their surface area
+    geoContactAreaF = 0
+    qSkipConnect = 0
+    qOverlapSimple = 1
+    if qAccurate:
+        bbAMinF, bbAMaxF, bbACenterF, areaA = broadphase_boundaryBoxFaces(a, bbBMin -searchDist, bbBMax +searchDist)
+        bbBMinF, bbBMaxF, bbBCenterF, areaB = broadphase_boundaryBoxFaces(b, bbAMin -searchDist, bbAMax +searchDist)
+
+        ### Check if detected contact area is implausible high compared to the total surface area of the objects
+        areaAtot = float(sh["faceAreas"][sh["faceOfs"][a]:sh["faceOfs"][a +1]].sum())
+        areaBtot = float(sh["faceAreas"][sh["faceOfs"][b]:sh["faceOfs"][b +1]].sum())
+        if areaA >= areaAtot /2 or areaB >= areaBtot /2:
+            if areaA > 0:
+                if areaA < areaAtot /2: geoContactAreaF = areaA
+                bbAMin, bbAMax = bbAMinF, bbAMaxF
+            if areaB > 0:
+                if areaB < areaBtot /2: geoContactAreaF = areaB
+                bbBMin, bbBMax = bbBMinF, bbBMaxF
+        # Use the smallest detected area of both objects as contact area
+        elif areaA > 0 and areaB > 0:
+            geoContactAreaF = min(areaA, areaB)
+            bbAMin, bbAMax = bbAMinF, bbAMaxF
+            bbBMin, bbBMax = bbBMinF, bbBMaxF
+        # Or if only one area is greater zero then use that one
+        elif areaA > 0:
+            geoContactAreaF = areaA
+            bbAMin, bbAMax = bbAMinF, bbAMaxF
+        elif areaB > 0:
+            geoContactAreaF = areaB
+            bbBMin, bbBMax = bbBMinF, bbBMaxF
+        else: qSkipConnect = 1
+
+        ### Calculate overlap of face based boundary boxes as alternative to simple boundary box overlap
+        if areaA > 0 and areaB > 0:
+            overlapF = numpy.minimum(bbAMaxF, bbBMaxF) -numpy.maximum(bbAMinF, bbBMinF)
+            # If two axis have no relevant overlap we can assume the faces are perpendicular to each other
+            if numpy.count_nonzero(overlapF >= searchDist) >= 2:
+                overlap = overlapF
+                qOverlapSimple = 0
+        if qOverlapSimple:
+            bbAMin, bbAMax = bbAMinBak, bbAMaxBak
+            bbBMin, bbBMax = bbBMinBak, bbBMaxBak
+
+    if not qAccurate or qOverlapSimple:
+        ### Calculate simple overlap of boundary boxes for contact area calculation (project along all axis')
+        overlap = numpy.minimum(numpy.minimum(bbAMax, bbBMax) -numpy.maximum(bbAMin, bbBMin), 0)
+
+    if not qSkipConnect or surfaceForced:
+        overlapX, overlapY, overlapZ = [float(v) for v in overlap]
+
+        ### Calculate area based on either the sum of all axis surfaces or on predefined custom thickness
+        if not qNonManifold:
+            geoContactArea = overlapY *overlapZ +overlapX *overlapZ +overlapX *overlapY
+        else:
+            geoContactArea = (overlapX +overlapY +overlapZ) *surfaceThickness
+
+        ### Calculate alternative contact area from object dimensions
+        dimA = sh["dims"][a]; dimB = sh["dims"][b]
+        areaA = min(min(dimA[0]*dimA[1], dimA[0]*dimA[2]), dimA[1]*dimA[2])
+        areaB = min(min(dimB[0]*dimB[1], dimB[0]*dimB[2]), dimB[1]*dimB[2])
+        geoContactAreaD = float(min(areaA, areaB))
+
+        ### Sanity check: in case no boundary box intersection is found use element dimensions based contact area as fallback
+        if geoContactArea == 0:
+            geoContactArea = geoContactAreaD
+
+        # Sanity check: contact area based on faces is expected to be smaller than boundary box and dimensions contact area
+        qVolCorrect = 0
+        if geoContactAreaF < geoContactArea and geoContactAreaF > 0:
+            geoContactArea = geoContactAreaF
+        elif not qNonManifold:
+            qVolCorrect = 1
+
+        ### Find out element thickness to be used for bending threshold calculation
+        geo = [overlapX, overlapY, overlapZ]
+        geoAxis = [1, 2, 3]
+        geo, geoAxis = zip(*sorted(zip(geo, geoAxis)))
+        geoHeight = geo[1]
+        geoWidth = geo[2]
+
+        # Add custom thickness to contact area (only for manifolds as it is already included in non-manifolds)
+        if not qNonManifold:
+            geoContactArea += geoWidth *surfaceThickness
+
+        ### Use center of contact area boundary box as constraints location
+        center = (numpy.maximum(bbAMin, bbBMin) +numpy.minimum(bbAMax, bbBMax)) /2
+
+        return [geoContactArea, geoHeight, geoWidth, geoAxis[0], geoAxis[1], geoAxis[2], qVolCorrect], [float(v) for v in center]
+
+    return [0, 0, 0, 1, 2, 3, 0], [0, 0, 0]  # Dummy data, connection will be remove later because of zero area anyway
+
+########################################
+
+def broadphase_contactGeometryChunk(pairs, searchDistance, surfaceThickness, surfaceForced, qAccurate):
+
+    ### Calculates contact geometry for a chunk of pairs
+    connectsGeo = []; connectsLoc = []
+    for a, b in pairs:
+        geo, loc = broadphase_contactGeometry(a, b, searchDistance, surfaceThickness, surfaceForced, qAccurate)
+        connectsGeo.append(geo); connectsLoc.append(loc)
+    return connectsGeo, connectsLoc
+
+########################################
+
+def broadphase_contactGeometryAll(path, connectsPair, searchDistance, surfaceThickness, surfaceForced, qAccurate, processes=None, pythonExe=None, chunkSize=5000):
+
+    ### Calculates contact geometry for all pairs in parallel and merges the results in pair order
+    tasks = [(connectsPair[i:i +chunkSize], searchDistance, surfaceThickness, surfaceForced, qAccurate) for i in range(0, len(connectsPair), chunkSize)]
+    results = broadphase_runPool(path, broadphase_contactGeometryChunk, tasks, processes, pythonExe)
+    connectsGeo = []; connectsLoc = []
+    for geos, locs in results:
+        connectsGeo.extend(geos); connectsLoc.extend(locs)
+    return connectsGeo, connectsLoc
+
+################################################################################
+
+def broadphase_createFixture(cntAxis=10, size=1.0, gap=0.005, seed=0):
+
+    ### Creates arrays for a regular grid of slightly varied boxes (for tests and benchmarks)
+    rng = numpy.random.RandomState(seed)
+    grid = numpy.array([(x, y, z) for x in range(cntAxis) for y in range(cntAxis) for z in range(cntAxis)], dtype=numpy.float64)
+    locs = grid *(size +gap)
+    dims = size *(1 +rng.uniform(-gap, gap, (len(grid), 3)))
+    return broadphase_createBoxes(locs, dims)
+
+########################################
+
+def broadphase_createBoxes(locs, dims):
+
+    ### Creates arrays for axis aligned boxes from their centers and dimensions
+    locs = numpy.asarray(locs, dtype=numpy.float64); dims = numpy.asarray(dims, dtype=numpy.float64)
+    cntObjs = len(locs)
+    corners = numpy.array([(x, y, z) for x in (-.5, .5) for y in (-.5, .5) for z in (-.5, .5)])
+    faces = numpy.array([(0,1,3,2), (4,6,7,5), (0,4,5,1), (2,3,7,6), (0,2,6,4), (1,5,7,3)])
+    verts = (locs[:, None, :] +corners[None, :, :] *dims[:, None, :]).reshape(-1, 3)
+    vertOfs = numpy.arange(cntObjs +1) *8
+    bbMin, bbMax = broadphase_calcAABBs(verts, vertOfs)
+    faceLoopVerts = (faces[None, :, :] +vertOfs[:-1, None, None]).ravel()
+    faceCenters = verts[faceLoopVerts].reshape(-1, 4, 3).mean(axis=1)
+    faceDims = numpy.repeat(dims, 6, axis=0)
+    faceAxis = numpy.tile([0, 0, 1, 1, 2, 2], cntObjs)  # Normal axis per face
+    faceAreas = faceDims.prod(axis=1) /faceDims[numpy.arange(len(faceDims)), faceAxis]
+    return {"verts": verts, "vertOfs": vertOfs, "bbMin": bbMin, "bbMax": bbMax, "locs": locs, "dims": dims,
+            "nonMan": numpy.zeros(cntObjs, dtype=numpy.int8), "nearest": numpy.empty((0, 0), dtype=numpy.int64),
+            "faceCenters": faceCenters, "faceAreas": faceAreas, "faceOfs": numpy.arange(cntObjs +1) *6,
+            "faceLoopStart": numpy.arange(cntObjs *6) *4, "faceLoopTotal": numpy.full(cntObjs *6, 4), "faceLoopVerts": faceLoopVerts}
+
+########################################
+
+def broadphase_main(argv):
+
+    if len(argv) < 1 or argv[0] != "benchmark":
+        print("Usage: python broadphase.py benchmark [--objects <count per axis>] [--processes <count>] [--search <distance>] [--limit <count>] [--accurate]")
+        return 1
+    cntAxis = 10; processes = None; searchDistance = 0.02; connectionCountLimit = 0; qAccurate = 0
+    i = 1
+    while i < len(argv):
+        if   argv[i] == "--objects":   i += 1; cntAxis = int(argv[i])
+        elif argv[i] == "--processes": i += 1; processes = int(argv[i])
+        elif argv[i] == "--search":    i += 1; searchDistance = float(argv[i])
+        elif argv[i] == "--limit":     i += 1; connectionCountLimit = int(argv[i])
+        elif argv[i] == "--accurate":  qAccurate = 1
+        i += 1
+    arrays = broadphase_createFixture(cntAxis)
+    if connectionCountLimit: arrays["nearest"] = broadphase_calcNearest(arrays["locs"], connectionCountLimit +1)
+    path = broadphase_exportShared(arrays)
+    try:
+        print("Objects: %d, processes: %s" %(len(arrays["locs"]), processes or os.cpu_count()))
+        results = []
+        for procs in (1, processes):
+            time_start = time.time()
+            connectsPair, connectsPairDist = broadphase_findPairs(path, searchDistance, connectionCountLimit, procs)
+            time_pairs = time.time() -time_start
+            connectsGeo, connectsLoc = broadphase_contactGeometryAll(path, connectsPair, searchDistance, 0, 0, qAccurate, procs)
+            time_geo = time.time() -time_start -time_pairs
+            print("%s: %d pairs in %0.2f s, contact geometry in %0.2f s" %("Serial" if procs == 1 else "Parallel", len(connectsPair), time_pairs, time_geo))
+            results.append((connectsPair, connectsGeo, connectsLoc))
+        if results[0] != results[1]:
+            print("Error: Parallel results differ from serial results.")
+            return 1
+        print("Parallel results are identical to serial results.")
+    finally:
+        broadphase_removeShared(path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(broadphase_main(sys.argv[1:]))
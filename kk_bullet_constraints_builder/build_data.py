@@ -146,6 +146,7 @@ def storeConfigDataInScene(scene):
     scene["bcb_prop_disableCollisionPerm"] = props.disableCollisionPerm
     scene["bcb_prop_lowerBrkThresPriority"] = props.lowerBrkThresPriority
     scene["bcb_prop_detonatorObj"] = props.detonatorObj
+    scene["bcb_prop_roiObj"] = props.roiObj
     
     ### Because ID properties doesn't support different var types per list I do the trick of inverting the 2-dimensional elemGrps array
     elemGrps = mem["elemGrps"]
@@ -357,6 +358,8 @@ def getConfigDataFromScene(scene):
         props.lowerBrkThresPriority = scene["bcb_prop_lowerBrkThresPriority"]
     if "bcb_prop_detonatorObj" in scene.keys():
         props.detonatorObj = scene["bcb_prop_detonatorObj"]
+    if "bcb_prop_roiObj" in scene.keys():
+        props.roiObj = scene["bcb_prop_roiObj"]
         
     #if len(warning): return warning
             
@@ -30,7 +30,7 @@
 
 ################################################################################
 
-import bpy, time
+import bpy, os, time
 mem = bpy.app.driver_namespace
 
 ### Import submodules
@@ -73,22 +73,45 @@ def build():
                     
                     ###### Prepare objects (make unique, apply transforms etc.)
                     prepareObjects(objs)
-                    ###### Find connections by vertex pairs
-                    #connectsPair, connectsPairDist = findConnectionsByVertexPairs(objs, objsEGrp)
-                    ###### Find connections by boundary box intersection and skip connections whose elements are too small and store them for later parenting
-                    connectsPair, connectsPairDist = findConnectionsByBoundaryBoxIntersection(objs)
-                    ###### Delete connections whose elements are too small and make them parents instead
-                    if props.minimumElementSize: connectsPair, connectsPairParent = deleteConnectionsWithTooSmallElementsAndParentThemInstead(objs, connectsPair, connectsPairDist)
-                    else: connectsPairParent = []
-                    ###### Delete connections with too few connected vertices
-                    #connectsPair = deleteConnectionsWithTooFewConnectedVertices(objs, objsEGrp, connectsPair)
-                    ###### Calculate contact area for all connections
-                    ### For now this is not used anymore as it is less safe than to derive an accurate contact area indirectly by using: volume /length
-                    if props.useAccurateArea:
-                        #connectsGeo, connectsLoc = calculateContactAreaBasedOnBooleansForAll(objs, connectsPair)
-                        connectsGeo, connectsLoc = calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate=1)
+                    ###### Export geometry bundle for the headless builder
+                    if len(geometryBundleFile): exportGeometryBundle(objs, objsEGrp, geometryBundleFile)
+                    ###### Find connections and calculate contact areas tile by tile (only these two stages are tiled)
+                    if tileSize:
+                        tiles = createSpatialTiles(objs, tileSize, props.searchDistance)
+                        connectsPair, connectsPairParent, connectsGeo, connectsLoc = findConnectionsTiled(objs, tiles)
                     else:
-                        connectsGeo, connectsLoc = calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate=0)
+                        ###### Find connections by vertex pairs
+                        #connectsPair, connectsPairDist, connectsPairCnt = findConnectionsByVertexPairs(objs, objsEGrp)
+                        ###### Export object arrays to shared memory for the parallel workers
+                        if parallelProcesses:
+                            pathShared = exportObjectArraysToShared(objs)
+                            # Shared arrays are removed again even if a stage fails
+                            try:
+                                ###### Find connections by boundary box intersection
+                                connectsPair, connectsPairDist = findConnectionsByBoundaryBoxIntersectionParallel(pathShared)
+                                ###### Delete connections whose elements are too small and make them parents instead
+                                if props.minimumElementSize: connectsPair, connectsPairParent = deleteConnectionsWithTooSmallElementsAndParentThemInstead(objs, connectsPair, connectsPairDist)
+                                else: connectsPairParent = []
+                                ###### Calculate contact area for all connections
+                                connectsGeo, connectsLoc = calculateContactAreaBasedOnBoundaryBoxesForAllParallel(pathShared, connectsPair, qAccurate=props.useAccurateArea)
+                            finally:
+                                broadphase_removeShared(pathShared)
+                        else:
+                            ###### Find connections by boundary box intersection and skip connections whose elements are too small and store them for later parenting
+                            connectsPair, connectsPairDist = findConnectionsByBoundaryBoxIntersection(objs)
+                            ###### Delete connections whose elements are too small and make them parents instead
+                            if props.minimumElementSize: connectsPair, connectsPairParent = deleteConnectionsWithTooSmallElementsAndParentThemInstead(objs, connectsPair, connectsPairDist)
+                            else: connectsPairParent = []
+                            ###### Delete connections with too few connected vertices
+                            #connectsPair = deleteConnectionsWithTooFewConnectedVertices(objs, objsEGrp, connectsPair, connectsPairCnt)
+                            ###### Calculate contact area for all connections
+                            ### For now this is not used anymore as it is less safe than to derive an accurate contact area indirectly by using: volume /length
+                            if props.useAccurateArea:
+                                #connectsGeo, connectsLoc = calculateContactAreaBasedOnBooleansForAll(objs, connectsPair)
+                                ### Exact area by polygon clipping where possible, boundary box estimation as fallback
+                                connectsGeo, connectsLoc = calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate=1, qClip=qPolygonClipping)
+                            else:
+                                connectsGeo, connectsLoc = calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate=0)
                     ###### Delete connections with zero contact area
                     connectsPair, connectsGeo, connectsLoc = deleteConnectionsWithZeroContactArea(objs, connectsPair, connectsGeo, connectsLoc)
                     ###### Delete connections with references from predefined constraints
@@ -118,6 +141,8 @@ def build():
                             emptyObjs = [0 for i in range(len(constsConnect))]
                         ###### Bundling close empties into clusters, merge locations and count connections per cluster
                         if props.clusterRadius > 0: bundlingEmptyObjsToClusters(connectsLoc, connectsConsts)
+                        ###### Write connection table of the scene build next to the geometry bundle for comparison with the headless builder
+                        if len(geometryBundleFile): writeConnectionTable(objs, objsEGrp, connectsPair, connectsGeo, connectsLoc, os.path.splitext(geometryBundleFile)[0] +".csv")
                         # Restore old layers state
                         scene.update()  # Required to update empty locations before layer switching
                         scene.layers = [bool(q) for q in layersBak]  # Convert array into boolean (required by layers)
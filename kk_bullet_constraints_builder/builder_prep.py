@@ -30,13 +30,15 @@
 
 ################################################################################
 
-import bpy, mathutils, sys, math, bmesh, array
+import bpy, mathutils, sys, math, bmesh, array, numpy
 from mathutils import Vector
 from math import *
 mem = bpy.app.driver_namespace
 
 ### Import submodules
 from global_vars import *      # Contains global variables
+from broadphase import *       # Contains parallel connection search and contact estimation workers (independent from Blender)
+from core import *             # Contains headless connection table builder operating on geometry bundles (independent from Blender)
 
 ################################################################################
 
@@ -56,22 +58,44 @@ def initGeneralRigidBodyWorldSettings(scene):
 
 ################################################################################   
 
+def createObjectGroupMap():
+
+    ### Create a reverse lookup dictionary of which groups every object belongs to (single pass over all groups)
+    objGrps = {}
+    for grp in bpy.data.groups:
+        grpName = grp.name
+        for obj in grp.objects:
+            if obj.name in objGrps: objGrps[obj.name].append(grpName)
+            else: objGrps[obj.name] = [grpName]
+            
+    return objGrps
+
+########################################
+
 def createElementGroupIndex(objs):
 
     ### Create a list about which object belongs to which element group
     elemGrps = mem["elemGrps"]
-    objsEGrps = []
+    objGrps = createObjectGroupMap()
+    
+    ### Map group names to element group indices and find default groups (element groups with empty name)
+    elemGrpsIndex = {}
+    elemGrpsDefault = []
+    for k in range(len(elemGrps)):
+        elemGrpName = elemGrps[k][EGSidxName]
+        if elemGrpName == '': elemGrpsDefault.append(k)
+        elif elemGrpName in elemGrpsIndex: elemGrpsIndex[elemGrpName].append(k)
+        else: elemGrpsIndex[elemGrpName] = [k]
+    
+    objsEGrp = []
     errorsShown = 1
     cnt = 0
     for obj in objs:
         objGrpsTmp = []
-        for elemGrp in elemGrps:
-            elemGrpName = elemGrp[EGSidxName]
-            if elemGrpName in bpy.data.groups:
-                if obj != None:
-                    try: bpy.data.groups[elemGrpName].objects[obj.name]
-                    except: pass
-                    else: objGrpsTmp.append(elemGrps.index(elemGrp))
+        if obj != None and obj.name in objGrps:
+            for grpName in objGrps[obj.name]:
+                if grpName in elemGrpsIndex: objGrpsTmp.extend(elemGrpsIndex[grpName])
+            objGrpsTmp.sort()  # Keep element group order so the first matching element group wins
         if len(objGrpsTmp) > 1:
             if errorsShown < 2:
                 sys.stdout.write("Warning: Object %s belongs to more than one element group, defaults are used. Element groups:" %obj.name)
@@ -84,32 +108,15 @@ def createElementGroupIndex(objs):
                 errorsShown += 1
         # If selected object is not part of any scene group try to find an element group with empty name to use (default group)
         elif len(objGrpsTmp) == 0:
-            for k in range(len(elemGrps)):
-                elemGrpName = elemGrps[k][EGSidxName]
-                if elemGrpName == '':
-                    objGrpsTmp.append(k)
-            objsEGrps.append(objGrpsTmp)
-        # Assign all found groups to object
+            objGrpsTmp = elemGrpsDefault
+        
+        ### Taking only first item of the element group lists per object into account (the BCB can only manage one element group per object)
         if len(objGrpsTmp) > 0:
-            objsEGrps.append(objGrpsTmp)
+            objsEGrp.append(objGrpsTmp[0])
         # If not even a default group is available then use element group 0 as fallback
         # (Todo: flag the group as -1 and deal with it later, but that's also complex)
-        else: objsEGrps.append([0])
-
-    ### Taking only first item of the element group lists per object into account (the BCB can only manage one element group per object)
-    ### Earlier idea was to expand objs array for objects being member of multiple element groups (item duplication allowed)
-    ### but this is not feasible since all the other functions within the BCB would need to respect these.
-    #objsNew = []
-    objsEGrp = []
-    objsEGrps_iter = iter(objsEGrps)
-    for obj in objs:
-        eGrps = next(objsEGrps_iter)
-        #for eGrp in eGrps:
-        #    objsEGrp.append(eGrp)
-        #    objsNew.append(obj)
-        if len(eGrps) > 0:
-            objsEGrp.append(eGrps[0])
-            cnt += 1
+        else: objsEGrp.append(0)
+        cnt += 1
     
     return objsEGrp, cnt
 
@@ -221,125 +228,171 @@ def prepareObjects(objs):
     # Set object centers to geometry origin
     bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS')
     ### Converting mesh scale to 1
-    bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
+    if qDirectMeshOps:
+        # Apply scale directly to mesh data and leave only remaining objects selected for the operator
+        objsRest = applyScaleToMeshes(objs)
+        for obj in objs: obj.select = 0
+        for obj in objsRest: obj.select = 1
+        if len(objsRest): bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
+        # Recalculate object matrices, otherwise matrix_world still contains the old scale which is now already part of the mesh
+        bpy.context.scene.update()
+    else: bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
+    
+########################################
+
+def applyScaleToMeshes(objs):
+
+    ### Apply object scale directly to the vertex coordinates of the meshes (same as transform_apply for scale only)
+    ### Returns objects which can't be handled this way (negative scale, shape keys, children, multi-user meshes) to be left for the operator
+    objsRest = []
+    for obj in objs:
+        me = obj.data
+        scale = numpy.array(obj.scale, dtype=numpy.float64)
+        if numpy.all(scale == 1): continue
+        if numpy.any(scale <= 0) or me.shape_keys != None or len(obj.children) or me.users > 1:
+            objsRest.append(obj)
+            continue
+        co = numpy.empty(len(me.vertices) *3, dtype=numpy.float32)
+        me.vertices.foreach_get("co", co)
+        co = (co.reshape(-1, 3) *scale).astype(numpy.float32)
+        me.vertices.foreach_set("co", co.ravel())
+        me.update()
+        obj.scale = (1, 1, 1)
+        
+    return objsRest
     
 ################################################################################   
 
 def boundaryBox(obj, qGlobalSpace):
 
-    ### Calculate boundary box corners and center from given object
+    ### Calculate boundary box corners and center from given object (done by the core on the vertex array, see core_boundaryBox)
     me = obj.data
-    verts = me.vertices
+    co = numpy.empty(len(me.vertices) *3, dtype=numpy.float32)
+    me.vertices.foreach_get("co", co)
+    co = co.reshape(-1, 3).astype(numpy.float64)
     if qGlobalSpace:
         # Multiply local coordinates by world matrix to get global coordinates
-        mat = obj.matrix_world
-        bbMin = mat *verts[0].co
-        bbMax = mat *verts[0].co
-    else:
-        bbMin = verts[0].co.copy()
-        bbMax = verts[0].co.copy()
-    for vert in verts:
-        if qGlobalSpace: loc = mat *vert.co
-        else:            loc = vert.co.copy()
-        if bbMax[0] < loc[0]: bbMax[0] = loc[0]
-        if bbMin[0] > loc[0]: bbMin[0] = loc[0]
-        if bbMax[1] < loc[1]: bbMax[1] = loc[1]
-        if bbMin[1] > loc[1]: bbMin[1] = loc[1]
-        if bbMax[2] < loc[2]: bbMax[2] = loc[2]
-        if bbMin[2] > loc[2]: bbMin[2] = loc[2]
-    bbCenter = (bbMin +bbMax) /2
-    
-    return bbMin, bbMax, bbCenter
+        mat = numpy.array(obj.matrix_world, dtype=numpy.float64)
+        co = co.dot(mat[:3, :3].T) +mat[:3, 3]
+    arrays = {}
+    arrays["bbMin"], arrays["bbMax"] = broadphase_calcAABBs(co, numpy.array([0, len(co)]))
+    bbMin, bbMax, bbCenter = core_boundaryBox(arrays, 0)
+    
+    return Vector(bbMin), Vector(bbMax), Vector(bbCenter)
 
 ################################################################################   
 
+def getWorldVerticesForAll(objs):
+    
+    ### Gather world space vertex coordinates of all objects in one array tagged by owner index
+    cnts = [len(obj.data.vertices) for obj in objs]
+    cos = numpy.empty((sum(cnts), 3), dtype=numpy.float64)
+    owners = numpy.repeat(numpy.arange(len(objs), dtype=numpy.int64), cnts)
+    ofs = 0
+    for obj, cnt in zip(objs, cnts):
+        if cnt == 0: continue
+        co = numpy.empty(cnt *3, dtype=numpy.float32)
+        obj.data.vertices.foreach_get("co", co)
+        co = co.reshape(cnt, 3)
+        mat = numpy.array(obj.matrix_world, dtype=numpy.float64)
+        # Multiply matrix by vertex coordinates to get global coordinates
+        cos[ofs:ofs +cnt] = co.dot(mat[:3, :3].T) +mat[:3, 3]
+        ofs += cnt
+        
+    return cos, owners
+
+########################################
+
+def findVertexPairsInGrid(cos, owners, searchDistance, chunkSize=1000000):
+    
+    ### Find all vertex pairs of different owners within search distance using one global spatial hash grid
+    ### Returns owner indices A and B per vertex pair (A < B), each pair is found only once
+    if searchDistance <= 0: searchDistance = 0.000001
+    cells = numpy.floor((cos -cos.min(axis=0)) /searchDistance).astype(numpy.int64) +1
+    dims = cells.max(axis=0) +2
+    keys = (cells[:, 0] *dims[1] +cells[:, 1]) *dims[2] +cells[:, 2]
+    order = numpy.argsort(keys, kind='mergesort')
+    keysSorted = keys[order]
+    searchDistanceSq = searchDistance *searchDistance
+    
+    ### Half neighborhood of offsets (13 plus the own cell) so every cell pair is only compared once
+    offsets = []
+    for x in (-1, 0, 1):
+        for y in (-1, 0, 1):
+            for z in (-1, 0, 1):
+                if (x, y, z) >= (0, 0, 0): offsets.append((x, y, z))
+    
+    pairsA = []; pairsB = []
+    for off in offsets:
+        qOwnCell = off == (0, 0, 0)
+        keyOff = (off[0] *dims[1] +off[1]) *dims[2] +off[2]
+        for ofs in range(0, len(keys), chunkSize):
+            qIdx = order[ofs:ofs +chunkSize]
+            nKeys = keysSorted[ofs:ofs +chunkSize] +keyOff
+            lo = numpy.searchsorted(keysSorted, nKeys, side='left')
+            hi = numpy.searchsorted(keysSorted, nKeys, side='right')
+            if qOwnCell: lo = numpy.arange(ofs, ofs +len(qIdx)) +1  # Only compare with vertices behind query vertex in the same cell
+            cnts = numpy.maximum(hi -lo, 0)
+            total = int(cnts.sum())
+            if total == 0: continue
+            ### Expand candidate ranges into flat index arrays
+            idxA = numpy.repeat(qIdx, cnts)
+            starts = numpy.repeat(lo -numpy.cumsum(cnts) +cnts, cnts)
+            idxB = order[starts +numpy.arange(total)]
+            ### Keep only pairs of different owners within search distance
+            mask = owners[idxA] != owners[idxB]
+            idxA = idxA[mask]; idxB = idxB[mask]
+            diff = cos[idxA] -cos[idxB]
+            mask = numpy.einsum('ij,ij->i', diff, diff) <= searchDistanceSq
+            oA = owners[idxA[mask]]; oB = owners[idxB[mask]]
+            pairsA.append(numpy.minimum(oA, oB)); pairsB.append(numpy.maximum(oA, oB))
+            
+    if len(pairsA) == 0:
+        return numpy.empty(0, dtype=numpy.int64), numpy.empty(0, dtype=numpy.int64)
+    return numpy.concatenate(pairsA), numpy.concatenate(pairsB)
+
+########################################
+
 def findConnectionsByVertexPairs(objs, objsEGrp):
     
     ### Find connections by vertex pairs
     print("Searching connections by vertex pairs... (%d)" %len(objs))
     
     props = bpy.context.window_manager.bcb
-    elemGrps = mem["elemGrps"]
-
-    ### Build kd-tree for object locations
-    kdObjs = mathutils.kdtree.KDTree(len(objs))
-    for i, obj in enumerate(objs):
-        kdObjs.insert(obj.location, i)
-    kdObjs.balance()
+    objCnt = len(objs)
+    
+    ### Build one global spatial index over all world space vertices and query it in bulk
+    cos, owners = getWorldVerticesForAll(objs)
+    pairsA, pairsB = findVertexPairsInGrid(cos, owners, props.searchDistance)
+    bpy.context.window_manager.progress_update(0.5)
+    
+    ### Group vertex pairs by owner pair
+    pairKeys, vertPairCnts = numpy.unique(pairsA *objCnt +pairsB, return_counts=True)
+    pairsA = pairKeys //objCnt; pairsB = pairKeys %objCnt
+    
+    ### Limit connections to the nearest objects by location (same as kd-tree neighbor search per object)
+    if props.connectionCountLimit and len(pairKeys):
+        kdObjs = mathutils.kdtree.KDTree(objCnt)
+        for i, obj in enumerate(objs):
+            kdObjs.insert(obj.location, i)
+        kdObjs.balance()
+        allowedKeys = []
+        for k, obj in enumerate(objs):
+            for (co, l, dist) in kdObjs.find_n(obj.location, props.connectionCountLimit +1):  # +1 because the first item will be the object itself
+                if k != l: allowedKeys.append(min(k, l) *objCnt +max(k, l))
+        mask = numpy.in1d(pairKeys, numpy.array(allowedKeys, dtype=numpy.int64))
+        pairsA = pairsA[mask]; pairsB = pairsB[mask]; vertPairCnts = vertPairCnts[mask]
     
-    ### Build kd-trees for every object's vertices
-    kdsMeComp = []
-    for obj in objs:
-        me = obj.data
-        mat = obj.matrix_world
-        
-        kd = mathutils.kdtree.KDTree(len(me.vertices))
-        for i, v in enumerate(me.vertices):
-            loc = mat *v.co    # Multiply matrix by vertex coordinates to get global coordinates
-            kd.insert(loc, i)
-        kd.balance()
-        kdsMeComp.append(kd)
-                        
-    ### Find connections by vertex pairs
-    connectsPair = []          # Stores both connected objects indices per connection
-    connectsPairDist = []      # Stores distance between both elements
-    for k in range(len(objs)):
-        sys.stdout.write('\r' +"%d" %k)
-        # Update progress bar
-        bpy.context.window_manager.progress_update(k /len(objs))
-        
-        qNextObj = 0
-        obj = objs[k]
-        mat = obj.matrix_world
-        me = obj.data
-                
-        ### Find closest objects via kd-tree
-        co_find = obj.location
-        aIndex = []; aDist = [] #; aCo = [] 
-        if props.connectionCountLimit:
-            for (co, index, dist) in kdObjs.find_n(co_find, props.connectionCountLimit +1):  # +1 because the first item will be removed
-                aIndex.append(index); aDist.append(dist) #; aCo.append(co)
-        else:
-            for (co, index, dist) in kdObjs.find_range(co_find, 999999):
-                aIndex.append(index); aDist.append(dist) #; aCo.append(co) 
-        aIndex = aIndex[1:]; aDist = aDist[1:] # Remove first item because it's the same as co_find (zero distance)
-        
-        ### Walk through current object vertices
-        for m in range(len(me.vertices)):
-            vert = me.vertices[m]
-            co_find = mat *vert.co     # Multiply matrix by vertex coordinates to get global coordinates
-                        
-            # Loop through comparison object found
-            connectCnt = 0
-            for j in range(len(aIndex)):
-                l = aIndex[j]
-                
-                # Skip same object index
-                if k != l:
-                    # Use object specific vertex kd-tree
-                    kdMeComp = kdsMeComp[l]
-                    
-                    ### Find closest vertices via kd-tree in comparison object
-                    if len(kdMeComp.find_range(co_find, props.searchDistance)) > 0:   # If vert is within search range add connection to sublist
-                        coComp = kdMeComp.find(co_find)[0]    # Find coordinates of the closest vertex
-                        co = (co_find +coComp) /2             # Calculate center of both vertices
-                        
-                        ### Store connection if not already existing
-                        pair = [k, l]
-                        pair.sort()
-                        if pair not in connectsPair:
-                            connectsPair.append(pair)
-                            connectsPairDist.append(aDist[j])
-                            connectCnt += 1
-                            if connectCnt == props.connectionCountLimit:
-                                if elemGrps[objsEGrp[k]][EGSidxRqVP] <= 1:
-                                    qNextObj = 1
-                                    break
-                            
-            if qNextObj: break
-        
-    print()
-    return connectsPair, connectsPairDist
+    ### Calculate distances between both elements
+    locs = numpy.array([obj.location for obj in objs], dtype=numpy.float64).reshape(-1, 3)
+    dists = numpy.linalg.norm(locs[pairsA] -locs[pairsB], axis=1)
+    
+    connectsPair = numpy.column_stack((pairsA, pairsB)).tolist()  # Stores both connected objects indices per connection
+    connectsPairDist = dists.tolist()                             # Stores distance between both elements
+    connectsPairCnt = vertPairCnts.tolist()                       # Stores number of vertex pairs found per connection
+    
+    print("Vertex pairs found:", int(vertPairCnts.sum()))
+    return connectsPair, connectsPairDist, connectsPairCnt
 
 ################################################################################   
 
@@ -420,11 +473,250 @@ def findConnectionsByBoundaryBoxIntersection(objs):
 
 ################################################################################   
 
+def createObjectArrays(objs):
+    
+    ### Gather world space vertex, face and boundary box arrays of all objects (concatenated, see broadphase_arrayNames)
+    props = bpy.context.window_manager.bcb
+    verts = []; vertCnts = []
+    faceCenters = []; faceAreas = []; faceCnts = []
+    faceLoopStart = []; faceLoopTotal = []; faceLoopVerts = []
+    vertOfs = 0; loopOfs = 0
+    for obj in objs:
+        co, loopVerts, loopStart, loopTotal, normals, centers, areas, bbMin, bbMax = getWorldPolygons(obj)
+        verts.append(co); vertCnts.append(len(co))
+        faceCenters.append(centers); faceAreas.append(areas); faceCnts.append(len(areas))
+        faceLoopStart.append(loopStart +loopOfs); faceLoopTotal.append(loopTotal)
+        faceLoopVerts.append(loopVerts +vertOfs)
+        vertOfs += len(co); loopOfs += len(loopVerts)
+    arrays = {}
+    arrays["verts"] = numpy.concatenate(verts)
+    arrays["vertOfs"] = numpy.concatenate(([0], numpy.cumsum(vertCnts))).astype(numpy.int64)
+    arrays["bbMin"], arrays["bbMax"] = broadphase_calcAABBs(arrays["verts"], arrays["vertOfs"])
+    arrays["locs"] = numpy.array([obj.location for obj in objs], dtype=numpy.float64).reshape(-1, 3)
+    arrays["dims"] = numpy.array([obj.dimensions for obj in objs], dtype=numpy.float64).reshape(-1, 3)
+    arrays["nonMan"] = numpy.array([isNonManifold(obj.data) for obj in objs], dtype=numpy.int8)
+    arrays["faceCenters"] = numpy.concatenate(faceCenters)
+    arrays["faceAreas"] = numpy.concatenate(faceAreas)
+    arrays["faceOfs"] = numpy.concatenate(([0], numpy.cumsum(faceCnts))).astype(numpy.int64)
+    arrays["faceLoopStart"] = numpy.concatenate(faceLoopStart).astype(numpy.int64)
+    arrays["faceLoopTotal"] = numpy.concatenate(faceLoopTotal).astype(numpy.int64)
+    arrays["faceLoopVerts"] = numpy.concatenate(faceLoopVerts).astype(numpy.int64)
+    
+    ### Find nearest objects via kd-tree for the connection count limit
+    if props.connectionCountLimit:
+        kdObjs = mathutils.kdtree.KDTree(len(objs))
+        for i, obj in enumerate(objs):
+            kdObjs.insert(obj.location, i)
+        kdObjs.balance()
+        nearest = []
+        for obj in objs:
+            aIndex = [index for (co, index, dist) in kdObjs.find_n(obj.location, props.connectionCountLimit +1)]
+            aIndex.extend([aIndex[0]] *(props.connectionCountLimit +1 -len(aIndex)))  # Pad with first item if there are too few objects
+            nearest.append(aIndex)
+        arrays["nearest"] = numpy.array(nearest, dtype=numpy.int64)
+    else: arrays["nearest"] = numpy.empty((0, 0), dtype=numpy.int64)
+
+    return arrays
+
+########################################
+
+def exportObjectArraysToShared(objs):
+    
+    ### Export world space vertex, face and boundary box arrays of all objects to shared memory for the parallel workers
+    print("Exporting object arrays for parallel processing... (%d)" %len(objs))
+    
+    return broadphase_exportShared(createObjectArrays(objs))
+
+########################################
+
+def createElementArrays(objs, objsEGrp):
+    
+    ### Gather element group, location and rigid body arrays of all objects plus the element group settings as input for the core (core.py)
+    elemGrps = mem["elemGrps"]
+    arrays = {}
+    arrays["objNames"] = numpy.array([obj.name if obj != None else "" for obj in objs])
+    arrays["objsEGrp"] = numpy.array(objsEGrp, dtype=numpy.int64)
+    arrays["worldLocs"] = numpy.array([obj.matrix_world.to_translation() if obj != None else (0, 0, 0) for obj in objs], dtype=numpy.float64).reshape(-1, 3)
+    arrays["active"] = numpy.array([obj != None and obj.rigid_body != None and obj.rigid_body.type == 'ACTIVE' for obj in objs], dtype=numpy.int8)
+    arrays["connectTypeCnts"] = numpy.array([connectType[1] for connectType in connectTypes], dtype=numpy.int64)
+    ### Element group settings
+    for name, idx in (("egName", EGSidxName), ("egCTyp", EGSidxCTyp), ("egPrio", EGSidxPrio), ("egNoHo", EGSidxNoHo), ("egNoCo", EGSidxNoCo),
+                      ("egDClP", EGSidxDClP), ("egCyln", EGSidxCyln), ("egBTX", EGSidxBTX), ("egBTPL", EGSidxBTPL),
+                      ("egBTC", EGSidxBTC), ("egBTT", EGSidxBTT), ("egBTS", EGSidxBTS), ("egBTS9", EGSidxBTS9),
+                      ("egBTB", EGSidxBTB), ("egBTB9", EGSidxBTB9), ("egBTP", EGSidxBTP)):
+        arrays[name] = numpy.array([elemGrp[idx] for elemGrp in elemGrps])
+    return arrays
+
+########################################
+
+def getCoreProps():
+    
+    ### Gather the build settings used by the core from the properties and global variables
+    props = bpy.context.window_manager.bcb
+    coreProps = {"minimumContactArea": minimumContactArea}
+    for name in core_propDefaults:
+        if hasattr(props, name): coreProps[name] = getattr(props, name)
+    return coreProps
+
+########################################
+
+def exportGeometryBundle(objs, objsEGrp, filepath):
+    
+    ### Export object arrays, element group settings and build settings into a geometry bundle for the headless builder (core.py)
+    print("Exporting geometry bundle... (%d)" %len(objs))
+    
+    arrays = createObjectArrays(objs)
+    arrays.update(createElementArrays(objs, objsEGrp))
+    core_saveBundle(filepath, arrays, getCoreProps())
+    print("Geometry bundle written:", filepath)
+
+########################################
+
+def writeConnectionTable(objs, objsEGrp, connectsPair, connectsGeo, connectsLoc, filepath):
+    
+    ### Write the connection table of the scene build in the same format as the headless builder, so both can be compared by "core.py check"
+    arrays = createElementArrays(objs, objsEGrp)
+    connectsConsts, constsConnect, connectsCT, connectsEGrp, connectsBrkThres = core_createConnectionData(arrays, getCoreProps(), connectsPair, connectsLoc, connectsGeo)
+    table = core_createTable(arrays, connectsPair, connectsGeo, connectsLoc, connectsConsts, connectsCT, connectsEGrp, connectsBrkThres)
+    core_writeTable(filepath, table)
+    print("Connection table written:", filepath)
+
+########################################
+
+def findConnectionsByBoundaryBoxIntersectionParallel(pathShared):
+    
+    ### Find connections by boundary box intersection in parallel processes
+    print("Searching connections by boundary box intersection in %d processes..." %parallelProcesses)
+    
+    props = bpy.context.window_manager.bcb
+    connectsPair, connectsPairDist = broadphase_findPairs(pathShared, props.searchDistance, props.connectionCountLimit, parallelProcesses, bpy.app.binary_path_python)
+    
+    print("Possible connections found:", len(connectsPair))
+    return connectsPair, connectsPairDist
+
+########################################
+
+def calculateContactAreaBasedOnBoundaryBoxesForAllParallel(pathShared, connectsPair, qAccurate):
+    
+    ### Calculate contact area for all connections in parallel processes
+    print("Calculating contact area for connections in %d processes..." %parallelProcesses)
+    
+    props = bpy.context.window_manager.bcb
+    connectsGeo, connectsLoc = broadphase_contactGeometryAll(pathShared, connectsPair, props.searchDistance, props.surfaceThickness, props.surfaceForced, qAccurate, parallelProcesses, bpy.app.binary_path_python)
+    connectsLoc = [Vector(loc) for loc in connectsLoc]
+    
+    return connectsGeo, connectsLoc
+
+################################################################################   
+
+def createSpatialTiles(objs, tileSize, margin):
+    
+    ### Partition objects into spatial tiles (XY) by their boundary box centers for building very large models tile by tile
+    ### Every tile owns the objects with the center inside and gets all other objects within the margin around the owned ones as working set
+    print("Partitioning elements into spatial tiles... (%d)" %len(objs))
+    
+    ### Calculate conservative world space boundary boxes from the object bounding box corners
+    bbMin = numpy.empty((len(objs), 3)); bbMax = numpy.empty((len(objs), 3))
+    for k in range(len(objs)):
+        obj = objs[k]
+        mat = obj.matrix_world
+        corners = numpy.array([mat *Vector(corner) for corner in obj.bound_box])
+        bbMin[k] = corners.min(axis=0); bbMax[k] = corners.max(axis=0)
+    tileKeys = numpy.floor((bbMin[:, :2] +bbMax[:, :2]) /2 /tileSize).astype(numpy.int64)
+    keys, tileIdx = numpy.unique(tileKeys, axis=0, return_inverse=True)
+    
+    tiles = []
+    for t in range(len(keys)):
+        idxOwned = numpy.flatnonzero(tileIdx == t)
+        # Region covering all owned objects extended by the margin, partners of owned objects are always within
+        regionMin = bbMin[idxOwned].min(axis=0) -margin
+        regionMax = bbMax[idxOwned].max(axis=0) +margin
+        idxWorking = numpy.flatnonzero(numpy.all(bbMax >= regionMin, axis=1) & numpy.all(bbMin <= regionMax, axis=1))
+        tiles.append([idxOwned.tolist(), idxWorking.tolist()])
+    
+    print("Tiles:", len(tiles))
+    return tiles
+
+########################################
+
+def findConnectionsTiled(objs, tiles):
+    
+    ### Find connections and calculate contact areas tile by tile so only one tile's intermediate data is held in memory at once
+    ### Seams are stitched by ownership: a pair is only kept by the tile owning its first element, whose working set already contains all partners within the margin
+    ### (the resulting connection lists and all later build stages still cover the whole scene)
+    props = bpy.context.window_manager.bcb
+    connectsPair = []
+    connectsPairParent = []
+    connectsPairParentDist = []
+    connectsGeo = []
+    connectsLoc = []
+    for t in range(len(tiles)):
+        idxOwned, idxWorking = tiles[t]
+        print("Tile %d of %d (elements: %d, including margin: %d)" %(t +1, len(tiles), len(idxOwned), len(idxWorking)))
+        tileObjs = [objs[i] for i in idxWorking]
+        owned = set(idxOwned)
+        
+        ###### Export object arrays of the tile to shared memory for the parallel workers
+        if parallelProcesses: pathShared = exportObjectArraysToShared(tileObjs)
+        # Shared arrays are removed again even if a stage fails
+        try:
+            ###### Find connections by boundary box intersection within the tile
+            if parallelProcesses: tilePair, tilePairDist = findConnectionsByBoundaryBoxIntersectionParallel(pathShared)
+            else: tilePair, tilePairDist = findConnectionsByBoundaryBoxIntersection(tileObjs)
+            ### Convert to global indices and keep only pairs whose first element is owned by this tile (pairs are sorted and working sets are in global order)
+            pairs = []; pairsDist = []
+            for k in range(len(tilePair)):
+                pair = [idxWorking[tilePair[k][0]], idxWorking[tilePair[k][1]]]
+                if pair[0] in owned:
+                    pairs.append(pair); pairsDist.append(tilePairDist[k])
+            del tilePair, tilePairDist
+            
+            ###### Delete connections whose elements are too small and collect them as parent candidates (filtered for all tiles at once below)
+            if props.minimumElementSize:
+                pairs, pairsParent, pairsParentDist = splitConnectionsByElementSize(objs, pairs, pairsDist)
+                connectsPairParent.extend(pairsParent)
+                connectsPairParentDist.extend(pairsParentDist)
+            del pairsDist
+            
+            ###### Calculate contact area for the connections of this tile
+            if parallelProcesses:
+                idxLocal = {idxWorking[i]: i for i in range(len(idxWorking))}
+                pairsLocal = [[idxLocal[pair[0]], idxLocal[pair[1]]] for pair in pairs]
+                geos, locs = calculateContactAreaBasedOnBoundaryBoxesForAllParallel(pathShared, pairsLocal, qAccurate=props.useAccurateArea)
+            else: geos, locs = calculateContactAreaBasedOnBoundaryBoxesForAll(objs, pairs, qAccurate=props.useAccurateArea, qClip=props.useAccurateArea and qPolygonClipping)
+        finally:
+            if parallelProcesses: broadphase_removeShared(pathShared)
+        connectsPair.extend(pairs)
+        connectsGeo.extend(geos)
+        connectsLoc.extend(locs)
+        del tileObjs, pairs, geos, locs
+        
+    ### Each child can only have one parent, so the nearest one is chosen over all tiles like in the untiled build
+    if props.minimumElementSize:
+        connectsPairParent = filterParentPairsByDistance(connectsPairParent, connectsPairParentDist)
+        print("Connections converted to parents:", len(connectsPairParent))
+    
+    print("Connections found in all tiles:", len(connectsPair))
+    return connectsPair, connectsPairParent, connectsGeo, connectsLoc
+
+################################################################################   
+
 def deleteConnectionsWithTooSmallElementsAndParentThemInstead(objs, connectsPair, connectsPairDist):
     
     ### Delete connections whose elements are too small and make them parents instead
     print("Make parents for too small elements and remove them as connections...")
     
+    connectsPair, connectsPairParent, connectsPairParentDist = splitConnectionsByElementSize(objs, connectsPair, connectsPairDist)
+    connectsPairParent = filterParentPairsByDistance(connectsPairParent, connectsPairParentDist)
+    
+    print("Connections converted and removed:", len(connectsPairParent))
+    return connectsPair, connectsPairParent
+
+########################################
+
+def splitConnectionsByElementSize(objs, connectsPair, connectsPairDist):
+    
+    ### Separate connections between a too small and a large enough element as child / parent pairs from the remaining connections
     props = bpy.context.window_manager.bcb
     connectsPairTmp = []
     connectsPairParent = []
@@ -455,6 +747,13 @@ def deleteConnectionsWithTooSmallElementsAndParentThemInstead(objs, connectsPair
             connectsPairParentDist.append(dist)
     connectsPair = connectsPairTmp
     
+    return connectsPair, connectsPairParent, connectsPairParentDist
+
+########################################
+
+def filterParentPairsByDistance(connectsPairParent, connectsPairParentDist):
+    
+    ### Keep only the nearest parent for every child
     # Sort list into the order of distance between elements
     if len(connectsPairParent) > 1:
         connectsPairParentDist, connectsPairParent = zip(*sorted(zip(connectsPairParentDist, connectsPairParent)))
@@ -468,101 +767,79 @@ def deleteConnectionsWithTooSmallElementsAndParentThemInstead(objs, connectsPair
             checkList.append(item[0])
     connectsPairParent = connectsPairParentTmp
     
-    print("Connections converted and removed:", len(connectsPairParent))
-    return connectsPair, connectsPairParent
+    return connectsPairParent
 
 ################################################################################   
 
+def setParentsDirectly(objsChildParent):
+
+    ### Make parents for all child / parent object pairs in one batch without operators (same result as parent_set with keep_transform)
+    ### World matrices are backed up first so the order of assignments doesn't matter
+    matsChild = [objChild.matrix_world.copy() for objChild, objParent in objsChildParent]
+    matsParent = [objParent.matrix_world.copy() for objChild, objParent in objsChildParent]
+    for k in range(len(objsChildParent)):
+        objChild, objParent = objsChildParent[k]
+        objChild.parent = None
+        objChild.matrix_basis = matsChild[k]  # Keep transform
+        objChild.parent = objParent
+        objChild.matrix_parent_inverse = matsParent[k].inverted()
+
+########################################
+
 def makeParentsForTooSmallElementsReal(objs, connectsPairParent):
     
     ### Create actual parents for too small elements
     print("Creating actual parents for too small elements... (%d)" %len(connectsPairParent))
     
-    ### Create a second scene to temporarily move objects to, to avoid depsgraph update overhead (optimization)
-    scene = bpy.context.scene
-    sceneTemp = bpy.data.scenes.new("BCB Temp Scene")
-    # Switch to original scene (shouldn't be necessary but is required for error free Bullet simulation on later scene switching for some strange reason)
-    bpy.context.screen.scene = scene
-    # Link cameras because in second scene is none and when coming back camera view will losing focus
-    objCameras = []
-    for objTemp in scene.objects:
-        if objTemp.type == 'CAMERA':
-            sceneTemp.objects.link(objTemp)
-            objCameras.append(objTemp)
-    # Switch to new scene
-    bpy.context.screen.scene = sceneTemp
-
-    # Deselect all objects
-    bpy.ops.object.select_all(action='DESELECT')
-    
-    ### Make parents
+    ### Union-find over the parent relations to skip pairs which would create a loop in parents (same as parent_set would refuse)
+    roots = list(range(len(objs)))
+    def findRoot(k):
+        while roots[k] != k:
+            roots[k] = roots[roots[k]]  # Path compression
+            k = roots[k]
+        return k
+    objsChildParent = []
     for k in range(len(connectsPairParent)):
-        sys.stdout.write('\r' +"%d" %k)
-        
-        objChild = objs[connectsPairParent[k][0]]
-        objParent = objs[connectsPairParent[k][1]]
+        idxChild, idxParent = connectsPairParent[k]
+        rootChild = findRoot(idxChild); rootParent = findRoot(idxParent)
+        if rootChild == rootParent:
+            print("Warning: Loop in parents, element is not parented:", objs[idxChild].name)
+            continue
+        roots[rootChild] = rootParent
+        objsChildParent.append([objs[idxChild], objs[idxParent]])
+    print("Parent clusters:", len(set(findRoot(idxParent) for idxChild, idxParent in connectsPairParent)))
 
-        # Link objects we're working on to second scene (we try because of the object unlink workaround)
-        try: sceneTemp.objects.link(objChild)
-        except: pass
-        try: sceneTemp.objects.link(objParent)
-        except: pass
+    ### Make parents
+    setParentsDirectly(objsChildParent)
 
-        ### Make parent
-        objParent.select = 1
-        objChild.select = 1
-        bpy.context.scene.objects.active = objParent   # Parent
-        bpy.ops.object.parent_set(type='OBJECT', keep_transform=True)
-        objParent.select = 0
-        objChild.select = 0
-
-#        # Unlink objects from second scene (leads to loss of rigid body settings, bug in Blender)
-#        sceneTemp.objects.unlink(objChild)
-#        sceneTemp.objects.unlink(objParent)
-        # Workaround: Delete second scene and recreate it (deleting objects indirectly without the loss of rigid body settings)
-        if k %200 == 0:   # Only delete scene every now and then so we have lower overhead from the relatively slow process
-            try:    bpy.data.scenes.remove(sceneTemp, do_unlink=1)
-            except: bpy.data.scenes.remove(sceneTemp)
-            sceneTemp = bpy.data.scenes.new("BCB Temp Scene")
-            # Link cameras because in second scene is none and when coming back camera view will losing focus
-            for obj in objCameras:
-                sceneTemp.objects.link(obj)
-            # Switch to new scene
-            bpy.context.screen.scene = sceneTemp
-    
-    # Switch back to original scene
-    bpy.context.screen.scene = scene
-    # Delete second scene
-    try:    bpy.data.scenes.remove(sceneTemp, do_unlink=1)
-    except: bpy.data.scenes.remove(sceneTemp)
+    # Deselect all objects
+    bpy.ops.object.select_all(action='DESELECT')
 
     ### Remove child object from rigid body world (should not be simulated anymore)
     for k in range(len(connectsPairParent)):
         objChild = objs[connectsPairParent[k][0]].select = 1
     bpy.ops.rigidbody.objects_remove()
         
-    print()
-
 ################################################################################   
 
-def deleteConnectionsWithTooFewConnectedVertices(objs, objsEGrp, connectsPair):
+def deleteConnectionsWithTooFewConnectedVertices(objs, objsEGrp, connectsPair, connectsPairCnt=None):
     
     ### Delete connections with too few connected vertices
     if debug: print("Deleting connections with too few connected vertices...")
     
     elemGrps = mem["elemGrps"]
-    connectsPairTmp = []
     connectCntOld = len(connectsPair)
-    connectCnt = 0
-    for i in range(len(connectsPair)):
-        pair = connectsPair[i]
-        vertPairCnt = len(connectsPair[i]) /2
-        reqVertexPairsObjA = elemGrps[objsEGrp[objs.index(objs[pair[0]])]][EGSidxRqVP]
-        reqVertexPairsObjB = elemGrps[objsEGrp[objs.index(objs[pair[1]])]][EGSidxRqVP]
-        if vertPairCnt >= reqVertexPairsObjA and vertPairCnt >= reqVertexPairsObjB:
-            connectsPairTmp.append(pair)
-            connectCnt += 1
-    connectsPair = connectsPairTmp
+    if connectCntOld == 0: return connectsPair
+    
+    ### Vectorized count filter, vertex pair counts per connection come from findConnectionsByVertexPairs()
+    pairs = numpy.array(connectsPair, dtype=numpy.int64).reshape(-1, 2)
+    if connectsPairCnt != None: vertPairCnts = numpy.array(connectsPairCnt)
+    else: vertPairCnts = numpy.full(len(pairs), pairs.shape[1] /2)
+    reqVertexPairs = numpy.array([elemGrp[EGSidxRqVP] for elemGrp in elemGrps])
+    reqVertexPairsObjs = reqVertexPairs[numpy.array(objsEGrp, dtype=numpy.int64)]
+    mask = (vertPairCnts >= reqVertexPairsObjs[pairs[:, 0]]) & (vertPairCnts >= reqVertexPairsObjs[pairs[:, 1]])
+    connectsPair = [connectsPair[i] for i in numpy.flatnonzero(mask)]
+    connectCnt = len(connectsPair)
     
     print("Connections skipped due to too few connecting vertices:", connectCntOld -connectCnt)
     return connectsPair
@@ -774,13 +1051,15 @@ def calculateContactAreaBasedOnBoundaryBoxesForPair(objA, objB, qNonManifold=0,
 
 ########################################
 
-def calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate):
+def calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate, qClip=0):
     
     ### Calculate contact area for all connections
+    ### (with qClip the exact area by polygon clipping is tried first for manifold pairs and the boundary box estimation is used as fallback)
     print("Calculating contact area for connections...")
     
     connectsGeo = []
     connectsLoc = []
+    cntClip = 0
     for k in range(len(connectsPair)):
         objA = objs[connectsPair[k][0]]
         objB = objs[connectsPair[k][1]]
@@ -796,6 +1075,16 @@ def calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate
             nonManifolds.extend([i for i, ele in enumerate(bm.edges) if not ele.is_manifold])
             bm.free()
 
+        ###### Try exact contact area by polygon clipping of coplanar opposing faces first
+        if qClip and not len(nonManifolds):
+            resultClip = calculateContactAreaBasedOnPolygonClippingForPair(objA, objB)
+            if resultClip != None:
+                geoContactArea, geoHeight, geoWidth, center, geoAxis = resultClip
+                connectsGeo.append([geoContactArea, geoHeight, geoWidth, geoAxis[0], geoAxis[1], geoAxis[2], 0])
+                connectsLoc.append(center)
+                cntClip += 1
+                continue
+
         ###### Calculate contact area for a single pair of objects
         geoContactArea, geoHeight, geoWidth, center, geoAxis, qVolCorrect = calculateContactAreaBasedOnBoundaryBoxesForPair(objA, objB, qAccurate=qAccurate, qNonManifold=len(nonManifolds))
                     
@@ -803,10 +1092,165 @@ def calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, qAccurate
         connectsGeo.append([geoContactArea, geoHeight, geoWidth, geoAxis[0], geoAxis[1], geoAxis[2], qVolCorrect])
         connectsLoc.append(center)
         
+    if qClip: print("Polygon clipping: %d, boundary box fallback: %d" %(cntClip, len(connectsPair) -cntClip))
     return connectsGeo, connectsLoc
 
 ################################################################################   
 
+def getWorldPolygons(obj):
+
+    ### Get world space polygon data of an object as arrays (vertex coordinates, loop vertices, normals, centers, areas)
+    me = obj.data
+    vertCnt = len(me.vertices); polyCnt = len(me.polygons); loopCnt = len(me.loops)
+    co = numpy.empty(vertCnt *3, dtype=numpy.float32)
+    me.vertices.foreach_get("co", co)
+    mat = numpy.array(obj.matrix_world, dtype=numpy.float64)
+    # Multiply matrix by vertex coordinates to get global coordinates
+    co = co.reshape(vertCnt, 3).dot(mat[:3, :3].T) +mat[:3, 3]
+    loopStart = numpy.empty(polyCnt, dtype=numpy.int32)
+    loopTotal = numpy.empty(polyCnt, dtype=numpy.int32)
+    loopVerts = numpy.empty(loopCnt, dtype=numpy.int32)
+    me.polygons.foreach_get("loop_start", loopStart)
+    me.polygons.foreach_get("loop_total", loopTotal)
+    me.loops.foreach_get("vertex_index", loopVerts)
+    
+    ### Calculate normals, areas and centers in world space with Newell's method (robust against non-uniform scale)
+    loopPoly = numpy.repeat(numpy.arange(polyCnt), loopTotal)
+    loopNext = numpy.arange(loopCnt) +1
+    mask = loopNext == (loopStart +loopTotal)[loopPoly]
+    loopNext[mask] = loopStart[loopPoly][mask]
+    loopCo = co[loopVerts]
+    areaVecs = numpy.add.reduceat(numpy.cross(loopCo, loopCo[loopNext]), loopStart, axis=0) /2
+    areas = numpy.linalg.norm(areaVecs, axis=1)
+    normals = areaVecs /numpy.maximum(areas, 1e-12)[:, None]
+    centers = numpy.add.reduceat(loopCo, loopStart, axis=0) /loopTotal[:, None]
+    bbMin = numpy.minimum.reduceat(loopCo, loopStart, axis=0)
+    bbMax = numpy.maximum.reduceat(loopCo, loopStart, axis=0)
+    
+    return co, loopVerts, loopStart, loopTotal, normals, centers, areas, bbMin, bbMax
+
+########################################
+
+def isConvexPolygon2D(poly):
+
+    ### Check if a counter-clockwise 2D polygon is convex
+    cnt = len(poly)
+    for i in range(cnt):
+        ax, ay = poly[i]; bx, by = poly[(i +1) %cnt]; cx, cy = poly[(i +2) %cnt]
+        if (bx -ax) *(cy -by) -(by -ay) *(cx -bx) < -1e-12: return 0
+    return 1
+
+########################################
+
+def clipPolygon2D(subject, clip):
+
+    ### Sutherland-Hodgman clipping of a 2D polygon against a convex counter-clockwise clip polygon
+    output = subject
+    clipCnt = len(clip)
+    for i in range(clipCnt):
+        if len(output) == 0: break
+        ax, ay = clip[i]; bx, by = clip[(i +1) %clipCnt]
+        ex, ey = bx -ax, by -ay
+        polyIn = output; output = []
+        px, py = polyIn[-1]
+        pSide = ex *(py -ay) -ey *(px -ax)
+        for qx, qy in polyIn:
+            qSide = ex *(qy -ay) -ey *(qx -ax)
+            if qSide >= 0:
+                if pSide < 0:
+                    t = pSide /(pSide -qSide)
+                    output.append((px +(qx -px) *t, py +(qy -py) *t))
+                output.append((qx, qy))
+            elif pSide >= 0:
+                t = pSide /(pSide -qSide)
+                output.append((px +(qx -px) *t, py +(qy -py) *t))
+            px, py, pSide = qx, qy, qSide
+    return output
+
+########################################
+
+def areaPolygon2D(poly):
+
+    ### Shoelace formula for the signed area of a 2D polygon
+    area = 0
+    cnt = len(poly)
+    for i in range(cnt):
+        ax, ay = poly[i]; bx, by = poly[(i +1) %cnt]
+        area += ax *by -bx *ay
+    return area /2
+
+########################################
+
+def calculateContactAreaBasedOnPolygonClippingForPair(objA, objB):
+
+    ###### Calculate exact contact area for a single pair of objects by clipping coplanar opposing faces
+    ### Returns None if the pair can't be handled (no planar contact, non-planar or non-convex faces), then booleans are required
+    props = bpy.context.window_manager.bcb
+    searchDist = props.searchDistance
+    cosTol = math.cos(math.radians(clippingAngleTolerance))
+
+    coA, loopVertsA, loopStartA, loopTotalA, normalsA, centersA, areasA, bbMinA, bbMaxA = getWorldPolygons(objA)
+    coB, loopVertsB, loopStartB, loopTotalB, normalsB, centersB, areasB, bbMinB, bbMaxB = getWorldPolygons(objB)
+    
+    ### Preselect faces within search range of the other object's boundary box
+    selA = numpy.flatnonzero((areasA > 0) & numpy.all(bbMaxA >= coB.min(axis=0) -searchDist, axis=1) & numpy.all(bbMinA <= coB.max(axis=0) +searchDist, axis=1))
+    selB = numpy.flatnonzero((areasB > 0) & numpy.all(bbMaxB >= coA.min(axis=0) -searchDist, axis=1) & numpy.all(bbMinB <= coA.max(axis=0) +searchDist, axis=1))
+    if len(selA) == 0 or len(selB) == 0: return None
+    
+    ### Find opposing face pairs whose planes are within search distance and whose boundary boxes overlap
+    nA = normalsA[selA]; nB = normalsB[selB]
+    qOpposing = nA.dot(nB.T) <= -cosTol
+    planeDist = numpy.abs(numpy.einsum('ijk,ik->ij', centersB[selB][None, :, :] -centersA[selA][:, None, :], nA))
+    qOverlap = numpy.all(bbMaxA[selA][:, None, :] >= bbMinB[selB][None, :, :] -searchDist, axis=2) \
+             & numpy.all(bbMinA[selA][:, None, :] <= bbMaxB[selB][None, :, :] +searchDist, axis=2)
+    candA, candB = numpy.nonzero(qOpposing & (planeDist <= searchDist) & qOverlap)
+    if len(candA) == 0: return None
+    
+    ### Clip every candidate face pair in the plane of face A
+    geoContactArea = 0
+    points = []
+    for i, j in zip(selA[candA], selB[candB]):
+        n = normalsA[i]
+        polyA3D = coA[loopVertsA[loopStartA[i]:loopStartA[i] +loopTotalA[i]]]
+        polyB3D = coB[loopVertsB[loopStartB[j]:loopStartB[j] +loopTotalB[j]]]
+        # Non-planar faces are not supported
+        if numpy.abs((polyA3D -centersA[i]).dot(n)).max() > searchDist /2 \
+        or numpy.abs((polyB3D -centersB[j]).dot(normalsB[j])).max() > searchDist /2:
+            return None
+        ### Build 2D basis in the mid plane of both faces
+        u = numpy.cross(n, (1, 0, 0) if abs(n[0]) < 0.9 else (0, 1, 0)); u /= numpy.linalg.norm(u)
+        v = numpy.cross(n, u)
+        origin = centersA[i] +n *(n.dot(centersB[j] -centersA[i]) /2)
+        polyA = [tuple(p) for p in numpy.column_stack(((polyA3D -origin).dot(u), (polyA3D -origin).dot(v)))]
+        # Opposing face B is wound the other way round in this plane, reverse to get counter-clockwise order
+        polyB = [tuple(p) for p in numpy.column_stack(((polyB3D -origin).dot(u), (polyB3D -origin).dot(v)))][::-1]
+        ### Clip polygon against the convex one, if neither is convex booleans are required
+        if isConvexPolygon2D(polyA): polyClip = clipPolygon2D(polyB, polyA)
+        elif isConvexPolygon2D(polyB): polyClip = clipPolygon2D(polyA, polyB)
+        else: return None
+        if len(polyClip) < 3: continue
+        area = areaPolygon2D(polyClip)
+        if area <= 0: continue
+        geoContactArea += area
+        for x, y in polyClip: points.append(origin +u *x +v *y)
+    if geoContactArea == 0: return None
+    
+    ### Use center of contact area boundary box as constraints location
+    points = numpy.array(points)
+    bbMin = points.min(axis=0); bbMax = points.max(axis=0)
+    center = Vector((bbMin +bbMax) /2)
+
+    ### Find out element thickness to be used for bending threshold calculation (the dimensions of the contact area)
+    geo = [float(dim) for dim in bbMax -bbMin]
+    geoAxis = [1, 2, 3]
+    geo, geoAxis = zip(*sorted(zip(geo, geoAxis)))
+    geoHeight = geo[1]   # First item = mostly 0, second item = thickness/height, third item = width 
+    geoWidth = geo[2]
+    
+    return float(geoContactArea), geoHeight, geoWidth, center, geoAxis
+
+########################################
+
 def calculateContactAreaBasedOnBooleansForAll(objs, connectsPair):
     
     ### Calculate contact area for all connections
@@ -832,6 +1276,7 @@ def calculateContactAreaBasedOnBooleansForAll(objs, connectsPair):
     connectsGeo = []
     connectsLoc = []
     connectsPair_len = len(connectsPair)
+    cntBBox = 0; cntClip = 0; cntBool = 0  # Number of pairs per calculation path
     for k in range(connectsPair_len):
         sys.stdout.write('\r' +"%d " %k)
         # Update progress bar
@@ -859,6 +1304,11 @@ def calculateContactAreaBasedOnBooleansForAll(objs, connectsPair):
             nonManifolds.extend([i for i, ele in enumerate(bm.edges) if not ele.is_manifold])
             bm.free()
 
+        ###### If both meshes are manifold try exact contact area by polygon clipping of coplanar opposing faces first
+        if not len(nonManifolds) and qPolygonClipping:
+            resultClip = calculateContactAreaBasedOnPolygonClippingForPair(objA, objB)
+        else: resultClip = None
+
         ###### If non-manifold then calculate a contact area estimation based on boundary boxes intersection and a user defined thickness
         if len(nonManifolds):
 
@@ -870,9 +1320,21 @@ def calculateContactAreaBasedOnBooleansForAll(objs, connectsPair):
             # Geometry array: [area, height, width, axisNormal, axisHeight, axisWidth]
             connectsGeo.append([geoContactArea, geoHeight, geoWidth, geoAxis[0], geoAxis[1], geoAxis[2], qVolCorrect])
             connectsLoc.append(center)
+            cntBBox += 1
 
-        ###### If both meshes are manifold continue with regular boolean based approach
+        ###### If polygon clipping was successful use its result
+        elif resultClip != None:
+            
+            geoContactArea, geoHeight, geoWidth, center, geoAxis = resultClip
+            
+            # Geometry array: [area, height, width, axisNormal, axisHeight, axisWidth]
+            connectsGeo.append([geoContactArea, geoHeight, geoWidth, geoAxis[0], geoAxis[1], geoAxis[2], 0])
+            connectsLoc.append(center)
+            cntClip += 1
+
+        ###### Otherwise continue with regular boolean based approach
         else:
+            cntBool += 1
 
             ### Add displacement modifier to objects to take search distance into account
             objA.modifiers.new(name="Displace_BCB", type='DISPLACE')
@@ -1022,6 +1484,7 @@ def calculateContactAreaBasedOnBooleansForAll(objs, connectsPair):
     except: bpy.data.scenes.remove(sceneTemp)
     
     print()
+    print("Contact area calculation paths: Polygon clipping: %d, Booleans: %d, Boundary boxes (non-manifolds): %d" %(cntClip, cntBool, cntBBox))
     return connectsGeo, connectsLoc
 
 ################################################################################   
@@ -1104,113 +1567,9 @@ def createConnectionData(objs, objsEGrp, connectsPair, connectsLoc, connectsGeo)
     ### Create connection data
     if debug: print("Creating connection data...")
     
-    props = bpy.context.window_manager.bcb    
-    elemGrps = mem["elemGrps"]
-    connectsConsts = []
-    constsConnect = []
-    constCntOfs = 0
-    for i in range(len(connectsPair)):
-        geoContactArea = connectsGeo[i][0]
-        elemGrp = None
-        
-        ### Count constraints by connection type preset
-
-        pair = connectsPair[i]
-        loc = connectsLoc[i]
-
-        elemGrpA = objsEGrp[pair[0]]
-        elemGrpB = objsEGrp[pair[1]]
-        objA = objs[pair[0]]
-        objB = objs[pair[1]]
-        elemGrps_elemGrpA = elemGrps[elemGrpA]
-        elemGrps_elemGrpB = elemGrps[elemGrpB]
-        CT_A = elemGrps_elemGrpA[EGSidxCTyp]
-        CT_B = elemGrps_elemGrpB[EGSidxCTyp]
-        Prio_A = elemGrps_elemGrpA[EGSidxPrio]
-        Prio_B = elemGrps_elemGrpB[EGSidxPrio]
-        NoHoA = elemGrps_elemGrpA[EGSidxNoHo]
-        NoHoB = elemGrps_elemGrpB[EGSidxNoHo]
-        NoCoA = elemGrps_elemGrpA[EGSidxNoCo]
-        NoCoB = elemGrps_elemGrpB[EGSidxNoCo]
-
-        ### Check if connection between different groups is not allowed and remove them
-        qNoCon = 0
-        if elemGrpA != elemGrpB:
-            if NoCoA or NoCoB:
-                qNoCon = 1
-            ### Check if horizontal connection between different groups and remove them (e.g. for masonry walls touching a framing structure)
-            ### This code is used 3x, keep changes consistent in: builder_prep.py, builder_setc.py, and tools.py        if (:
-            elif NoHoA or NoHoB:
-                dirVecA = Vector(loc) -objA.matrix_world.to_translation()  # Use actual locations (taking parent relationships into account)
-                dirVecAN = dirVecA.normalized()
-                if abs(dirVecAN[2]) > 0.7: qA = 1
-                else: qA = 0
-                dirVecB = Vector(loc) -objB.matrix_world.to_translation()  # Use actual locations (taking parent relationships into account)
-                dirVecBN = dirVecB.normalized()
-                if abs(dirVecBN[2]) > 0.7: qB = 1
-                else: qB = 0
-                if qA == 0 and qB == 0: qNoCon = 1
-
-        ### Decision on which material settings from both groups will be used for connection
-        if not qNoCon:
-            # Both A and B are active groups and priority is the same
-            if CT_A != 0 and CT_B != 0 and Prio_A == Prio_B:
-                ### Use the connection type with the smaller count of constraints for connection between different element groups
-                ### (Menu order priority driven in older versions. This way is still not perfect as it has some ambiguities left, ideally the CT should be forced to stay the same for all EGs.)
-                if connectTypes[CT_A][1] <= connectTypes[CT_B][1]:
-                      CT = CT_A; elemGrp = elemGrpA
-                else: CT = CT_B; elemGrp = elemGrpB
-            # Only A is active and B is passive group or priority is higher for A
-            elif CT_A != 0 and CT_B == 0 or (CT_A != 0 and CT_B != 0 and Prio_A > Prio_B):
-                CT = CT_A; elemGrp = elemGrpA
-            # Only B is active and A is passive group or priority is higher for B
-            elif CT_A == 0 and CT_B != 0 or (CT_A != 0 and CT_B != 0 and Prio_A < Prio_B):
-                CT = CT_B; elemGrp = elemGrpB
-            # Both A and B are in passive group but either one is actually an active RB (a xor b)
-            elif bool(objA.rigid_body.type == 'ACTIVE') != bool(objB.rigid_body.type == 'ACTIVE'):
-                CT = -1  # Only one fixed constraint is used to connect these (buffer special case)
-            else:  # Both A and B are in passive group and both are passive RBs
-                CT = 0
-            # For unbreakable passive connections above settings can be overwritten
-            if not props.passiveUseBreaking:
-                # Both A and B are in passive group but either one is actually an active RB (a xor b)
-                if bool(objA.rigid_body.type == 'ACTIVE') != bool(objB.rigid_body.type == 'ACTIVE'):
-                    CT = -1  # Only one fixed constraint is used to connect these (buffer special case)
-
-        ### CT is now known and we can prepare further settings accordingly
-
-        if CT > 0: constCnt = connectTypes[CT][1]
-        elif CT == 0: constCnt = 0
-        elif CT < 0: constCnt = 1
-
-        if elemGrp != None:
-            elemGrps_elemGrp = elemGrps[elemGrp]
-            disColPerm = elemGrps_elemGrp[EGSidxDClP]
-        
-        ### If invalid contact area
-        if geoContactArea == 0 or elemGrp == None:
-            constCnt = 0
-            disColPerm = 0
-
-        # Add one extra slot for a possible constraint for permanent collision suppression
-        if props.disableCollisionPerm or disColPerm: constCnt += 1
-        # Alternative: Only suppress for valid connections - however, it is more user friendly to suppress always
-        #if (props.disableCollisionPerm or disColPerm) and not qNoCon: constCnt += 1
-
-        #if objA.name == "asset Bearing B3 pCylinder100" or objB.name == "asset Bearing B3 pCylinder100":
-        #   print(" PRE", constCnt, CT)
-        
-        # In case the connection type is passive or unknown reserve no space for constraints (connectsConsts needs to stay in sync with connectsPair)
-        if constCnt == 0: connectsConsts.append([])
-        # Otherwise reserve space for the predefined constraints count
-        else:
-            # Reserve constraint slots
-            items = []
-            for j in range(constCnt):
-                items.append(constCntOfs +j)
-                constsConnect.append(i)
-            connectsConsts.append(items)
-            constCntOfs += len(items)
+    ### Connection type decision and reservation of constraint slots are done by the core on plain arrays (see core_createConnectionData)
+    arrays = createElementArrays(objs, objsEGrp)
+    connectsConsts, constsConnect, connectsCT, connectsEGrp, connectsBrkThres = core_createConnectionData(arrays, getCoreProps(), connectsPair, connectsLoc, connectsGeo, qBrkThres=0)
             
     return connectsConsts, constsConnect
 
@@ -1436,65 +1795,11 @@ def createEmptyObjs(scene, constCnt):
 
 def bundlingEmptyObjsToClusters(connectsLoc, connectsConsts):
     
-    ### Bundling close empties into clusters, merge locations and count connections per cluster
-    print("Bundling close empties into clusters...")
-    
+    ### Bundling close empties into clusters, merge locations and count connections per cluster (done by the core, see core_bundlingClusters)
     props = bpy.context.window_manager.bcb
-    m = 1
-    qChanged = 1
-    while qChanged:   # Repeat until no more constraints are moved
-        qChanged = 0
-        
-        sys.stdout.write('\r' +"Pass %d" %m)
-        # Update progress bar
-        bpy.context.window_manager.progress_update(1 -(1 /m))
-        m += 1
-        
-        ### Build kd-tree for constraint locations
-        kdObjs = mathutils.kdtree.KDTree(len(connectsLoc))
-        for i, loc in enumerate(connectsLoc):
-            kdObjs.insert(loc, i)
-        kdObjs.balance()
-        
-        clustersConnects = []  # Stores all constraints indices per cluster
-        clustersLoc = []       # Stores the location of each cluster
-        for i in range(len(connectsLoc)):
-            
-            ### Find closest connection location via kd-tree (zero distance start item included)
-            co_find = connectsLoc[i]
-            aIndex = []; aCo = []#; aDist = [];
-            j = 0
-            for (co, index, dist) in kdObjs.find_range(co_find, props.clusterRadius):   # Find constraint object within search range
-                if j == 0 or co != lastCo:   # Skip constraints that already share the same location (caused by earlier loops)
-                    aIndex.append(index); aCo.append(co)#; aDist.append(dist)
-                    lastCo = co
-                    # Stop after second different constraint is found
-                    j += 1
-                    if j == 2: qChanged = 1; break
-                        
-            ### Calculate average location of the two constraints found within cluster radius
-            ### We merge them pairwise instead of all at once for improved and more even distribution
-            if len(aCo) == 2:
-                loc = (aCo[0] +aCo[1]) /2
-                clustersLoc.append(loc)
-                clustersConnects.append([aIndex[0], aIndex[1]])
-                ### Also move all other constraints with the same locations because we can assume they already have been merged earlier
-                for i in range(len(connectsLoc)):
-                    if aCo[0] == connectsLoc[i] or aCo[1] == connectsLoc[i]:
-                        clustersConnects[-1:][0].append(i)
-                  
-        ### Apply cluster locations to constraints
-        for l in range(len(clustersConnects)):
-            for k in clustersConnects[l]:
-                connectsLoc[k] = clustersLoc[l]
-    
-    print()
-    
-    ### Count clusters (only for status print)
-    clusters = set()
-    for loc in connectsLoc:
-        clusters.add(tuple(loc))
-    print("Cluster count:", len(clusters))
+    locs = core_bundlingClusters(connectsLoc, props.clusterRadius)
+    # Locations are modified in place like before
+    connectsLoc[:] = [Vector(loc) for loc in locs]
 
 ################################################################################
 
@@ -1536,21 +1841,14 @@ def createParentsIfRequired(scene, objs, objsEGrp, childObjs):
         childObjs.extend(childObjsNew)
         
         ### Make parent relationship
+        objsChildParent = []
         for k in range(len(childObjsNew)):
-            sys.stdout.write('\r' +"%d" %k)
-            
             childObj = childObjsNew[k]
             parentObj = scene.objects[childObj["bcb_parent"]]
             del parentObj["bcb_parent"]
             parentObj["bcb_child"] = childObj.name
-            ### Make parent
-            parentObj.select = 1
-            childObj.select = 1
-            bpy.context.scene.objects.active = parentObj
-            bpy.ops.object.parent_set(type='OBJECT', keep_transform=True)
-            parentObj.select = 0
-            childObj.select = 0
-            if len(childObjsNew) > 0: print()
+            objsChildParent.append([childObj, parentObj])
+        setParentsDirectly(objsChildParent)
         ### Remove child object from rigid body world (should not be simulated anymore)
         for k in range(len(childObjsNew)):
             childObjsNew[k].select
@@ -1615,10 +1913,19 @@ def applyBevel(scene, objs, objsEGrp, childObjs):
             obj = objs[k]
             obj.select = 1
     
-    ### Add only one bevel modifier and copy that to the other selected objects (Todo: Should be done for each object individually but is slower)
     if obj != None:
         ###### Create parents if required
         createParentsIfRequired(scene, objs, objsEGrp, childObjs)
+        ### Apply bevel directly to mesh data and leave only remaining objects selected for the modifier
+        if qDirectMeshOps:
+            objsRest = applyBevelToMeshes([objTemp for objTemp in objs if objTemp.select])
+            for objTemp in objs: objTemp.select = 0
+            for objTemp in objsRest: objTemp.select = 1
+            if len(objsRest): obj = objsRest[0]
+            else: obj = None
+            
+    ### Add only one bevel modifier and copy that to the other selected objects (Todo: Should be done for each object individually but is slower)
+    if obj != None:
         ### Apply bevel
         bpy.context.scene.objects.active = obj
         if "Bevel_bcb" not in obj.modifiers:
@@ -1634,6 +1941,97 @@ def applyBevel(scene, objs, objsEGrp, childObjs):
             bpy.context.scene.objects.active = obj
             bpy.ops.object.modifier_apply(apply_as='DATA', modifier="Bevel_bcb")
        
+########################################
+
+def applyBevelToMeshes(objs):
+
+    ### Bevel all edges of the meshes directly via bmesh with the same settings as the Bevel_bcb modifier
+    ### Every unique mesh datablock is processed only once, so meshes shared by several objects are supported as well
+    ### Returns objects which can't be handled this way to be left for the modifier
+    objsRest = []
+    meshesDone = {}
+    for obj in objs:
+        me = obj.data
+        if me.name in meshesDone:
+            if not meshesDone[me.name]: objsRest.append(obj)
+            continue
+        bm = bmesh.new()
+        bm.from_mesh(me)
+        try: bmesh.ops.bevel(bm, geom=bm.verts[:] +bm.edges[:], offset=10.0, offset_type=0, segments=1, profile=0.5, vertex_only=False, clamp_overlap=True, loop_slide=True)
+        except TypeError:  # Older Blender versions without overlap clamping are not supported
+            bm.free()
+            meshesDone[me.name] = 0
+            objsRest.append(obj)
+            continue
+        bm.to_mesh(me)
+        bm.free()
+        me.update()
+        meshesDone[me.name] = 1
+        
+    return objsRest
+
+################################################################################   
+
+def calculateMeshVolume(me):
+
+    ### Calculate the volume of a closed mesh in local space with the signed tetrahedron formula (like BKE_mesh_calc_volume)
+    vertCnt = len(me.vertices); polyCnt = len(me.polygons); loopCnt = len(me.loops)
+    if vertCnt == 0 or polyCnt == 0: return 0
+    co = numpy.empty(vertCnt *3, dtype=numpy.float32)
+    me.vertices.foreach_get("co", co)
+    co = co.reshape(vertCnt, 3).astype(numpy.float64)
+    co -= co.mean(axis=0)  # Relative to the vertex center for better numerical precision
+    loopStart = numpy.empty(polyCnt, dtype=numpy.int32)
+    loopTotal = numpy.empty(polyCnt, dtype=numpy.int32)
+    loopVerts = numpy.empty(loopCnt, dtype=numpy.int32)
+    me.polygons.foreach_get("loop_start", loopStart)
+    me.polygons.foreach_get("loop_total", loopTotal)
+    me.loops.foreach_get("vertex_index", loopVerts)
+    
+    ### Triangulate polygons as fans from their first loop
+    triCnts = numpy.maximum(loopTotal -2, 0)
+    triFirst = numpy.repeat(loopStart, triCnts)
+    triIdx = numpy.arange(triCnts.sum()) -numpy.repeat(numpy.cumsum(triCnts) -triCnts, triCnts)
+    v0 = co[loopVerts[triFirst]]
+    v1 = co[loopVerts[triFirst +triIdx +1]]
+    v2 = co[loopVerts[triFirst +triIdx +2]]
+    volume = numpy.einsum('ij,ij->i', v0, numpy.cross(v1, v2)).sum() /6
+    
+    return abs(float(volume))
+
+########################################
+
+def calculateRigidBodyVolume(obj):
+
+    ### Calculate the volume of an object based on its collision shape (same as the rigid body mass calculation operator)
+    shape = obj.rigid_body.collision_shape
+    dims = obj.dimensions
+    if shape == 'BOX':
+        return dims[0] *dims[1] *dims[2]
+    elif shape == 'SPHERE':
+        radius = max(dims) /2
+        return 4 /3 *pi *radius**3
+    elif shape in {'CAPSULE', 'CYLINDER'}:  # Capsule is assumed to be close enough to a cylinder
+        radius = max(dims[0], dims[1]) /2
+        return pi *radius**2 *dims[2]
+    elif shape == 'CONE':
+        radius = max(dims[0], dims[1]) /2
+        return pi /3 *radius**2 *dims[2]
+    else:
+        ### Mesh based shapes, volume is scaled by the world space volume scale of the object
+        volumeScale = abs(obj.scale[0] *obj.scale[1] *obj.scale[2])
+        if obj.parent != None: volumeScale *= abs(obj.parent.matrix_world.to_3x3().determinant())
+        return calculateMeshVolume(obj.data) *volumeScale
+
+########################################
+
+def isNonManifold(me):
+
+    ### Check if a mesh has non-manifold edges (edges not used by exactly two faces)
+    loopEdges = numpy.empty(len(me.loops), dtype=numpy.int32)
+    me.loops.foreach_get("edge_index", loopEdges)
+    return numpy.any(numpy.bincount(loopEdges, minlength=len(me.edges)) != 2)
+
 ################################################################################   
 
 def calculateMass(scene, objs, objsEGrp, childObjs):
@@ -1658,14 +2056,7 @@ def calculateMass(scene, objs, objsEGrp, childObjs):
         objsAll = objs
         objsAll.extend(childObjs)
         for obj in objsAll:
-            bpy.context.scene.objects.active = obj
-            me = obj.data
-            # Find non-manifold elements
-            bm = bmesh.new()
-            bm.from_mesh(me)
-            nonManifolds = [i for i, ele in enumerate(bm.edges) if not ele.is_manifold]
-            bm.free()
-            if len(nonManifolds): objsNonMan.append(obj)
+            if isNonManifold(obj.data): objsNonMan.append(obj)
         print("Non-manifold elements found:", len(objsNonMan))
 
     ### Create new rigid body settings for children with the data from its parent (so mass can be calculated on children)
@@ -1692,9 +2083,6 @@ def calculateMass(scene, objs, objsEGrp, childObjs):
     for j in range(len(elemGrps)):
         elemGrp = elemGrps[j]
         
-        # Deselect all objects
-        bpy.ops.object.select_all(action='DESELECT')
-        
         objsSelected = []
         for k in range(len(objs)):
             obj = objs[k]
@@ -1714,7 +2102,6 @@ def calculateMass(scene, objs, objsEGrp, childObjs):
                             if "bcb_child" in obj.keys():
                                 obj = scene.objects[obj["bcb_child"]]
                             if (props.surfaceForced == 0 or props.surfaceThickness == 0) and (props.surfaceThickness == 0 or obj not in objsNonMan):
-                                obj.select = 1
                                 objsSelected.append(obj)
                                 # Temporarily revert element scaling for mass calculation
                                 if qScale:
@@ -1727,8 +2114,16 @@ def calculateMass(scene, objs, objsEGrp, childObjs):
         materialPreset = elemGrp[EGSidxMatP]
         materialDensity = elemGrp[EGSidxDens]
         if not materialDensity:
-            if materialPreset != "": bpy.ops.rigidbody.mass_calculate(material=materialPreset)
-        else: bpy.ops.rigidbody.mass_calculate(material="Custom", density=materialDensity)
+            if materialPreset != "":
+                try: density = materialPresets[materialPreset]
+                except:
+                    print("Warning: Density preset not found, masses of element group #%d are not changed:" %j, materialPreset)
+                    density = 0
+            else: density = 0
+        else: density = materialDensity
+        if density:
+            for obj in objsSelected:
+                obj.rigid_body.mass = calculateRigidBodyVolume(obj) *density
 
         objsSelectedAll.extend(objsSelected)
 
@@ -1788,20 +2183,18 @@ def calculateMass(scene, objs, objsEGrp, childObjs):
     ### Calculate total and element group masses for diagnostic purposes
     print()
     groupsMass = {}; groupsArea = {}
+    objGrps = createObjectGroupMap()
     for obj in objs:
-        if obj != None and obj.rigid_body != None and obj.rigid_body.type == 'ACTIVE':
-            for group in bpy.data.groups:
-                try: obj = group.objects[obj.name]
-                except: pass
-                else:
-                    try: groupsMass[group.name] += obj.rigid_body.mass
-                    except:
-                        try: groupsMass[group.name] = obj.rigid_body.mass
-                        except: pass
-                    try: groupsArea[group.name] += obj["Floor Area"]
-                    except:
-                        try: groupsArea[group.name] = obj["Floor Area"]
-                        except: pass
+        if obj != None and obj.rigid_body != None and obj.rigid_body.type == 'ACTIVE' and obj.name in objGrps:
+            for grpName in objGrps[obj.name]:
+                try: groupsMass[grpName] += obj.rigid_body.mass
+                except:
+                    try: groupsMass[grpName] = obj.rigid_body.mass
+                    except: pass
+                try: groupsArea[grpName] += obj["Floor Area"]
+                except:
+                    try: groupsArea[grpName] = obj["Floor Area"]
+                    except: pass
     for groupName in groupsMass.keys():
         try: mass = groupsMass[groupName]
         except: mass = 0
@@ -1849,6 +2242,11 @@ def correctContactAreaByVolume(objs, objsEGrp, connectsPair, connectsGeo):
     scene = bpy.context.scene
     elemGrps = mem["elemGrps"]
 
+    ### Bucket object indices by element group so every object is visited only once
+    objsByEGrp = [[] for j in range(len(elemGrps))]
+    for k, j in enumerate(objsEGrp):
+        objsByEGrp[j].append(k)
+
     for j in range(len(elemGrps)):
         elemGrp = elemGrps[j]
         liveLoad = elemGrp[EGSidxLoad]
@@ -1860,44 +2258,43 @@ def correctContactAreaByVolume(objs, objsEGrp, connectsPair, connectsGeo):
             if materialPreset != "": materialDensity = materialPresets[materialPreset]
 
         ### Calculate volumes from densities and derive correctional factors for contact areas
-        for k in range(len(objs)):
-            if objsEGrp[k] == j:  # If object is in current element group
-                obj = objs[k]
+        for k in objsByEGrp[j]:  # Objects in current element group
+            obj = objs[k]
 
-                mass = obj.rigid_body.mass
+            mass = obj.rigid_body.mass
 
-                ### Remove live load from mass if present
-                if liveLoad > 0:
-                    dims = obj.dimensions
-                    floorArea = dims[0] *dims[1]  # Simple approximation by assuming rectangular floor area (x *y) for live load
-                    mass -= floorArea *liveLoad
+            ### Remove live load from mass if present
+            if liveLoad > 0:
+                dims = obj.dimensions
+                floorArea = dims[0] *dims[1]  # Simple approximation by assuming rectangular floor area (x *y) for live load
+                mass -= floorArea *liveLoad
 
-                volume = mass /materialDensity
-                
-                ### Find out element thickness to be used for bending threshold calculation 
-                dim = obj.dimensions; dimAxis = [1, 2, 3]
-                dim, dimAxis = zip(*sorted(zip(dim, dimAxis)))
-                dimHeight = dim[0]; dimWidth = dim[1]; dimLength = dim[2]
+            volume = mass /materialDensity
+            
+            ### Find out element thickness to be used for bending threshold calculation 
+            dim = obj.dimensions; dimAxis = [1, 2, 3]
+            dim, dimAxis = zip(*sorted(zip(dim, dimAxis)))
+            dimHeight = dim[0]; dimWidth = dim[1]; dimLength = dim[2]
 
-                # Derive contact area correction factor from geometry section area divided by bbox section area
-                sectionArea = volume /dimLength  # Full geometry section area of element
+            # Derive contact area correction factor from geometry section area divided by bbox section area
+            sectionArea = volume /dimLength  # Full geometry section area of element
 
-                ### Compensate section area for rescaling
-                try: scale = elemGrp[EGSidxScal]  # Try in case elemGrps is from an old BCB version
-                except: pass
-                else:
-                    if obj != None and scale != 0 and scale != 1:
-                        sectionArea *= scale**3  # Cubic instead of square because dimLength is included as well
+            ### Compensate section area for rescaling
+            try: scale = elemGrp[EGSidxScal]  # Try in case elemGrps is from an old BCB version
+            except: pass
+            else:
+                if obj != None and scale != 0 and scale != 1:
+                    sectionArea *= scale**3  # Cubic instead of square because dimLength is included as well
 
-                ### Determine contact area correction factor
-                if dimHeight *dimWidth != 0 and mass != materialDensity:  # Special case: mass = materialDensity only for foundation elements
-                    corFac = sectionArea / (dimHeight *dimWidth)
-                else: corFac = 1
+            ### Determine contact area correction factor
+            if dimHeight *dimWidth != 0 and mass != materialDensity:  # Special case: mass = materialDensity only for foundation elements
+                corFac = sectionArea / (dimHeight *dimWidth)
+            else: corFac = 1
 
-                obj["CA Corr.Fac."] = corFac
-                obj["Density"] = materialDensity
-                obj["Volume"] = volume
-        
+            obj["CA Corr.Fac."] = corFac
+            obj["Density"] = materialDensity
+            obj["Volume"] = volume
+    
     ### Apply corrections to geometry lists  
     connectsPair_iter = iter(connectsPair)
     connectsGeo_iter = iter(connectsGeo)
@@ -0,0 +1,509 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Written within the scope of Inachus FP7 Project (607522):
+# "Technological and Methodological Solutions for Integrated
+# Wide Area Situation Awareness and Survivor Localisation to
+# Support Search and Rescue (USaR) Teams"
+# Versions 1 & 2 were developed at the Laurea University of Applied Sciences,
+# Finland. Later versions are independently developed.
+# Copyright (C) 2015-2018 Kai Kostack
+#
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+################################################################################
+
+################################################################################
+################################################################################
+
+### This module has no dependencies to Blender so the connection table of a model can be built, tested and benchmarked headless from a regular Python interpreter:
+### python core.py fixture <bundle.npz> [--objects <count per axis>]
+### python core.py build <bundle.npz> <table.csv> [--processes <count>]
+### python core.py check <bundle.npz> <reference.csv> [--processes <count>] [--repeat <count>] [--maxtime <seconds>]
+### Geometry bundles of real scenes are written by exportGeometryBundle() in builder_prep.py together with the connection table of the scene build,
+### "check" against that table verifies the headless build against the builder (without parenting of too small elements and predefined constraints).
+### A small fixture bundle with its reference table is kept in tests/data and checked by tests/test_core.py (python -m unittest discover tests).
+
+import sys, os, time, math, csv
+import numpy
+
+from broadphase import *       # Contains parallel connection search and contact estimation workers (independent from Blender)
+
+### Names of the arrays stored per bundle in addition to broadphase_arrayNames
+core_objectArrayNames = ("objNames",        # Object names
+                         "objsEGrp",        # Element group index per object
+                         "worldLocs",       # World space locations (taking parent relationships into account)
+                         "active",          # Active rigid body flags per object
+                         "connectTypeCnts") # Constraint count per connection type (from connectTypes)
+
+### Names of the element group arrays (one item per element group, see EGSidx.. in global_vars.py)
+core_elemGrpArrayNames = ("egName", "egCTyp", "egPrio", "egNoHo", "egNoCo", "egDClP", "egCyln", "egBTX", "egBTPL",
+                          "egBTC", "egBTT", "egBTS", "egBTS9", "egBTB", "egBTB9", "egBTP")  # Breaking threshold expressions
+
+### Breaking threshold expressions in evaluation order, the optional ones can be empty (-1 = not used)
+core_brkThresExprNames = ("egBTC", "egBTT", "egBTS", "egBTS9", "egBTB", "egBTB9", "egBTP")
+core_brkThresOptional = (3, 5, 6)
+
+### Build settings stored per bundle with defaults (same names as in global_props.py and global_vars.py)
+core_propDefaults = {"searchDistance": 0.02,
+                     "surfaceThickness": 0.0,
+                     "surfaceForced": 0,
+                     "useAccurateArea": 1,
+                     "connectionCountLimit": 100,
+                     "passiveUseBreaking": 1,
+                     "disableCollisionPerm": 0,
+                     "lowerBrkThresPriority": 1,
+                     "clusterRadius": 0.0,
+                     "minimumContactArea": 0.000001}
+
+### Column names of the connection table
+core_tableHeader = ["objA", "objB", "nameA", "nameB", "locX", "locY", "locZ",
+                    "area", "height", "width", "axisNormal", "axisHeight", "axisWidth",
+                    "CT", "elemGrp", "consts", "btC", "btT", "btS", "btS9", "btB", "btB9", "btP", "btPL"]
+
+################################################################################
+
+def core_saveBundle(path, arrays, props):
+
+    ### Writes a geometry bundle (object, element group and connection type arrays plus build settings) into a compressed NPZ file
+    data = {}
+    for name in broadphase_arrayNames +core_objectArrayNames +core_elemGrpArrayNames:
+        data[name] = numpy.asarray(arrays[name])
+    for name in core_propDefaults:
+        data["prop_" +name] = numpy.array(props.get(name, core_propDefaults[name]))
+    numpy.savez_compressed(path, **data)
+
+########################################
+
+def core_loadBundle(path):
+
+    ### Reads a geometry bundle and returns the arrays and the build settings (defaults for missing settings)
+    arrays = {}
+    props = core_propDefaults.copy()
+    with numpy.load(path) as data:
+        for name in data.files:
+            if name.startswith("prop_"): props[name[5:]] = data[name].item()
+            else: arrays[name] = data[name]
+    missing = [name for name in broadphase_arrayNames +core_objectArrayNames +core_elemGrpArrayNames if name not in arrays]
+    if len(missing):
+        print("Error: Geometry bundle is incomplete, missing arrays:", ", ".join(missing))
+        return None, None
+    return arrays, props
+
+################################################################################
+
+def core_boundaryBox(arrays, k):
+
+    ### Returns the world space boundary box and its center for an object (same as boundaryBox with qGlobalSpace)
+    bbMin = arrays["bbMin"][k]
+    bbMax = arrays["bbMax"][k]
+    return bbMin, bbMax, (bbMin +bbMax) /2
+
+########################################
+
+def core_findConnections(arrays, props, processes=1):
+
+    ### Finds connections by boundary box intersection and calculates their contact geometry (same as findConnectionsByBoundaryBoxIntersection and calculateContactAreaBasedOnBoundaryBoxesForAll)
+    if props["connectionCountLimit"] and not arrays["nearest"].size:
+        arrays = arrays.copy()
+        arrays["nearest"] = broadphase_calcNearest(arrays["locs"], props["connectionCountLimit"] +1)
+    path = broadphase_exportShared(arrays)
+    try:
+        connectsPair, connectsPairDist = broadphase_findPairs(path, props["searchDistance"], props["connectionCountLimit"], processes)
+        connectsGeo, connectsLoc = broadphase_contactGeometryAll(path, connectsPair, props["searchDistance"], props["surfaceThickness"], props["surfaceForced"], props["useAccurateArea"], processes)
+    finally:
+        broadphase_removeShared(path)
+    return connectsPair, connectsGeo, connectsLoc
+
+########################################
+
+def core_deleteConnectionsWithZeroContactArea(props, connectsPair, connectsGeo, connectsLoc):
+
+    ### Delete connections with zero contact area (same rules as deleteConnectionsWithZeroContactArea)
+    if props["disableCollisionPerm"]:
+        # Mark as zero instead of removing (special case for collision suppression connections)
+        for geo in connectsGeo:
+            if geo[0] <= props["minimumContactArea"]: geo[0] = 0
+        return connectsPair, connectsGeo, connectsLoc
+    sel = [i for i in range(len(connectsPair)) if connectsGeo[i][0] > props["minimumContactArea"]]
+    return [connectsPair[i] for i in sel], [connectsGeo[i] for i in sel], [connectsLoc[i] for i in sel]
+
+################################################################################
+
+def core_evalBreakingThresholds(arrays, elemGrp, qBoundary, a, h, w, loc, exprCache):
+
+    ### Evaluates the breaking threshold expressions of an element group for every degree of freedom (used by setConstraintSettings)
+    key = (elemGrp, qBoundary)
+    if key not in exprCache:
+        mul = float(arrays["egBTX"][elemGrp])
+        # Area correction calculation for cylinders (*pi/4)
+        if arrays["egCyln"][elemGrp]: mulCyl = 0.7854
+        else:                         mulCyl = 1
+        # Increase threshold for boundary condition case
+        if qBoundary: mul *= 2
+        ### Add surface variable and multipliers and compile the expressions only once per element group
+        exprs = []
+        for name in core_brkThresExprNames:
+            expr = str(arrays[name][elemGrp])
+            if len(expr): expr += "*a" +"*%f"%mul +"*%f"%mulCyl
+            try: code = compile(expr, "<expression>", "eval")
+            except: code = None
+            exprs.append((expr, code))
+        exprCache[key] = exprs
+
+    namespace = dict(math.__dict__)
+    namespace.update({"a": a, "h": h, "w": w, "x": loc[0], "y": loc[1], "z": loc[2]})
+    values = []
+    for i, (expr, code) in enumerate(exprCache[key]):
+        if i in core_brkThresOptional and not len(expr):  # Can also have zero-size string if not used
+            values.append(-1); continue
+        try: values.append(eval(code, namespace))
+        except: print("\rError: Expression could not be evaluated:", expr); values.append(0)
+    values.append(float(arrays["egBTPL"][elemGrp]))
+    return values
+
+########################################
+
+def core_combineBreakingThresholds(valuesA, valuesB, qLower):
+
+    ### Uses the weaker (or the stronger) of both breaking thresholds for every degree of freedom
+    values = []
+    for i in range(len(valuesA)):
+        if i in core_brkThresOptional and (valuesA[i] == -1 or valuesB[i] == -1): values.append(-1)
+        elif qLower: values.append(min(valuesA[i], valuesB[i]))
+        else:        values.append(max(valuesA[i], valuesB[i]))
+    return values
+
+########################################
+
+def core_isVertical(dirVec):
+
+    ### Checks if a direction vector is rather vertical than horizontal
+    length = numpy.linalg.norm(dirVec)
+    return length > 0 and abs(dirVec[2]) /length > 0.7
+
+########################################
+
+def core_createConnectionData(arrays, props, connectsPair, connectsLoc, connectsGeo, qBrkThres=1):
+
+    ###### Decides connection types and breaking thresholds and reserves constraint slots for all connections (used by createConnectionData and setConstraintSettings)
+    ### Breaking thresholds are only evaluated if qBrkThres is set, otherwise None is returned for them
+    connectTypeCnts = arrays["connectTypeCnts"]
+    objsEGrp = arrays["objsEGrp"]
+    worldLocs = arrays["worldLocs"]
+    active = arrays["active"]
+    egCTyp = arrays["egCTyp"]; egPrio = arrays["egPrio"]
+    egNoHo = arrays["egNoHo"]; egNoCo = arrays["egNoCo"]
+    exprCache = {}
+    connectsConsts = []; constsConnect = []
+    connectsCT = []; connectsEGrp = []; connectsBrkThres = []
+    constCntOfs = 0
+    for i in range(len(connectsPair)):
+        pair = connectsPair[i]
+        loc = connectsLoc[i]
+        geo = connectsGeo[i]
+        geoContactArea = geo[0]
+        elemGrp = None
+        brkThres = None
+        CT = 0
+
+        elemGrpA = objsEGrp[pair[0]]
+        elemGrpB = objsEGrp[pair[1]]
+        CT_A = egCTyp[elemGrpA]; CT_B = egCTyp[elemGrpB]
+        Prio_A = egPrio[elemGrpA]; Prio_B = egPrio[elemGrpB]
+        qActiveA = bool(active[pair[0]]); qActiveB = bool(active[pair[1]])
+
+        ### Check if connection between different groups is not allowed and remove them
+        qNoCon = 0
+        if elemGrpA != elemGrpB:
+            if egNoCo[elemGrpA] or egNoCo[elemGrpB]:
+                qNoCon = 1
+            ### Check if horizontal connection between different groups and remove them (e.g. for masonry walls touching a framing structure)
+            ### This code is also used in tools.py, keep changes consistent
+            elif egNoHo[elemGrpA] or egNoHo[elemGrpB]:
+                qA = core_isVertical(numpy.array(loc) -worldLocs[pair[0]])
+                qB = core_isVertical(numpy.array(loc) -worldLocs[pair[1]])
+                if not qA and not qB: qNoCon = 1
+
+        ###### Decision on which material settings from both groups will be used for connection
+        if not qNoCon:
+            ### Prepare expression variables and convert m to mm
+            a = geoContactArea *1000000
+            h = geo[1] *1000
+            w = geo[2] *1000
+            brkThresA = brkThresB = None
+            if qBrkThres and CT_A != 0: brkThresA = core_evalBreakingThresholds(arrays, elemGrpA, CT_B == 0, a, h, w, loc, exprCache)
+            if qBrkThres and CT_B != 0: brkThresB = core_evalBreakingThresholds(arrays, elemGrpB, CT_A == 0, a, h, w, loc, exprCache)
+
+            # Both A and B are active groups and priority is the same
+            if CT_A != 0 and CT_B != 0 and Prio_A == Prio_B:
+                ### Use the connection type with the smaller count of constraints for connection between different element groups
+                if connectTypeCnts[CT_A] <= connectTypeCnts[CT_B]:
+                      CT = CT_A; elemGrp = elemGrpA
+                else: CT = CT_B; elemGrp = elemGrpB
+                if qBrkThres: brkThres = core_combineBreakingThresholds(brkThresA, brkThresB, props["lowerBrkThresPriority"])
+            # Only A is active and B is passive group or priority is higher for A
+            elif CT_A != 0 and CT_B == 0 or (CT_A != 0 and CT_B != 0 and Prio_A > Prio_B):
+                CT = CT_A; elemGrp = elemGrpA; brkThres = brkThresA
+            # Only B is active and A is passive group or priority is higher for B
+            elif CT_A == 0 and CT_B != 0 or (CT_A != 0 and CT_B != 0 and Prio_A < Prio_B):
+                CT = CT_B; elemGrp = elemGrpB; brkThres = brkThresB
+            # Both A and B are in passive group but either one is actually an active RB (a xor b)
+            elif qActiveA != qActiveB:
+                CT = -1  # Only one fixed constraint is used to connect these (buffer special case)
+            else:  # Both A and B are in passive group and both are passive RBs
+                CT = 0
+            # For unbreakable passive connections above settings can be overwritten
+            if not props["passiveUseBreaking"]:
+                if qActiveA != qActiveB: CT = -1
+
+        ### CT is now known and we can prepare further settings accordingly
+        if CT > 0: constCnt = int(connectTypeCnts[CT])
+        elif CT == 0: constCnt = 0
+        else: constCnt = 1
+
+        if elemGrp != None: disColPerm = arrays["egDClP"][elemGrp]
+        ### If invalid contact area
+        if geoContactArea == 0 or elemGrp == None:
+            constCnt = 0
+            disColPerm = 0
+        # Add one extra slot for a possible constraint for permanent collision suppression
+        if props["disableCollisionPerm"] or disColPerm: constCnt += 1
+
+        ### Reserve constraint slots (connectsConsts needs to stay in sync with connectsPair)
+        items = list(range(constCntOfs, constCntOfs +constCnt))
+        constsConnect.extend([i] *constCnt)
+        connectsConsts.append(items)
+        constCntOfs += constCnt
+        connectsCT.append(CT); connectsEGrp.append(elemGrp); connectsBrkThres.append(brkThres)
+
+    return connectsConsts, constsConnect, connectsCT, connectsEGrp, connectsBrkThres
+
+################################################################################
+
+def core_bundlingClusters(connectsLoc, clusterRadius):
+
+    ### Bundling close constraint locations into clusters and merge them pairwise (used by bundlingEmptyObjsToClusters)
+    print("Bundling close empties into clusters...")
+
+    locs = numpy.array(connectsLoc, dtype=numpy.float64).reshape(-1, 3)
+    m = 1
+    qChanged = 1
+    while qChanged:   # Repeat until no more constraints are moved
+        qChanged = 0
+        sys.stdout.write('\r' +"Pass %d" %m)
+        m += 1
+
+        ### Sort locations by X so only a window of locations needs to be tested (replaces the kd-tree)
+        order = numpy.argsort(locs[:, 0], kind='mergesort')
+        locsXSorted = locs[order, 0]
+        clustersConnects = []  # Stores all constraints indices per cluster
+        clustersLoc = []       # Stores the location of each cluster
+        for i in range(len(locs)):
+            co_find = locs[i]
+            lo = numpy.searchsorted(locsXSorted, co_find[0] -clusterRadius, side='left')
+            hi = numpy.searchsorted(locsXSorted, co_find[0] +clusterRadius, side='right')
+            aIndex = order[lo:hi]
+            aDist = numpy.linalg.norm(locs[aIndex] -co_find, axis=1)
+            sel = aDist <= clusterRadius
+            aIndex = aIndex[sel]; aDist = aDist[sel]
+            # Sort by distance like a kd-tree range search (zero distance start item included)
+            aIndex = aIndex[numpy.lexsort((aIndex, aDist))]
+            ### Find the closest constraint with a different location (skip constraints that already share the same location caused by earlier loops)
+            aCo0 = locs[aIndex[0]]
+            qDiff = numpy.any(locs[aIndex] != aCo0, axis=1)
+            if not qDiff.any(): continue
+            aCo1 = locs[aIndex[numpy.argmax(qDiff)]]
+            qChanged = 1
+
+            ### Calculate average location of the two constraints found within cluster radius
+            ### We merge them pairwise instead of all at once for improved and more even distribution
+            clustersLoc.append((aCo0 +aCo1) /2)
+            ### Also move all other constraints with the same locations because we can assume they already have been merged earlier
+            clustersConnects.append(numpy.flatnonzero(numpy.all(locs == aCo0, axis=1) | numpy.all(locs == aCo1, axis=1)))
+
+        ### Apply cluster locations to constraints
+        for l in range(len(clustersConnects)):
+            locs[clustersConnects[l]] = clustersLoc[l]
+
+    print()
+
+    ### Count clusters (only for status print)
+    print("Cluster count:", len(set(map(tuple, locs))))
+    return locs.tolist()
+
+################################################################################
+
+def core_build(arrays, props, processes=1):
+
+    ###### Builds the connection table of a geometry bundle (same steps as the builder up to the constraint settings)
+    ### Parenting of too small elements, predefined constraints and the detonator are scene dependent and not part of the headless build
+    connectsPair, connectsGeo, connectsLoc = core_findConnections(arrays, props, processes)
+    connectsPair, connectsGeo, connectsLoc = core_deleteConnectionsWithZeroContactArea(props, connectsPair, connectsGeo, connectsLoc)
+    connectsConsts, constsConnect, connectsCT, connectsEGrp, connectsBrkThres = core_createConnectionData(arrays, props, connectsPair, connectsLoc, connectsGeo)
+    if props["clusterRadius"] > 0: connectsLoc = core_bundlingClusters(connectsLoc, props["clusterRadius"])
+
+    return core_createTable(arrays, connectsPair, connectsGeo, connectsLoc, connectsConsts, connectsCT, connectsEGrp, connectsBrkThres)
+
+########################################
+
+def core_createTable(arrays, connectsPair, connectsGeo, connectsLoc, connectsConsts, connectsCT, connectsEGrp, connectsBrkThres):
+
+    ### Assembles the connection table, breaking thresholds are the real world values in N before conversion into simulation units
+    objNames = arrays["objNames"]
+    table = []
+    for i in range(len(connectsPair)):
+        a, b = connectsPair[i]
+        geo = connectsGeo[i]
+        elemGrp = connectsEGrp[i]
+        if elemGrp != None: elemGrpName = str(arrays["egName"][elemGrp])
+        else:               elemGrpName = ""
+        brkThres = connectsBrkThres[i]
+        if brkThres == None or connectsCT[i] <= 0: brkThres = [""] *8
+        table.append([a, b, str(objNames[a]), str(objNames[b])] +list(connectsLoc[i]) +list(geo[:6])
+                     +[connectsCT[i], elemGrpName, len(connectsConsts[i])] +list(brkThres))
+    return table
+
+########################################
+
+def core_writeTable(path, table):
+
+    ### Writes the connection table as CSV file
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(core_tableHeader)
+        for row in table:
+            writer.writerow(row)
+
+########################################
+
+def core_readTable(path):
+
+    ### Reads a connection table from a CSV file (all values as strings)
+    with open(path, 'r', newline='') as f:
+        rows = list(csv.reader(f))
+    if not len(rows) or rows[0] != core_tableHeader:
+        print("Error: Unknown table format:", path)
+        return None
+    return rows[1:]
+
+########################################
+
+def core_compareTables(table, reference, tolerance=1e-6):
+
+    ### Compares a connection table against a reference table cell by cell (numbers with relative tolerance) and returns the differences
+    differences = []
+    if len(table) != len(reference):
+        differences.append("Connection count %d differs from reference %d" %(len(table), len(reference)))
+    for i in range(min(len(table), len(reference))):
+        for j in range(len(core_tableHeader)):
+            value = str(table[i][j]); valueRef = reference[i][j]
+            try: qEqual = math.isclose(float(value), float(valueRef), rel_tol=tolerance, abs_tol=tolerance)
+            except ValueError: qEqual = value == valueRef
+            if not qEqual:
+                differences.append("Row %d, %s: %s (reference: %s)" %(i, core_tableHeader[j], value, valueRef))
+    return differences
+
+################################################################################
+
+def core_createFixture(cntAxis=6):
+
+    ### Creates a geometry bundle for a regular grid of boxes on a passive base layer (for tests and benchmarks)
+    arrays = broadphase_createFixture(cntAxis)
+    cntObjs = len(arrays["locs"])
+    qBase = arrays["locs"][:, 2] == 0
+    arrays["objNames"] = numpy.array(["Element.%05d" %k for k in range(cntObjs)])
+    arrays["objsEGrp"] = qBase.astype(numpy.int64)
+    arrays["worldLocs"] = arrays["locs"].copy()
+    arrays["active"] = (~qBase).astype(numpy.int8)
+    # Constraint counts per connection type as in connectTypes of global_vars.py
+    arrays["connectTypeCnts"] = numpy.array([0, 1, 1, 2, 2, 3, 4, 3, 4, 4, 5, 7, 8, 9, 12, 6, 7, 9, 10, 2, 3, 5, 7, 8, 1, 2, 1])
+    ### Element groups: default group and "Base" as in the presets, base with no horizontal connections to other groups
+    arrays["egName"] = numpy.array(["", "Base"])
+    arrays["egCTyp"] = numpy.array([15, 0]); arrays["egPrio"] = numpy.array([5, 5])
+    arrays["egNoHo"] = numpy.array([0, 1]);  arrays["egNoCo"] = numpy.array([0, 0])
+    arrays["egDClP"] = numpy.array([0, 0]);  arrays["egCyln"] = numpy.array([0, 0])
+    arrays["egBTX"] = numpy.array([1.0, 1.0]); arrays["egBTPL"] = numpy.array([0.0, 0.0])
+    arrays["egBTC"] = numpy.array(["35", "0"]); arrays["egBTT"] = numpy.array(["5.2", "0"])
+    arrays["egBTS"] = numpy.array(["155", "0"]); arrays["egBTS9"] = numpy.array(["", ""])
+    arrays["egBTB"] = numpy.array(["1.0", "0"]); arrays["egBTB9"] = numpy.array(["", ""])
+    arrays["egBTP"] = numpy.array(["1.3", "0"])
+    return arrays
+
+########################################
+
+def core_main(argv):
+
+    usage = ("Usage: python core.py fixture <bundle.npz> [--objects <count per axis>]\n"
+             "       python core.py build <bundle.npz> <table.csv> [--processes <count>]\n"
+             "       python core.py check <bundle.npz> <reference.csv> [--processes <count>] [--repeat <count>] [--maxtime <seconds>]")
+    cntPaths = 1 if len(argv) and argv[0] == "fixture" else 2
+    if len(argv) < cntPaths +1 or argv[0] not in ("fixture", "build", "check") \
+    or any([arg.startswith("-") for arg in argv[1:cntPaths +1]]):
+        print(usage)
+        return 1
+    cntAxis = 6; processes = 1; cntRepeat = 1; timeMax = 0
+    i = cntPaths +1
+    while i < len(argv):
+        if   argv[i] == "--objects":   i += 1; cntAxis = int(argv[i])
+        elif argv[i] == "--processes": i += 1; processes = int(argv[i])
+        elif argv[i] == "--repeat":    i += 1; cntRepeat = int(argv[i])
+        elif argv[i] == "--maxtime":   i += 1; timeMax = float(argv[i])
+        i += 1
+
+    if argv[0] == "fixture":
+        core_saveBundle(argv[1], core_createFixture(cntAxis), core_propDefaults)
+        print("Fixture bundle written:", argv[1])
+        return 0
+
+    arrays, props = core_loadBundle(argv[1])
+    if arrays == None: return 1
+    print("Objects: %d, processes: %d" %(len(arrays["locs"]), processes))
+
+    ###### Build (repeatedly for timing) and keep the fastest run
+    times = []
+    for k in range(max(1, cntRepeat)):
+        time_start = time.time()
+        table = core_build(arrays, props, processes)
+        times.append(time.time() -time_start)
+    print("Connections: %d, constraints: %d, time: %0.3f s (best of %d)" %(len(table), sum([row[15] for row in table]), min(times), len(times)))
+
+    if argv[0] == "build":
+        core_writeTable(argv[2], table)
+        print("Connection table written:", argv[2])
+        return 0
+
+    ###### Regression and speed check against a reference table
+    reference = core_readTable(argv[2])
+    if reference == None: return 1
+    differences = core_compareTables(table, reference)
+    for line in differences[:20]:
+        print("Error:", line)
+    if len(differences):
+        print("Error: %d differences to reference table found." %len(differences))
+        return 1
+    if timeMax and min(times) > timeMax:
+        print("Error: Build time %0.3f s exceeds the limit of %0.3f s." %(min(times), timeMax))
+        return 1
+    print("Connection table is identical to reference table.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(core_main(sys.argv[1:]))
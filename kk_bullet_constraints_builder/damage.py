@@ -0,0 +1,152 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Written within the scope of Inachus FP7 Project (607522):
+# "Technological and Methodological Solutions for Integrated
+# Wide Area Situation Awareness and Survivor Localisation to
+# Support Search and Rescue (USaR) Teams"
+# Versions 1 & 2 were developed at the Laurea University of Applied Sciences,
+# Finland. Later versions are independently developed.
+# Copyright (C) 2015-2018 Kai Kostack
+#
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+################################################################################
+
+import bpy, os, math, array, json
+mem = bpy.app.driver_namespace
+
+### Import submodules
+from global_vars import *      # Contains global variables
+
+################################################################################
+
+def damage_init(scene, connects):
+
+    if debug: print("Calling damage_init")
+
+    elemGrps = mem["elemGrps"]
+    try: objsEGrp = scene["bcb_objsEGrp"]
+    except: objsEGrp = []; print("Error: bcb_objsEGrp property not found, damage statistics disabled."); return
+
+    ### Precompute element group and floor index for every monitored connection (group of the first element is used, floor from constraint height)
+    connectsEGrp = array.array('i', [objsEGrp[connect[0][1]] for connect in connects])
+    floorsZ = []
+    for connect in connects:
+        if len(connect[4]) and connect[4][0] != None: floorsZ.append(int(math.floor(connect[4][0].matrix_world.to_translation()[2] /damageFloorHeight)))
+        else: floorsZ.append(0)
+    if len(floorsZ): floorMin = min(floorsZ); floorCnt = max(floorsZ) -floorMin +1
+    else: floorMin = 0; floorCnt = 1
+    connectsFloor = array.array('i', [z -floorMin for z in floorsZ])
+
+    ### Histogram of connection states per element group and floor (0 = intact, 1 = plastic, 2 = broken)
+    counts = array.array('i', bytes(4 *len(elemGrps) *floorCnt *3))
+    connectsMode = array.array('b')
+    for k in range(len(connects)):
+        conMode = min(connects[k][12], 2)
+        connectsMode.append(conMode)
+        counts[(connectsEGrp[k] *floorCnt +connectsFloor[k]) *3 +conMode] += 1
+
+    print("Damage statistics for %d connections in %d element groups and %d floors." %(len(connects), len(elemGrps), floorCnt))
+    #                    0             1              2            3       4         5         6 (time series of changed cells)  7 (energy series)  8 (dissipated work proxy per group)
+    mem["bcb_damage"] = [connectsEGrp, connectsFloor, connectsMode, counts, floorMin, floorCnt, [], [], [0.0] *len(elemGrps)]
+
+########################################
+
+def damage_record(scene, connects, changed, motion):
+
+    ### Updates the statistics incrementally from the connections changed in this frame, so the cost only depends on the amount of damage
+    if not "bcb_damage" in mem.keys(): return
+    connectsEGrp, connectsFloor, connectsMode, counts, floorMin, floorCnt, series, energies, dissipated = mem["bcb_damage"]
+
+    cellsChanged = set()
+    dissipatedFrame = 0.0
+    for k in changed:
+        connect = connects[k]
+        conMode = min(connect[12], 2)
+        conModeLast = connectsMode[k]
+        if conMode == conModeLast: continue
+        elemGrp = connectsEGrp[k]
+        floor = connectsFloor[k]
+        cell = (elemGrp *floorCnt +floor) *3
+        counts[cell +conModeLast] -= 1
+        counts[cell +conMode] += 1
+        connectsMode[k] = conMode
+        cellsChanged.add((elemGrp, floor))
+        ### Dissipated work proxy: breaking thresholds of the connection times the relative distance tolerance of the state just left times the original distance
+        if conModeLast == 0: tolDist = connect[8]
+        else:                tolDist = connect[10]
+        if tolDist > 0:
+            work = sum(connect[13]) *tolDist *connect[2]
+            dissipated[elemGrp] += work
+            dissipatedFrame += work
+
+    ### Append rows only for element group and floor cells which have changed: [frame, element group, floor, intact, plastic, broken]
+    for elemGrp, floor in cellsChanged:
+        cell = (elemGrp *floorCnt +floor) *3
+        series.append([scene.frame_current, elemGrp, floor, counts[cell], counts[cell +1], counts[cell +2]])
+
+    ### Energy series: the dissipated work proxy of this frame is always available from the changed connections,
+    ### kinetic energy only if another feature (rest detection, adaptive steps, telemetry) has already evaluated the element motion in this frame
+    if dissipatedFrame > 0 or motion != None:
+        if motion != None: energies.append([scene.frame_current, dissipatedFrame, motion[2]])
+        else:              energies.append([scene.frame_current, dissipatedFrame, None])
+
+########################################
+
+def damage_close():
+
+    if debug: print("Calling damage_close")
+
+    if not "bcb_damage" in mem.keys(): return
+    connectsEGrp, connectsFloor, connectsMode, counts, floorMin, floorCnt, series, energies, dissipated = mem["bcb_damage"]
+    elemGrps = mem["elemGrps"]
+    del mem["bcb_damage"]
+
+    ### Compact summary: final histogram per element group and floor, time series of changes and energy proxies
+    summary = {"floorHeight": damageFloorHeight, "floorMin": floorMin, "groups": []}
+    for i in range(len(elemGrps)):
+        name = elemGrps[i][EGSidxName]
+        if not len(name): name = "Default"
+        cell = i *floorCnt *3
+        floors = {}
+        for j in range(floorCnt):
+            vals = counts[cell +j *3:cell +j *3 +3].tolist()
+            if sum(vals): floors[str(j +floorMin)] = vals
+        if not len(floors): continue
+        # Series rows per changed floor: [frame, floor, intact, plastic, broken]
+        rows = [[row[0], row[2] +floorMin] +row[3:] for row in series if row[1] == i]
+        summary["groups"].append({"name": name, "floors": floors, "series": rows, "dissipated": dissipated[i]})
+    # Energy rows: [frame, dissipated work proxy of this frame, kinetic energy or null]
+    summary["energy"] = energies
+
+    try: f = open(damageStatsFile, "w")
+    except:
+        print('Error: Could not write file:', damageStatsFile)
+        return
+    json.dump(summary, f, separators=(",", ":"))
+    f.close()
+
+    ### Console overview
+    print("Damage statistics (intact / plastic / broken):")
+    for grp in summary["groups"]:
+        vals = [sum([floor[m] for floor in grp["floors"].values()]) for m in range(3)]
+        print("  %s: %d / %d / %d" %(grp["name"], vals[0], vals[1], vals[2]))
+    print("Damage statistics written to:", damageStatsFile)
@@ -0,0 +1,128 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Written within the scope of Inachus FP7 Project (607522):
+# "Technological and Methodological Solutions for Integrated
+# Wide Area Situation Awareness and Survivor Localisation to
+# Support Search and Rescue (USaR) Teams"
+# Versions 1 & 2 were developed at the Laurea University of Applied Sciences,
+# Finland. Later versions are independently developed.
+# Copyright (C) 2015-2018 Kai Kostack
+#
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+################################################################################
+
+import bpy, time
+mem = bpy.app.driver_namespace
+
+### Import submodules
+from global_vars import *      # Contains global variables
+
+################################################################################
+
+def dispatcher_eventHandler(scene):
+
+    ### Single frame change handler calling all registered consumers in order of registration
+    if not "bcb_dispatch_consumers" in mem.keys(): return
+    # Start a new snapshot for this frame so consumers share all transform and constraint reads
+    mem["bcb_dispatch_snapshot"] = {"frame": scene.frame_current, "transforms": {}, "data": {}}
+
+    for consumer in mem["bcb_dispatch_consumers"].copy():  # Consumers may unregister themselves while being called
+        time_start = time.time()
+        consumer[0](scene)
+        consumer[1] += time.time() -time_start
+        consumer[2] += 1
+        if debug: print("Dispatcher: %s %0.4f s" %(consumer[0].__name__, time.time() -time_start))
+
+########################################
+
+def dispatcher_register(func):
+
+    if not "bcb_dispatch_consumers" in mem.keys():
+        mem["bcb_dispatch_consumers"] = []
+    consumers = mem["bcb_dispatch_consumers"]
+    for consumer in consumers:
+        if consumer[0] == func: return
+    #                 0     1 (total time)  2 (calls)
+    consumers.append([func, 0, 0])
+    print("Registered frame consumer:", func.__name__)
+
+    if dispatcher_eventHandler not in bpy.app.handlers.frame_change_pre:
+        bpy.app.handlers.frame_change_pre.append(dispatcher_eventHandler)
+
+########################################
+
+def dispatcher_unregister(func):
+
+    ### Returns 1 if the consumer was registered (for compatibility with the former handler removal checks)
+    if not "bcb_dispatch_consumers" in mem.keys(): return 0
+    consumers = mem["bcb_dispatch_consumers"]
+    qFound = 0
+    for consumer in consumers:
+        if consumer[0] == func:
+            consumers.remove(consumer)
+            qFound = 1
+            print("Removed frame consumer: %s (%d frames, total %0.2f s, avg %0.2f ms/frame)" \
+                %(func.__name__, consumer[2], consumer[1], consumer[1] /max(1, consumer[2]) *1000))
+            break
+
+    ### Unload the handler itself when no consumers are left
+    if not len(consumers):
+        try: bpy.app.handlers.frame_change_pre.remove(dispatcher_eventHandler)
+        except: pass
+        del mem["bcb_dispatch_consumers"]
+        if "bcb_dispatch_snapshot" in mem.keys():
+            del mem["bcb_dispatch_snapshot"]
+    return qFound
+
+################################################################################
+
+def dispatcher_getSnapshot(scene):
+
+    ### Returns the shared snapshot of the current frame, a new one is started if the frame has changed (e.g. on direct calls outside of the dispatcher)
+    if "bcb_dispatch_snapshot" in mem.keys():
+        snapshot = mem["bcb_dispatch_snapshot"]
+        if snapshot["frame"] == scene.frame_current: return snapshot
+    snapshot = mem["bcb_dispatch_snapshot"] = {"frame": scene.frame_current, "transforms": {}, "data": {}}
+    return snapshot
+
+########################################
+
+def dispatcher_getTransform(snapshot, obj):
+
+    ### Returns world location and rotation of an object, read only once per frame
+    transforms = snapshot["transforms"]
+    try: return transforms[obj]
+    except KeyError:
+        mat = obj.matrix_world
+        transform = transforms[obj] = (mat.to_translation(), mat.to_quaternion())
+        return transform
+
+########################################
+
+def dispatcher_getData(snapshot, key, func, *args):
+
+    ### Returns result of the given data access function, evaluated only once per frame for the same key
+    data = snapshot["data"]
+    try: return data[key]
+    except KeyError:
+        result = data[key] = func(*args)
+        return result
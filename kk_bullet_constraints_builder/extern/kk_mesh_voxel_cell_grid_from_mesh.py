@@ -22,7 +22,8 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import bpy, sys, mathutils, math, time
+import bpy, sys, mathutils, math, time, heapq
+import numpy
 from mathutils import Vector
 
 ################################################################################   
@@ -56,6 +57,7 @@ def run(source=None, parameters=None):
     qTriangulate = 1                 # Enables automatic mesh triangulation
     #qSetWireView = 0                # Enables wire display mode for created meshes
     qSilentVerbose = 0               # Reduces text output to a minimum
+    qVectorized = 1                  # Uses NumPy based voxelization and bulk mesh creation instead of the loop based code (same output, much faster for large grids)
 
     ### Custom BCB parameter handling
     if source == 'BCB_Discretize':
@@ -111,6 +113,8 @@ def run(source=None, parameters=None):
     if cellsToObjectsMode == 1:
         vertsN = []; facesN = []
     f_cells_global = {}
+    cellsGlobal = []; cellsGlobalKeys = numpy.zeros(0, dtype=numpy.int64)
+    vertsArrs = []; facesArrs = []; vertCnt = 0
     objsN = []
     objMod = None
     for obj in objs:
@@ -171,6 +175,46 @@ def run(source=None, parameters=None):
         else:
             cellSizeX = cellSize[0]; cellSizeY = cellSize[1]; cellSizeZ = cellSize[2]
             if not qSilentVerbose: print("Custom cell size: %0.3f, %0.3f, %0.3f" %(cellSizeX, cellSizeY, cellSizeZ))
+        cellSizeXYZ = (cellSizeX, cellSizeY, cellSizeZ)
+
+        ###### Vectorized voxelization
+        if qVectorized:
+            co, tris = getMeshArrays(me)
+            cells = voxelizeSurface(co, tris, cellSizeXYZ)
+            if len(cells) == 0: continue
+            if qFillVolume:
+                grid, gridMin = cellsToGrid(cells)
+                grid = voxelFillVolume(grid, gridMin, co, tris, cellSizeXYZ)
+                cells = gridToCells(grid, gridMin)
+            if qCreateGridMesh:
+                grid, gridMin = cellsToGrid(cells)
+                gridResX, gridResY, gridResZ = grid.shape
+                if not qSilentVerbose: print("Resolution: %d, %d, %d" %(gridResX, gridResY, gridResZ))
+                if qInvertOutput: grid = ~grid
+                if qFillFromFloor: grid = voxelFillFromFloor(grid)
+                if qRemoveOpen: grid = voxelRemoveOpen(grid, qRemoveOpenBottom)
+                cells = gridToCells(grid, gridMin)
+                ### Filter out cells already created for previous objects
+                if qFilterDoubleCells and qUseUnifiedSpace:
+                    keys = cellKeys(cells)
+                    cells = cells[~numpy.isin(keys, cellsGlobalKeys)]
+                    cellsGlobalKeys = numpy.union1d(cellsGlobalKeys, keys)
+                    cellsGlobal.append(cells)
+                if not qSilentVerbose: print("%d cells" %len(cells))
+                ### Closed cubes per cell, otherwise mesh building will be postponed and the global cell list will be used later
+                if qFilterInternalFaces == 0:
+                    if cellsToObjectsMode == 3:
+                        for cell in cells:
+                            objN = createMeshObjectFromArrays(*voxelCubes(cell[None, :], cellSizeXYZ))
+                            setupCellObject(scene, objN, obj, objsN, gridRes, qUseUnifiedSpace, Vector((obj.dimensions[0] /gridResX, obj.dimensions[1] /gridResY, obj.dimensions[2] /gridResZ)))
+                    else:
+                        verts, faces = voxelCubes(cells, cellSizeXYZ)
+                        if cellsToObjectsMode == 2:
+                            objN = createMeshObjectFromArrays(verts, faces)
+                            setupCellObject(scene, objN, obj, objsN, gridRes, qUseUnifiedSpace, obj.dimensions)
+                        else:
+                            vertsArrs.append(verts); facesArrs.append(faces +vertCnt); vertCnt += len(verts)
+            continue
                    
         ### add polys to corresponding cells (code mostly taken from cells.py for blender 2.4x)
         es = [Vector((1.0, 0.0, 0.0)), Vector((0.0, 1.0, 0.0)), Vector((0.0, 0.0, 1.0))]
@@ -494,8 +538,19 @@ def run(source=None, parameters=None):
                 objsN.append(objN)
     if qSilentVerbose: print()
         
+    ### Vectorized mesh building for global cell array if non-manifold mesh is enabled
+    if qCreateGridMesh and qFilterInternalFaces == 1 and qVectorized and len(cellsGlobal):
+        print("Creating global cell mesh...")
+        grid, gridMin = cellsToGrid(numpy.concatenate(cellsGlobal))
+        if not qSilentVerbose: print("Global resolution: %d, %d, %d" %grid.shape)
+        if qEnforceManifoldness:
+            if not qSilentVerbose: print("Filtering non-manifold corner cases...")
+            grid = voxelEnforceManifoldness(grid, qSilentVerbose)
+        verts, faces = voxelBoundaryFaces(grid, gridMin, cellSizeXYZ)
+        vertsArrs.append(verts); facesArrs.append(faces +vertCnt); vertCnt += len(verts)
+        
     ### Mesh building for global cell array if non-manifold mesh is enabled
-    if qCreateGridMesh and qFilterInternalFaces == 1:
+    if qCreateGridMesh and qFilterInternalFaces == 1 and not qVectorized:
         print("Creating global cell mesh...")
 
         ### Determine actual grid resolution for all objects and index ranges
@@ -639,7 +694,10 @@ def run(source=None, parameters=None):
 
             
     if cellsToObjectsMode == 1:
-        objN = createMeshObjectFromData(vertsN, [], facesN)
+        if qVectorized:
+            if len(vertsArrs): objN = createMeshObjectFromArrays(numpy.concatenate(vertsArrs), numpy.concatenate(facesArrs))
+            else:              objN = createMeshObjectFromArrays(numpy.zeros((0, 3)), numpy.zeros((0, 4), dtype=numpy.int32))
+        else: objN = createMeshObjectFromData(vertsN, [], facesN)
         scene.objects.link(objN)
         objN.name = obj.name
         copyCustomData(objN, obj)
@@ -792,6 +850,329 @@ def createOrReuseObjectAndMesh(scene, objName="Mesh"):
             
     return obj
 
+################################################################################
+### Vectorized voxelization (NumPy), used for qVectorized = 1
+### Cells are addressed by integer indices (x, y, z) with their centers at index *cellSize, same as in the code above
+################################################################################
+
+def getMeshArrays(me):
+
+    ### Returns vertex coordinates and triangle vertex indices of a triangulated mesh as arrays
+    co = numpy.empty(len(me.vertices) *3, dtype=numpy.float32)
+    me.vertices.foreach_get("co", co)
+    loopTotals = numpy.empty(len(me.polygons), dtype=numpy.int32)
+    me.polygons.foreach_get("loop_total", loopTotals)
+    loopVerts = numpy.empty(len(me.loops), dtype=numpy.int32)
+    me.loops.foreach_get("vertex_index", loopVerts)
+    if len(loopTotals) and (loopTotals != 3).any():
+        print("Warning: Mesh is not triangulated, non-triangle faces are ignored.")
+        loopStarts = numpy.empty(len(me.polygons), dtype=numpy.int32)
+        me.polygons.foreach_get("loop_start", loopStarts)
+        loopStarts = loopStarts[loopTotals == 3]
+        tris = loopVerts[loopStarts[:, None] +numpy.arange(3)]
+    else: tris = loopVerts.reshape(-1, 3)
+    return co.reshape(-1, 3).astype(numpy.float64), tris
+
+########################################
+
+def voxelizeSurface(co, tris, cellSize, chunkSize=2000000):
+
+    ### Rasterizes triangles into the grid, returns the unique indices of all cells intersected by the surface
+    cs = numpy.array(cellSize, dtype=numpy.float64)
+    if not len(tris): return numpy.zeros((0, 3), dtype=numpy.int64)
+    vCells = numpy.rint(co /cs).astype(numpy.int64)  # Same rounding as Python's round() (half to even)
+    triCells = vCells[tris]
+    boxMin = triCells.min(axis=1); boxMax = triCells.max(axis=1)
+    boxSize = boxMax -boxMin +1
+    # Fast path for faces spanning multiple cells in not more than one direction, those cells are all used without further test
+    qFast = (boxSize > 1).sum(axis=1) <= 1
+
+    ### Separating axis test data per triangle: face normal and the 9 cross products of edges and cell axes
+    v = co[tris]
+    normal = numpy.cross(v[:, 1] -v[:, 0], v[:, 2] -v[:, 0])
+    r0 = .5 *(numpy.abs(normal) *cs).sum(axis=1)
+    d0 = (normal *v[:, 0]).sum(axis=1)
+    edges = numpy.stack([v[:, 1] -v[:, 0], v[:, 2] -v[:, 1], v[:, 0] -v[:, 2]], axis=1)
+    axes = numpy.cross(numpy.eye(3)[None, None, :, :], edges[:, :, None, :]).reshape(-1, 9, 3)
+    r = .5 *(numpy.abs(axes) *cs).sum(axis=2)
+    proj = numpy.einsum('tak,tvk->tav', axes, v)
+    projMin = proj.min(axis=2); projMax = proj.max(axis=2)
+
+    ### Process triangles in chunks to limit the number of triangle-cell pairs held in memory
+    counts = boxSize.prod(axis=1)
+    cellsAll = []
+    start = 0
+    countsCum = numpy.cumsum(counts)
+    while start < len(tris):
+        end = max(start +1, int(numpy.searchsorted(countsCum, countsCum[start] -counts[start] +chunkSize, side='right')))
+        cnt = counts[start:end]
+        tri = numpy.repeat(numpy.arange(start, end), cnt)
+        ofs = numpy.arange(cnt.sum()) -numpy.repeat(numpy.cumsum(cnt) -cnt, cnt)
+        size = boxSize[tri]
+        cells = numpy.empty((len(tri), 3), dtype=numpy.int64)
+        cells[:, 0] = ofs //(size[:, 1] *size[:, 2])
+        cells[:, 1] = (ofs //size[:, 2]) %size[:, 1]
+        cells[:, 2] = ofs %size[:, 2]
+        cells += boxMin[tri]
+        cc = cells *cs
+        # Cell must intersect face hyperplane
+        qUse = numpy.abs(d0[tri] -(normal[tri] *cc).sum(axis=1)) <= r0[tri]
+        # Overlap of cell with face (separating axis theorem)
+        t = numpy.einsum('pak,pk->pa', axes[tri], cc)
+        qUse &= ~((projMin[tri] -t > r[tri]) | (projMax[tri] -t < -r[tri])).any(axis=1)
+        qUse |= qFast[tri]
+        cellsAll.append(cells[qUse])
+        start = end
+    return numpy.unique(numpy.concatenate(cellsAll), axis=0)
+
+########################################
+
+def cellsToGrid(cells):
+
+    ### Converts cell indices into a dense boolean grid covering their bounding box, returns grid and index of its first cell
+    if not len(cells): return numpy.zeros((0, 0, 0), dtype=numpy.bool_), numpy.zeros(3, dtype=numpy.int64)
+    gridMin = cells.min(axis=0)
+    grid = numpy.zeros(tuple(cells.max(axis=0) -gridMin +1), dtype=numpy.bool_)
+    grid[tuple((cells -gridMin).T)] = 1
+    return grid, gridMin
+
+########################################
+
+def gridToCells(grid, gridMin):
+
+    return numpy.argwhere(grid) +gridMin
+
+########################################
+
+def cellKeys(cells):
+
+    ### Encodes cell indices into unique integers for fast set operations
+    return ((cells[:, 0] +(1 <<20)) <<42) +((cells[:, 1] +(1 <<20)) <<21) +(cells[:, 2] +(1 <<20))
+
+########################################
+
+def voxelFillVolume(grid, gridMin, co, tris, cellSize):
+
+    ### Fills cells inside the mesh by counting the parity of surface crossings along z scanlines through the cell centers
+    cs = numpy.array(cellSize, dtype=numpy.float64)
+    if not grid.size or not len(tris): return grid
+    v = co[tris]
+    ### Scanline columns covered by the xy projection of every triangle
+    colMin = numpy.maximum(numpy.ceil(v[:, :, :2].min(axis=1) /cs[:2]).astype(numpy.int64), gridMin[:2])
+    colMax = numpy.minimum(numpy.floor(v[:, :, :2].max(axis=1) /cs[:2]).astype(numpy.int64), gridMin[:2] +grid.shape[:2] -1)
+    colSize = numpy.maximum(colMax -colMin +1, 0)
+    cnt = colSize.prod(axis=1)
+    tri = numpy.repeat(numpy.arange(len(tris)), cnt)
+    ofs = numpy.arange(cnt.sum()) -numpy.repeat(numpy.cumsum(cnt) -cnt, cnt)
+    px = (colMin[tri, 0] +ofs //colSize[tri, 1])
+    py = (colMin[tri, 1] +ofs %colSize[tri, 1])
+    ptx = px *cs[0]; pty = py *cs[1]
+    ### Point in triangle projection test by crossing number with half-open edges (consistent for neighboring faces)
+    inside = numpy.zeros(len(tri), dtype=numpy.bool_)
+    for i in range(3):
+        p0 = v[tri, i]; p1 = v[tri, (i +1) %3]
+        qSpan = (p0[:, 1] <= pty) & (pty < p1[:, 1]) | (p1[:, 1] <= pty) & (pty < p0[:, 1])
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            xCross = p0[:, 0] +(pty -p0[:, 1]) *(p1[:, 0] -p0[:, 0]) /(p1[:, 1] -p0[:, 1])
+        inside ^= qSpan & (ptx < xCross)
+    ### Height of the crossing from the face plane
+    normal = numpy.cross(v[tri, 1] -v[tri, 0], v[tri, 2] -v[tri, 0])
+    inside &= normal[:, 2] != 0
+    tri = tri[inside]; px = px[inside]; py = py[inside]; ptx = ptx[inside]; pty = pty[inside]; normal = normal[inside]
+    p0 = v[tri, 0]
+    z = p0[:, 2] -(normal[:, 0] *(ptx -p0[:, 0]) +normal[:, 1] *(pty -p0[:, 1])) /normal[:, 2]
+    pz = numpy.clip(numpy.rint(z /cs[2]).astype(numpy.int64), gridMin[2], gridMin[2] +grid.shape[2] -1)
+    ### Toggle parity at crossing cells and accumulate along z, empty cells with odd parity are inside
+    hits = numpy.zeros(grid.shape, dtype=numpy.uint8)
+    numpy.bitwise_xor.at(hits, (px -gridMin[0], py -gridMin[1], pz -gridMin[2]), 1)
+    parity = numpy.bitwise_xor.accumulate(hits, axis=2).astype(numpy.bool_)
+    return grid | parity
+
+########################################
+
+def voxelFillFromFloor(grid):
+
+    ### Fills every column from the bottom up to the first cell above the lowest one
+    if grid.shape[2] < 2: return grid
+    occ = grid[:, :, 1:]
+    qAny = occ.any(axis=2)
+    first = numpy.where(qAny, occ.argmax(axis=2) +1, 0)
+    return grid | (numpy.arange(grid.shape[2])[None, None, :] < first[:, :, None])
+
+########################################
+
+def voxelRemoveOpenScan(grid, axis, qReverse):
+
+    ### Scanline state machine of qRemoveOpen, evaluated for all lines along the axis at once
+    g = numpy.moveaxis(grid, axis, 2)
+    new = numpy.zeros(g.shape, dtype=numpy.bool_)
+    qFill = numpy.zeros(g.shape[:2], dtype=numpy.bool_)
+    cell = numpy.ones(g.shape[:2], dtype=numpy.bool_)
+    cellLast = numpy.ones(g.shape[:2], dtype=numpy.bool_)
+    rng = range(g.shape[2])
+    if qReverse: rng = reversed(rng)
+    for k in rng:
+        occ = g[:, :, k]
+        new[:, :, k] = occ & qFill
+        qStep = occ & ~qFill
+        qDif = ~occ & (cellLast != cell)
+        qSame = ~occ & (cellLast == cell)
+        qFill |= qDif
+        qShift = qStep | qSame
+        cellLast = numpy.where(qShift, cell, cellLast)
+        cell = numpy.where(qStep, True, numpy.where(qSame, False, cell))
+    return numpy.moveaxis(new, 2, axis)
+
+########################################
+
+def voxelRemoveOpen(grid, qRemoveOpenBottom):
+
+    ### Removes surroundings of (filled) open space to reveal only inside cavities
+    if qRemoveOpenBottom:
+        mul1 = voxelRemoveOpenScan(voxelRemoveOpenScan(grid, 2, 1), 2, 0)  # Top, bottom
+    mul2 = voxelRemoveOpenScan(voxelRemoveOpenScan(grid, 0, 1), 0, 0)  # Right, left
+    mul3 = voxelRemoveOpenScan(voxelRemoveOpenScan(grid, 1, 1), 1, 0)  # Back, front
+    if qRemoveOpenBottom: return mul1 & mul2 & mul3
+    else:                 return mul2 & mul3
+
+########################################
+
+def voxelNonManifoldCells(P, y0, y1, z0, z1):
+
+    ### Evaluates the non-manifold corner and edge cases for all cells of the padded grid P in the given row ranges (inner indices)
+    nx = P.shape[0] -2
+    found = numpy.zeros((nx, y1 -y0, z1 -z0), dtype=numpy.bool_)
+    # The negative cases are the same conditions evaluated on the inverted grid
+    for qNeg in (0, 1):
+        def q(dx, dy, dz):
+            g = P[1+dx:1+dx+nx, 1+y0+dy:1+y1+dy, 1+z0+dz:1+z1+dz]
+            if qNeg: return ~g
+            else: return g
+        qXYZ = q(0,0,0)
+        # Neighbors
+        qX1 = q(1,0,0); qY1 = q(0,1,0); qZ1 = q(0,0,1); qY2 = q(0,-1,0); qZ2 = q(0,0,-1)
+        # Diagonals
+        qXYZ1 = q(1,1,1); qXYZ2 = q(1,1,-1); qXYZ3 = q(1,-1,1); qXYZ4 = q(1,-1,-1)
+        qXY1 = q(1,1,0); qXY2 = q(1,-1,0); qXZ1 = q(1,0,1); qXZ2 = q(1,0,-1)
+        qYZ1 = q(0,1,1); qYZ2 = q(0,1,-1); qYZ3 = q(0,-1,1); qYZ4 = q(0,-1,-1)
+        # Corner cases
+        found |= qXYZ & qXYZ1 & ~((qX1 & (qXY1 | qXZ1)) | (qY1 & (qXY1 | qYZ1)) | (qZ1 & (qXZ1 | qYZ1)))
+        found |= qXYZ & qXYZ2 & ~((qX1 & (qXY1 | qXZ2)) | (qY1 & (qXY1 | qYZ2)) | (qZ2 & (qXZ2 | qYZ2)))
+        found |= qXYZ & qXYZ3 & ~((qX1 & (qXY2 | qXZ1)) | (qY2 & (qXY2 | qYZ3)) | (qZ1 & (qXZ1 | qYZ3)))
+        found |= qXYZ & qXYZ4 & ~((qX1 & (qXY2 | qXZ2)) | (qY2 & (qXY2 | qYZ4)) | (qZ2 & (qXZ2 | qYZ4)))
+        # Edge cases
+        found |= qXYZ & qXY1 & ~(qX1 | qY1)
+        found |= qXYZ & qXY2 & ~(qX1 | qY2)
+        found |= qXYZ & qXZ1 & ~(qX1 | qZ1)
+        found |= qXYZ & qXZ2 & ~(qX1 | qZ2)
+        found |= qXYZ & qYZ1 & ~(qY1 | qZ1)
+        found |= qXYZ & qYZ2 & ~(qY1 | qZ2)
+        found |= qXYZ & qYZ3 & ~(qY2 | qZ1)
+        found |= qXYZ & qYZ4 & ~(qY2 | qZ2)
+    return found
+
+########################################
+
+def voxelEnforceManifoldness(grid, qSilentVerbose=0):
+
+    ### Removes (or adds) cells producing non-manifold geometry, rows along x are evaluated at once
+    ### Cells of a row only depend on their row neighbors in y and z, so the order of the loop based filter (z, y, x) is kept by processing
+    ### rows in that order and only revisiting rows next to modified ones
+    nx, ny, nz = grid.shape
+    P = numpy.zeros((nx +2, ny +2, nz +2), dtype=numpy.bool_)
+    P[1:-1, 1:-1, 1:-1] = grid
+    foundCnt = 0
+    found = 1
+    while found:
+        found = 0
+        cand = voxelNonManifoldCells(P, 0, ny, 0, nz).any(axis=0)
+        rows = [(z, y) for y, z in numpy.argwhere(cand)]
+        heapq.heapify(rows)
+        rowLast = None
+        while rows:
+            row = heapq.heappop(rows)
+            if row == rowLast: continue
+            rowLast = row
+            z, y = row
+            mask = voxelNonManifoldCells(P, y, y +1, z, z +1)[:, 0, 0]
+            if mask.any():
+                P[1:-1, 1 +y, 1 +z] ^= mask
+                found += int(mask.sum())
+                # Rows later in loop order reading this row
+                for dz, dy in ((0, 1), (1, -1), (1, 0), (1, 1)):
+                    if 0 <= y +dy < ny and z +dz < nz: heapq.heappush(rows, (z +dz, y +dy))
+        foundCnt += found
+        sys.stdout.write('\r' +"%d non-manifold cells identified and removed." %foundCnt)
+    if not qSilentVerbose: print()
+    return P[1:-1, 1:-1, 1:-1].copy()
+
+########################################
+
+def voxelBoundaryFaces(grid, gridMin, cellSize):
+
+    ### Creates one quad for every boundary between a filled and an empty cell, returns unique vertices and faces
+    cs = numpy.array(cellSize, dtype=numpy.float64)
+    nx, ny, nz = grid.shape
+    P = numpy.zeros((nx +2, ny +2, nz +2), dtype=numpy.bool_)
+    P[1:-1, 1:-1, 1:-1] = grid
+    # Cells from gridMin -1 to gridMax in every direction, a face is created if the neighbor cell in +X, +Y or +Z differs
+    base = P[:-1, :-1, :-1]
+    quads = []
+    #                      Neighbor    Corner offsets of the quad (vertex order 1, 0, 2, 3 of the loop based version)
+    for nb, corners in ((P[1:, :-1, :-1], ((1,0,1), (1,0,0), (1,1,0), (1,1,1))),
+                        (P[:-1, 1:, :-1], ((0,1,1), (0,1,0), (1,1,0), (1,1,1))),
+                        (P[:-1, :-1, 1:], ((0,1,1), (0,0,1), (1,0,1), (1,1,1)))):
+        cells = numpy.argwhere(base != nb) -1 +gridMin
+        quads.append(cells[:, None, :] +numpy.array(corners)[None, :, :])
+    quads = numpy.concatenate(quads)
+    verts, faces = numpy.unique(quads.reshape(-1, 3), axis=0, return_inverse=True)
+    return verts *cs, faces.reshape(-1, 4)
+
+########################################
+
+def voxelCubes(cells, cellSize):
+
+    ### Creates one closed cube per cell, returns vertices and faces
+    cs = numpy.array(cellSize, dtype=numpy.float64)
+    corners = numpy.array([(0,0,0), (1,0,0), (0,1,0), (1,1,0), (0,0,1), (1,0,1), (0,1,1), (1,1,1)], dtype=numpy.float64) -.5
+    verts = (cells[:, None, :] +corners[None, :, :]) *cs
+    faces = numpy.array([(1,0,2,3), (4,5,7,6), (0,1,5,4), (3,2,6,7), (2,0,4,6), (1,3,7,5)])  # Bottom, top, front, behind, left, right
+    faces = faces[None, :, :] +(numpy.arange(len(cells)) *8)[:, None, None]
+    return verts.reshape(-1, 3), faces.reshape(-1, 4)
+
+################################################################################
+
+def createMeshObjectFromArrays(verts, faces):
+
+    ### Same as createMeshObjectFromData() but with bulk writes for vertex and face arrays
+    meN = bpy.data.meshes.new("Mesh")
+    meN.vertices.add(len(verts))
+    meN.loops.add(len(faces) *4)
+    meN.polygons.add(len(faces))
+    meN.vertices.foreach_set("co", numpy.asarray(verts, dtype=numpy.float32).ravel())
+    meN.loops.foreach_set("vertex_index", numpy.asarray(faces, dtype=numpy.int32).ravel())
+    meN.polygons.foreach_set("loop_start", numpy.arange(0, len(faces) *4, 4, dtype=numpy.int32))
+    meN.polygons.foreach_set("loop_total", numpy.full(len(faces), 4, dtype=numpy.int32))
+    meN.update(calc_edges=True)
+    objN = bpy.data.objects.new("Mesh", meN)
+    return objN
+
+################################################################################
+
+def setupCellObject(scene, objN, obj, objsN, gridRes, qUseUnifiedSpace, dimensions):
+
+    ### Links a new cell object and transfers the settings of the original object
+    scene.objects.link(objN)
+    objN.name = obj.name
+    copyCustomData(objN, obj)
+    if gridRes > 0: objN.matrix_world = obj.matrix_world
+    elif not qUseUnifiedSpace:
+        objN.location = obj.location
+        objN.rotation_euler = obj.rotation_euler
+        objN.rotation_quaternion = obj.rotation_quaternion
+        objN.dimensions = dimensions
+    objsN.append(objN)
+
 ################################################################################
                    
 if __name__ == "__main__":
@@ -2,7 +2,8 @@
 # Select intersecting objects v1.1 by Kai Kostack #
 ###################################################
 # This script detects and selects objects intersecting with other objects
-# by a certain amount of volume based on boundary boxes (not actual geometry).
+# by a certain amount of volume based on boundary boxes, optionally verified
+# by BVH tree overlap of the actual geometry.
 # Notes:
 # Some functions are taken from kk_bullet_constraints_builder
 # Slightly changed: findConnectionsByBoundaryBoxIntersection()
@@ -48,6 +49,7 @@ def run(source=None, parameters=None):
     qDelete = 0           # 0   | Deletes object duplicates (instead of selection only)
 
     qBool = 1             # 0   | Use boolean subtraction to resolve overlappings (overrides all above selection settings)
+    qBVH = 1              # 1   | Use BVH tree overlap of the actual geometry as narrow phase so only truly intersecting or encased object pairs are selected or resolved
 
     ### Internal vars for BCB related functions
     connectionCountLimit = 0
@@ -85,6 +87,8 @@ def run(source=None, parameters=None):
         contactVolume, connectsLoc = calculateContactAreaBasedOnBoundaryBoxesForAll(objs, connectsPair, encaseTol)
         ###### Delete connections with zero contact area/volume
         connectsPair, connectsArea, connectsLoc = deleteConnectionsWithZeroContactArea(objs, connectsPair, contactVolume, connectsLoc, minimumVolume)
+        ###### Delete connections whose meshes are not actually intersecting
+        if qBVH: connectsPair, connectsArea, connectsLoc = deleteConnectionsWithoutGeometryOverlap(objs, connectsPair, connectsArea, connectsLoc)
 
         # Deselect all objects.
         bpy.ops.object.select_all(action='DESELECT')
@@ -428,6 +432,63 @@ def deleteConnectionsWithZeroContactArea(objs, connectsPair, connectsArea, conne
     return connectsPair, connectsArea, connectsLoc
 
 ################################################################################   
+
+def getBVHTree(obj, bvhTrees):
+
+    ### Build world space BVH tree for an object once and cache it
+    if obj.name in bvhTrees: return bvhTrees[obj.name]
+    me = obj.data
+    mat = obj.matrix_world
+    verts = [mat *v.co for v in me.vertices]  # Multiply matrix by vertex coordinates to get global coordinates
+    # Empty meshes can't intersect anything
+    if not len(verts):
+        bvhTrees[obj.name] = [None, None]
+        return bvhTrees[obj.name]
+    polys = [tuple(p.vertices) for p in me.polygons]
+    bvh = mathutils.bvhtree.BVHTree.FromPolygons(verts, polys)
+    bvhTrees[obj.name] = [bvh, verts[0]]
+    return bvhTrees[obj.name]
+
+########################################
+
+def isInsideBVHTree(co, bvh):
+
+    ### Check if a location is inside of a closed mesh by the direction of the nearest surface normal
+    if bvh == None or co == None: return 0
+    loc, normal, index, dist = bvh.find_nearest(co)
+    if loc == None: return 0
+    return (co -loc).dot(normal) < 0
+
+########################################
+
+def deleteConnectionsWithoutGeometryOverlap(objs, connectsPair, connectsArea, connectsLoc):
+    
+    ### Delete connections whose meshes are not actually intersecting (narrow phase by BVH tree overlap)
+    print("Testing found intersections on actual geometry... (%d)" %len(connectsPair))
+    
+    bvhTrees = {}  # Cache of BVH trees per object name so every tree is built only once
+    connectsPairTmp = []
+    connectsAreaTmp = []
+    connectsLocTmp = []
+    connectCntOld = len(connectsPair)
+    connectCnt = 0
+    for i in range(len(connectsPair)):
+        bvhA, coA = getBVHTree(objs[connectsPair[i][0]], bvhTrees)
+        bvhB, coB = getBVHTree(objs[connectsPair[i][1]], bvhTrees)
+        # Surfaces are intersecting or one object is completely encased into the other
+        if (bvhA != None and bvhB != None and len(bvhA.overlap(bvhB))) or isInsideBVHTree(coA, bvhB) or isInsideBVHTree(coB, bvhA):
+            connectsPairTmp.append(connectsPair[i])
+            connectsAreaTmp.append(connectsArea[i])
+            connectsLocTmp.append(connectsLoc[i])
+            connectCnt += 1
+    connectsPair = connectsPairTmp
+    connectsArea = connectsAreaTmp
+    connectsLoc = connectsLocTmp
+    
+    print("Connections skipped due to non-intersecting geometry:", connectCntOld -connectCnt)
+    return connectsPair, connectsArea, connectsLoc
+
+################################################################################   
                 
 if __name__ == "__main__":
     run()
\ No newline at end of file
@@ -112,7 +112,7 @@ def makeListsPickleFriendly(listOld):
 
 ################################################################################
 
-def exportConfigData(scene):
+def exportConfigData(scene, pathName=logPath +r"\bcb.cfg"):
 
     ### Store menu config data to file
     print("Exporting config data to external file...")
@@ -146,16 +146,16 @@ def exportConfigData(scene):
     configData.append(props.lowerBrkThresPriority)
     configData.append(props.detonatorObj)
     configData.append(mem["elemGrps"])
-    dataToFile(configData, logPath +r"\bcb.cfg")
+    dataToFile(configData, pathName)
     
 ################################################################################
 
-def importConfigData(scene):
+def importConfigData(scene, pathName=logPath +r"\bcb.cfg"):
 
     ### Importing menu config data from file
     print("Importing config data from external file...")
     
-    configData = dataFromFile(logPath +r"\bcb.cfg")
+    configData = dataFromFile(pathName)
     if configData == 1: return 1  # Error
     i = 0
     if bcb_version != configData[i]:
@@ -118,7 +118,7 @@ class bcb_props(bpy.types.PropertyGroup):
     postprocTools_aut = bool_(default=0, name="Run On Automatic Mode", description="Enables that postprocessing will be performed on Automatic Mode. To avoid accidental double execution, this will be disabled whenever a postprocessing tool is activated manually, but it can be activated again at any time")
 
     postprocTools_lox = bool_(default=1)
-    postprocTools_lox_elm = string_(name="Element",       default='Cube', description="Enter the name of an element for which the location time history should be exported")
+    postprocTools_lox_elm = string_(name="Element",       default='Cube', description="Enter the name of an element or a group of elements for which the location time history should be exported. If empty, all selected elements are used")
     postprocTools_lox_nam = string_(name="CSV Folder",    default='', description="Enter a path or search for folder for data export as plain ASCII text with comma-separated values (.csv)")
 
     postprocTools_fcx = bool_(default=1)
@@ -164,6 +164,7 @@ class bcb_props(bpy.types.PropertyGroup):
     disableCollisionPerm  = bool_(name="Dis. Col. Permanently",   default=0,                       description="Disables collisions between initially connected elements permanently. This can help to make simulations with intersecting geometry more stable at the cost of accuracy")
     lowerBrkThresPriority = bool_(name="Lower Strength Priority", default=1,                       description="Gives priority to the weaker breaking threshold of two elements from different element groups with same Priority value to be connected, if disabled the stronger value is used for the connection")
     detonatorObj          = string_(name="Detonator Object",      default="Detonator",             description="Enter name of an object to be used to simulate the effects of an explosion. This feature replicates the damage caused by such an event by weakening the constraints within range of the object. It is recommended to use an Empty object with a sphere shape for this. The damage is calculated as gradient of the distance mapped to the size, from 200% weakening at center to 0% at boundary")
+    roiObj                = string_(name="Region of Interest",    default="",                      description="Enter name of an object which volume defines the region of interest. Elements outside of it start kinematic and are woken progressively as a front through the connection graph when a neighbor's connection breaks or the neighbor moves. This saves solver time when only a part of a large building is affected. It is recommended to use a box shaped mesh or an Empty object with a cube shape for this")
     
     ### Element group properties
     # Create element groups properties for all possible future entries (maxMenuElementGroupItems)
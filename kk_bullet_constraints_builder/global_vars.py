@@ -274,6 +274,35 @@ materialName = "BCB_Gradient_"
 
 # For monitor event handler
 qRenderAnimation = 0                 # 0     | Render animation by using render single image function for each frame (doesn't support motion blur, keep it disabled), 1 = regular, 2 = OpenGL
+restDetectWindow = 0                 # 0     | Stop baking early when the scene has been at rest for this many frames, the cache end is trimmed accordingly, 0 = disabled
+restMaxDisplacement = 0.0005         # 0.5 mm| Maximum displacement of any element per frame for the scene to be considered at rest in m
+restMaxKineticEnergy = 1.0           # 1 J   | Maximum total kinetic energy of all elements for the scene to be considered at rest in J
+adaptiveSteps = 0                    # 0     | Enables adaptive rigid body steps per second during baking, raising them on spikes of broken connections or element velocity and lowering them again in calm phases
+adaptiveStepsFacMin = 0.25           # 0.25  | Lower limit for adaptive steps per second as factor of the original value
+adaptiveStepsFacMax = 4.0            # 4     | Upper limit for adaptive steps per second as factor of the original value
+adaptiveBrokenLimit = 10             # 10    | Newly broken connections per frame from which steps per second are raised
+adaptiveVelocityLimit = 5.0          # 5 m/s | Peak element velocity from which steps per second are raised
+adaptiveCalmFrames = 10              # 10    | Number of calm frames after which steps per second are lowered again
+telemetryFormat = ""                 #       | Records per-frame telemetry data of the monitor into logPath, "csv", "jsonl" or "bin" (columnar float64 chunks), empty = disabled
+telemetryBufferSize = 1000           # 1000  | Size of the in-memory ring buffer for telemetry records in frames
+telemetryFlushInterval = 100         # 100   | Number of buffered records after which they are written asynchronously to the telemetry file
+roiWakeDisplacement = 0.01           # 1 cm  | Displacement of an element from its initial location at which its inactive neighbors outside of the region of interest are woken in m
+locHistoryFormat = "csv"             # "csv" | File format of the location history export, "csv" or "bin" (columnar float32 chunks)
+locHistoryChunkSize = 100            # 100   | Number of frames collected before they are written as one chunk by a background thread
+forceHistoryBufferSize = 1048576     # 1 MB  | Write buffer size of the force history export in bytes, lines are written to disk whenever it is full
+damageStatsFile = ""                 #       | Accumulates counts of intact, plastic and broken connections per element group and floor during baking and writes a summary to this JSON file (dissipated work proxy per frame always, kinetic energy only if rest detection, adaptive steps or telemetry are enabled), "" = disabled
+damageFloorHeight = 3.0              # 3 m   | Story height for binning connections into floors by their height for the damage statistics in m
+sweepGridFile = r"/tmp/bcb-sweep.json" #      | Parameter grid for scenario sweeps as JSON: {"prop name" or "EGSidx.." or "EGSidx..:group": [values, ...], ...}
+sweepPath = r"/tmp/bcb-sweep"        #       | Output folder for scenario sweep configs, manifest, results and summary table
+checkpointInterval = 100             # 100   | Interval in frames in which the monitor state is written to a checkpoint file for resuming a crashed or killed bake (only with disk cache enabled), 0 = disabled
+checkpointFile = r"/tmp/bcb-resume"  #       | Checkpoint file to write the monitor state to, requires disk cache to be enabled for the rigid body world to be useful
+progrWeakLogFile = ""                #       | File name (within logPath) progressive weakening summaries are appended to on every weakening step, empty = disabled
+qPolygonClipping = 1                 # 1     | Calculates the accurate contact area (useAccurateArea) by clipping coplanar opposing faces of both elements, pairs which can't be handled that way fall back to the boundary box estimation (booleans when used), not available for parallelProcesses
+clippingAngleTolerance = 1.0         # 1°    | Maximum deviation from exactly opposing face normals for faces to be considered coplanar for polygon clipping in degrees
+qDirectMeshOps = 1                   # 1     | Applies scale and bevel of elements directly on the mesh data (bulk vertex arrays, bmesh) instead of calling operators per object
+parallelProcesses = 0                # 0     | Number of parallel processes for connection search and contact area estimation by boundary boxes (NumPy workers outside of Blender), 0 = disabled
+tileSize = 0                         # 0     | Edge length of spatial tiles (XY) in m for searching connections of very large models tile by tile with stitched seams (later build stages are not tiled), 0 = disabled
+geometryBundleFile = ""              #       | Writes a geometry bundle (NPZ) of the prepared elements for the headless builder core.py on every build and the connection table of the build next to it (CSV) for "core.py check", empty = disabled
 
 ### Consts
 pi = 3.1416
@@ -30,7 +30,7 @@
 
 ################################################################################
 
-import bpy, sys
+import bpy, sys, os
 mem = bpy.app.driver_namespace
 
 ### Import submodules
@@ -148,6 +148,10 @@ class bcb_panel_execute(bpy.types.Panel):
             split2 = split.split(align=1)
             split2.operator("bcb.set_config", icon="NEW")
 
+        if checkpointInterval and os.path.isfile(checkpointFile):
+            row = col.row(align=1)
+            row.operator("bcb.bake_resume", icon="RECOVER_AUTO")
+
         ### Update global vars from menu related properties
         props.props_update_globals()
 
@@ -428,6 +432,7 @@ class bcb_panel_triggers(bpy.types.Panel):
         col = layout.column(align=1)
 
         row = col.row(align=1); row.prop(props, "detonatorObj")
+        row = col.row(align=1); row.prop(props, "roiObj")
 
         col.separator()
         row = col.row(align=1); row.prop(props, "progrWeak")
@@ -220,7 +220,7 @@ class OBJECT_OT_bcb_export_ascii_fm(bpy.types.Operator):
                 bpy.ops.ptcache.free_bake(contextFix)
                 if props.automaticMode:
                     # Prepare event handler
-                    bpy.app.handlers.frame_change_pre.append(monitor_stop_eventHandler)
+                    dispatcher_register(monitor_stop_eventHandler)
                     # Invoke baking (old method, appears not to work together with the event handler past Blender v2.76 anymore)
                     #bpy.ops.ptcache.bake(contextFix, bake=True)
                     if props.automaticMode and props.postprocTools_aut: pass
@@ -252,6 +252,10 @@ class OBJECT_OT_bcb_bake(bpy.types.Operator):
             print("Error: No 'Rigid Body World' found, please create one in the Scene buttons.")
             return{'CANCELLED'} 
         bpy.ops.ptcache.free_bake(contextFix)
+        ### Restore cache end if it was trimmed by the rest detection of a previous bake
+        if "bcb_cacheFrameEndOrig" in scene.keys():
+            scene.rigidbody_world.point_cache.frame_end = scene["bcb_cacheFrameEndOrig"]
+            del scene["bcb_cacheFrameEndOrig"]
         ### Invalidate point cache to enforce a full bake without using previous cache data
         if "RigidBodyWorld" in bpy.data.groups:
             try: obj = bpy.data.groups["RigidBodyWorld"].objects[0]
@@ -271,8 +275,8 @@ class OBJECT_OT_bcb_bake(bpy.types.Operator):
         ### Start baking when we have constraints set
         else:
             # Prepare event handlers
-            bpy.app.handlers.frame_change_pre.append(monitor_eventHandler)
-            bpy.app.handlers.frame_change_pre.append(monitor_stop_eventHandler)
+            dispatcher_register(monitor_eventHandler)
+            dispatcher_register(monitor_stop_eventHandler)
             monitor_eventHandler(scene)  # Init at current frame before starting simulation
             # Invoke baking (old method, appears not to work together with the event handler past Blender v2.76 anymore)
             #bpy.ops.ptcache.bake(contextFix, bake=True)
@@ -285,6 +289,36 @@ class OBJECT_OT_bcb_bake(bpy.types.Operator):
 
 ########################################
 
+class OBJECT_OT_bcb_bake_resume(bpy.types.Operator):
+    bl_idname = "bcb.bake_resume"
+    bl_label = "Resume"
+    bl_description = "Resumes a crashed or killed simulation from the last checkpoint written by the monitor. Requires disk cache to be enabled for the rigid body world"
+    def execute(self, context):
+        props = context.window_manager.bcb
+        scene = bpy.context.scene
+        if scene.rigidbody_world == None:
+            print("Error: No 'Rigid Body World' found, please create one in the Scene buttons.")
+            return{'CANCELLED'} 
+        if "bcb_monitor" in bpy.app.driver_namespace.keys():
+            print("Error: Simulation is already running.")
+            return{'CANCELLED'} 
+        checkpoint = monitor_readCheckpoint(checkpointFile)
+        if checkpoint == None: return{'CANCELLED'} 
+        ### Go to checkpoint frame
+        scene.frame_current = checkpoint["frame"]
+        bpy.context.screen.scene = scene  # Hack to update scene completely
+        ###### Restore monitor state
+        if monitor_restoreCheckpoint(scene, checkpoint): return{'CANCELLED'} 
+        # Prepare event handlers
+        dispatcher_register(monitor_eventHandler)
+        dispatcher_register(monitor_stop_eventHandler)
+        # Start animation playback and by that the baking process
+        if not bpy.context.screen.is_animation_playing:
+            bpy.ops.screen.animation_play()
+        return{'FINISHED'} 
+
+########################################
+
 class OBJECT_OT_bcb_add(bpy.types.Operator):
     bl_idname = "bcb.add"
     bl_label = ""
@@ -794,7 +828,7 @@ class OBJECT_OT_bcb_postprocess_do_all_steps_at_once(bpy.types.Operator):
 class OBJECT_OT_bcb_postproc_tool_export_location_history(bpy.types.Operator):
     bl_idname = "bcb.postproc_tool_export_location_history"
     bl_label = "Export Location History"
-    bl_description = "Exports the location time history of an element centroid into a .csv file"
+    bl_description = "Exports the location and rotation time history of one or many element centroids into a .csv or binary file"
     def execute(self, context):
         OBJECT_OT_bcb_bake.execute(self, context)
         props = context.window_manager.bcb
@@ -852,6 +886,17 @@ class OBJECT_OT_bcb_postproc_tool_detect_cavities(bpy.types.Operator):
 
 ########################################
 
+class OBJECT_OT_bcb_tool_sweep_export(bpy.types.Operator):
+    bl_idname = "bcb.tool_sweep_export"
+    bl_label = "Export Scenario Sweep"
+    bl_description = "Generates one config file per combination of the parameter grid file (see sweepGridFile in global_vars.py) and a manifest to run all scenarios as parallel background Blender processes with sweep.py"
+    def execute(self, context):
+        scene = bpy.context.scene
+        if tool_sweepExport(scene): return{'CANCELLED'}
+        return{'FINISHED'}
+
+########################################
+
 class OBJECT_OT_bcb_postproc_tool_run_python_script(bpy.types.Operator):
     bl_idname = "bcb.postproc_tool_run_python_script"
     bl_label = "Run Python Script"
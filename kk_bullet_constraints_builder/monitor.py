@@ -30,13 +30,16 @@
 
 ################################################################################
 
-import bpy, sys, time, os, math
+import bpy, sys, time, os, math, array, pickle, zlib, threading
 mem = bpy.app.driver_namespace
 
 ### Import submodules
 from global_vars import *      # Contains global variables
 from builder import *          # Contains constraints builder function
 from build_data import *       # Contains build data access functions
+from telemetry import *        # Contains telemetry recorder for the baking monitor
+from dispatcher import *       # Contains unified frame change event handler dispatcher
+from damage import *           # Contains streaming damage statistics for the baking monitor
 
 ################################################################################
 
@@ -47,8 +50,7 @@ def monitor_eventHandler(scene):
     ### Render part
     if qRenderAnimation:
         # Need to disable handlers while rendering, otherwise Blender crashes
-        bpy.app.handlers.frame_change_pre.remove(monitor_eventHandler)
-        bpy.app.handlers.frame_change_pre.remove(monitor_stop_eventHandler)
+        bpy.app.handlers.frame_change_pre.remove(dispatcher_eventHandler)
         
         filepathOld = bpy.context.scene.render.filepath
         bpy.context.scene.render.filepath += "%04d" %(scene.frame_current -1)
@@ -67,8 +69,7 @@ def monitor_eventHandler(scene):
         bpy.context.scene.render.filepath = filepathOld
         
         # Append handlers again
-        bpy.app.handlers.frame_change_pre.append(monitor_eventHandler)
-        bpy.app.handlers.frame_change_pre.append(monitor_stop_eventHandler)
+        bpy.app.handlers.frame_change_pre.append(dispatcher_eventHandler)
 
     # Only evaluate monitor when official Blender and not Fracture Modifier is in use
     if not hasattr(bpy.types.DATA_PT_modifiers, 'FRACTURE') or not asciiExportName in scene.objects:
@@ -83,6 +84,8 @@ def monitor_eventHandler(scene):
             
             ###### Function
             monitor_initBuffers(scene)
+            # Store step ratio the original breaking thresholds were calculated for
+            bpy.app.driver_namespace["bcb_monitor_baseStepRatio"] = scene.rigidbody_world.time_scale /scene.rigidbody_world.steps_per_second
 
             ### Create new animation data and action if necessary
             if scene.animation_data == None:
@@ -136,8 +139,29 @@ def monitor_eventHandler(scene):
                     if ratio >= 5000: scene.rigidbody_world.solver_iterations /= 10
                     ### Set new time scale
                     scene.rigidbody_world.time_scale = props.timeScalePeriodValue
-                    ###### Execute update of all existing constraints with new time scale
-                    build()
+                    ###### Rescale breaking thresholds of all existing constraints to new time scale
+                    monitor_rescaleBreakingThresholds(scene)
+
+            ### Deactivate elements outside of the region of interest
+            if len(props.roiObj):
+                ###### Function
+                monitor_initRegionOfInterest(scene)
+
+            ### Init adaptive steps per second
+            if adaptiveSteps:
+                bpy.app.driver_namespace["bcb_monitor_originalStepsPerSecond"] = scene.rigidbody_world.steps_per_second
+                #                                                   0 (calm frames)  1 (adaptive substeps)  2 (fixed substeps)
+                bpy.app.driver_namespace["bcb_monitor_adaptiveSteps"] = [0, 0, 0]
+
+            ### Init telemetry recorder
+            if telemetry_getSettings()[0]:
+                ###### Function
+                telemetry_init(scene, bpy.app.driver_namespace["bcb_monitor"])
+
+            ### Init damage statistics
+            if len(damageStatsFile):
+                ###### Function
+                damage_init(scene, bpy.app.driver_namespace["bcb_monitor"])
 
             ### Init weakening
             if props.progrWeak:
@@ -150,7 +174,8 @@ def monitor_eventHandler(scene):
         ### What to do AFTER start frame
         elif "bcb_monitor" in bpy.app.driver_namespace.keys() and scene.frame_current > scene.frame_start:   # Check this to skip the last run when jumping back to start frame
             time_last = bpy.app.driver_namespace["bcb_time"]
-            sys.stdout.write("Frm: %d - T: %0.2f s" %(scene.frame_current, time.time() -time_last))
+            timeStep = time.time() -time_last
+            sys.stdout.write("Frm: %d - T: %0.2f s" %(scene.frame_current, timeStep))
             bpy.app.driver_namespace["bcb_time"] = time.time()
             if props.progrWeak and bpy.app.driver_namespace["bcb_progrWeakTmp"]:
                 progrWeakCurrent = bpy.app.driver_namespace["bcb_progrWeakCurrent"]
@@ -158,7 +183,37 @@ def monitor_eventHandler(scene):
         
             ###### Function
             cntBroken = monitor_checkForChange(scene)
+
+            ### Adapt steps per second to the current simulation activity
+            if adaptiveSteps:
+                ###### Function
+                monitor_adaptiveSteps(scene, cntBroken)
+
+            ### Record telemetry data for this frame
+            if telemetry_getSettings()[0]:
+                ###### Function
+                motion = monitor_getElementMotion(scene)
+                ###### Function
+                telemetry_record(scene, bpy.app.driver_namespace["bcb_monitor"], timeStep, motion)
+
+            ### Check if all elements came to rest so the remaining frames can be skipped
+            if restDetectWindow \
+            and (not props.timeScalePeriod or (props.timeScalePeriod and scene.frame_current > scene.frame_start +props.timeScalePeriod)) \
+            and (not props.warmUpPeriod or (props.warmUpPeriod and scene.frame_current > scene.frame_start +props.warmUpPeriod)):
+                ###### Function
+                monitor_checkForRest(scene)
             
+            ### Update damage statistics from the connections changed in this frame
+            # Element motion is only reused if another feature has already evaluated it in this frame, so the cost stays proportional to the changed connections
+            if len(damageStatsFile):
+                ###### Function
+                damage_record(scene, bpy.app.driver_namespace["bcb_monitor"], bpy.app.driver_namespace["bcb_monitor_changed"], monitor_getElementMotionCached(scene))
+
+            ### Wake elements next to the changed part of the region of interest front
+            if "bcb_monitor_roi" in bpy.app.driver_namespace.keys():
+                ###### Function
+                monitor_wakeRegionOfInterest(scene)
+
             # Debug: Stop on first broken connection
             #if cntBroken > 0: bpy.ops.screen.animation_play()
                 
@@ -185,13 +240,20 @@ def monitor_eventHandler(scene):
                     scene.rigidbody_world.time_scale = bpy.app.driver_namespace["bcb_monitor_originalTimeScale"]
                     # Set original solver precision
                     scene.rigidbody_world.solver_iterations = bpy.app.driver_namespace["bcb_monitor_originalSolverIterations"]
-                    ###### Execute update of all existing constraints with new time scale
-                    build()
+                    ###### Rescale breaking thresholds of all existing constraints to original time scale
+                    monitor_rescaleBreakingThresholds(scene)
                     ### Move detonator force fields to other layer to deactivate influence (Todo: Detonator not yet part of BCB)
                     if "Detonator" in bpy.data.groups:
                         for obj in bpy.data.groups["Detonator"].objects:
                             obj["Layers_BCB"] = obj.layers
                             obj.layers = [False,False,False,False,False, False,False,False,False,False, False,False,False,False,False, False,False,False,False,True]
+
+            ### Write monitor state to checkpoint file in regular intervals
+            # (only with disk cache enabled for the rigid body world, otherwise the simulation state can't be resumed from it anyway)
+            if checkpointInterval and scene.rigidbody_world.point_cache.use_disk_cache \
+            and (scene.frame_current -scene.frame_start) %checkpointInterval == 0:
+                ###### Function
+                monitor_writeCheckpoint(scene)
                 
 ################################################################################
 
@@ -219,7 +281,7 @@ def monitor_stop_eventHandler(scene):
         bpy.app.driver_namespace["bcb_time_start"] = time.time()
 
     ### Check if last frame is reached
-    if scene.frame_current == scene.frame_end or os.path.isfile(commandStop):
+    if scene.frame_current == scene.frame_end or os.path.isfile(commandStop) or "bcb_monitor_restFrame" in bpy.app.driver_namespace.keys():
         if bpy.context.screen.is_animation_playing:
             # Stop animation playback
             bpy.ops.screen.animation_play()
@@ -229,12 +291,8 @@ def monitor_stop_eventHandler(scene):
 
     ### If animation playback has stopped (can also be done by user) then free all monitor data and unload the event handler 
     if not bpy.context.screen.is_animation_playing:
-        try: bpy.app.handlers.frame_change_pre.remove(monitor_eventHandler)
-        except: pass
-        else: print("Removed event handler: monitor_eventHandler")
-        try: bpy.app.handlers.frame_change_pre.remove(monitor_stop_eventHandler)
-        except: pass
-        else: print("Removed event handler: monitor_stop_eventHandler")
+        dispatcher_unregister(monitor_eventHandler)
+        dispatcher_unregister(monitor_stop_eventHandler)
         # Convert animation point cache to fixed bake data 
         contextFix = bpy.context.copy()
         contextFix['point_cache'] = scene.rigidbody_world.point_cache
@@ -374,9 +432,11 @@ def monitor_checkForChange(scene):
     connects = bpy.app.driver_namespace["bcb_monitor"]
     rbw_steps_per_second = scene.rigidbody_world.steps_per_second
     rbw_time_scale = scene.rigidbody_world.time_scale
+    snapshot = dispatcher_getSnapshot(scene)
 
     d = 0; e = 0; cntP = 0; cntB = 0
-    for connect in connects:
+    changed = bpy.app.driver_namespace["bcb_monitor_changed"] = []  # Indices of connections with changed mode in this frame
+    for k, connect in enumerate(connects):
         conMode = connect[12]
 
         ### If connection is in fixed mode then check if first tolerance is reached
@@ -393,15 +453,18 @@ def monitor_checkForChange(scene):
                 distDifLast = connect[14]
                 anglDifLast = connect[15]
                 
+                locA, quatA = dispatcher_getTransform(snapshot, objA)
+                locB, quatB = dispatcher_getTransform(snapshot, objB)
+                
                 # Calculate distance between both elements of the connection
-                dist = (objA.matrix_world.to_translation() -objB.matrix_world.to_translation()).length
+                dist = (locA -locB).length
                 if dist > 0: distDif = abs(1 -(distOrig /dist))
                 else: distDif = 1
 
                 # Calculate angle between two elements
                 vecA = Vector((0,0,1)); vecB = Vector((0,0,1))
-                vecA.rotate(objA.matrix_world.to_quaternion())  # Rotate Z vector according to object orientation
-                vecB.rotate(objB.matrix_world.to_quaternion())
+                vecA.rotate(quatA)  # Rotate Z vector according to object orientation
+                vecB.rotate(quatB)
                 anglDif = abs(anglOrig -vecA.angle(vecB))
 
                 # If change in relative distance is larger than tolerance plus change in angle (angle is involved here to allow for bending and buckling)
@@ -425,6 +488,7 @@ def monitor_checkForChange(scene):
                         # Flag connection as being disconnected
                         connect[12] += 2
                         cntB += 1
+                    changed.append(k)
 
 #                # When no breaking or mode change happens but connection is breakable
 #                else:
@@ -505,14 +569,15 @@ def monitor_checkForChange(scene):
                 tolDist = connect[10]
                 tolRot = connect[11]
                 
+                locA, quatA = dispatcher_getTransform(snapshot, objA)
+                locB, quatB = dispatcher_getTransform(snapshot, objB)
+
                 # Calculate distance between both elements of the connection
-                dist = (objA.matrix_world.to_translation() -objB.matrix_world.to_translation()).length
+                dist = (locA -locB).length
                 if dist > 0: distDif = abs(1 -(distOrig /dist))
                 else: distDif = 1
 
                 # Calculate angle between two elements
-                quatA = objA.matrix_world.to_quaternion()
-                quatB = objB.matrix_world.to_quaternion()
                 anglDif = math.asin(math.sin( abs(anglOrig -quatA.rotation_difference(quatB).angle) /2))   # The construct "asin(sin(x))" is a triangle function to achieve a seamless rotation loop from input
 
                 # If change in relative distance is larger than tolerance plus change in angle (angle is involved here to allow for bending and buckling)
@@ -525,6 +590,7 @@ def monitor_checkForChange(scene):
                     # Flag connection as being disconnected
                     connect[12] += 1
                     cntB += 1
+                    changed.append(k)
 
         ### Enable original breakability for all constraints when warm up time is over
 #        if props.warmUpPeriod:
@@ -544,22 +610,469 @@ def monitor_checkForChange(scene):
                 
 ################################################################################
 
-def progressiveWeakening(scene, progrWeakVar):
+def monitor_initRegionOfInterest(scene, roiActive=None):
 
-    if debug: print("Calling progressiveWeakening")
+    if debug: print("Calling initRegionOfInterest")
 
+    props = bpy.context.window_manager.bcb
     connects = bpy.app.driver_namespace["bcb_monitor"]
-    i = 0
+
+    try: roiObj = scene.objects[props.roiObj]
+    except:
+        print("Warning: Region of interest object '%s' not found, all elements stay active." %props.roiObj)
+        return
+    
+    ### Get bounds of the region of interest volume in its local space
+    if roiObj.type == 'MESH':
+        bb = roiObj.bound_box
+        roiMin = Vector((min([co[0] for co in bb]), min([co[1] for co in bb]), min([co[2] for co in bb])))
+        roiMax = Vector((max([co[0] for co in bb]), max([co[1] for co in bb]), max([co[2] for co in bb])))
+    else:
+        size = roiObj.empty_draw_size
+        roiMin = Vector((-size, -size, -size))
+        roiMax = Vector((size, size, size))
+    matInv = roiObj.matrix_world.inverted()
+
+    ### Gather elements and their connections from monitor data
+    roiObjs = {}
+    elemConnects = {}
     for connect in connects:
-        sys.stdout.write("\r%d" %i)
-        consts = connect[4]
-        for const in consts:
-            const.rigid_body_constraint.breaking_threshold *= progrWeakVar
-        i += 1
-    sys.stdout.write("\r")
+        for elem in [connect[0], connect[1]]:
+            roiObjs[elem[1]] = elem[0]
+            if elem[1] not in elemConnects: elemConnects[elem[1]] = []
+            elemConnects[elem[1]].append([connect, connect[12]])  # Store initial mode to detect changes
+
+    ### Create neighbor graph from connection pairs
+    neighbors = {}
+    for k in roiObjs.keys(): neighbors[k] = []
+    try: connectsPair = scene["bcb_connectsPair"]
+    except: connectsPair = []; print("Error: bcb_connectsPair property not found, rebuilding constraints is required.")
+    for pair in connectsPair:
+        if pair[0] in roiObjs and pair[1] in roiObjs:
+            neighbors[pair[0]].append(pair[1])
+            neighbors[pair[1]].append(pair[0])
+
+    ### Make active elements outside of the volume kinematic
+    active = {}
+    locsInit = {}
+    kinematicOrig = {}
+    for k, obj in roiObjs.items():
+        rb = obj.rigid_body
+        # Passive and animated elements are left untouched
+        if rb == None or rb.type != 'ACTIVE' or rb.kinematic:
+            active[k] = 1; continue
+        locsInit[k] = obj.matrix_world.to_translation()
+        if roiActive != None:
+            qActive = roiActive.get(k, 1)
+        else:
+            loc = matInv *locsInit[k]
+            qActive = roiMin[0] <= loc[0] <= roiMax[0] and roiMin[1] <= loc[1] <= roiMax[1] and roiMin[2] <= loc[2] <= roiMax[2]
+        active[k] = qActive
+        if not qActive:
+            kinematicOrig[k] = rb.kinematic
+            rb.kinematic = 1
+
+    ### Front consists of active elements having inactive neighbors
+    front = set()
+    for k in roiObjs.keys():
+        if active[k]:
+            for n in neighbors[k]:
+                if not active[n]: front.add(k); break
+    
+    #                                        0        1       2      3          4             5         6
+    bpy.app.driver_namespace["bcb_monitor_roi"] = [roiObjs, active, front, neighbors, elemConnects, locsInit, kinematicOrig]
+    print("Region of interest: %d of %d elements active, %d on front." %(len(roiObjs) -len(kinematicOrig), len(roiObjs), len(front)))
+
+########################################
+
+def monitor_wakeRegionOfInterest(scene):
+
+    if debug: print("Calling wakeRegionOfInterest")
+
+    roiObjs, active, front, neighbors, elemConnects, locsInit, kinematicOrig = bpy.app.driver_namespace["bcb_monitor_roi"]
+    if not len(front): return
+    snapshot = dispatcher_getSnapshot(scene)
+
+    ### Check front elements for changed connections or displacement beyond threshold
+    wake = []
+    for k in front:
+        qTrigger = 0
+        for connect, modeInit in elemConnects[k]:
+            if connect[12] != modeInit: qTrigger = 1; break
+        if not qTrigger and k in locsInit:
+            if (dispatcher_getTransform(snapshot, roiObjs[k])[0] -locsInit[k]).length > roiWakeDisplacement: qTrigger = 1
+        if qTrigger: wake.append(k)
+    if not len(wake): return
+
+    ### Activate inactive neighbors of triggered elements and advance the front
+    cntWoken = 0
+    for k in wake:
+        front.discard(k)
+        for n in neighbors[k]:
+            if not active[n]:
+                active[n] = 1
+                roiObjs[n].rigid_body.kinematic = kinematicOrig[n]
+                locsInit[n] = dispatcher_getTransform(snapshot, roiObjs[n])[0]
+                cntWoken += 1
+                for m in neighbors[n]:
+                    if not active[m]: front.add(n); break
+    cntActive = 0
+    for k in active.keys():
+        if active[k]: cntActive += 1
+    print("Region of interest: %d elements woken, %d of %d active." %(cntWoken, cntActive, len(roiObjs)))
+
+################################################################################
+
+def monitor_getElementMotion(scene):
+
+    ### Returns maximum displacement [m], peak velocity [m/s], total kinetic energy [J] and mean displacement [m] of all active elements since the last frame (evaluated once per frame)
+    if "bcb_monitor_motion" in bpy.app.driver_namespace.keys():
+        frame, motion = bpy.app.driver_namespace["bcb_monitor_motion"]
+        if frame == scene.frame_current: return motion
+        
+    connects = bpy.app.driver_namespace["bcb_monitor"]
+
+    ### Gather all active elements of the monitored connections once
+    if not "bcb_monitor_motionObjs" in bpy.app.driver_namespace.keys():
+        objsSet = set()
+        motionObjs = []
+        motionMasses = array.array('d')
+        for connect in connects:
+            for obj in [connect[0][0], connect[1][0]]:
+                if obj.name not in objsSet:
+                    objsSet.add(obj.name)
+                    if obj.rigid_body != None and obj.rigid_body.type == 'ACTIVE':
+                        motionObjs.append(obj)
+                        motionMasses.append(obj.rigid_body.mass)
+        bpy.app.driver_namespace["bcb_monitor_motionObjs"] = motionObjs, motionMasses
+        bpy.app.driver_namespace["bcb_monitor_motionLocs"] = None
+    motionObjs, motionMasses = bpy.app.driver_namespace["bcb_monitor_motionObjs"]
+
+    ### Get current element locations as flat array and compare them with the ones from the last frame
+    snapshot = dispatcher_getSnapshot(scene)
+    locs = array.array('d')
+    for obj in motionObjs:
+        locs.extend(dispatcher_getTransform(snapshot, obj)[0])
+    locsLast = bpy.app.driver_namespace["bcb_monitor_motionLocs"]
+    bpy.app.driver_namespace["bcb_monitor_motionLocs"] = locs
+    if locsLast == None or len(locsLast) != len(locs): motion = None
+    else:
+        # Frame duration in simulation time for velocity calculation
+        dt = scene.rigidbody_world.time_scale /scene.render.fps
+        dispMax = 0; dispSum = 0; energy = 0
+        for i in range(len(motionObjs)):
+            j = i *3
+            disp = ((locs[j] -locsLast[j])**2 +(locs[j+1] -locsLast[j+1])**2 +(locs[j+2] -locsLast[j+2])**2) **.5
+            if disp > dispMax: dispMax = disp
+            dispSum += disp
+            energy += .5 *motionMasses[i] *(disp /dt)**2  # Kinetic energy proxy from displacement
+        motion = dispMax, dispMax /dt, energy, dispSum /max(1, len(motionObjs))
+    bpy.app.driver_namespace["bcb_monitor_motion"] = scene.frame_current, motion
+    return motion
+
+########################################
+
+def monitor_getElementMotionCached(scene):
+
+    ### Returns the element motion of the current frame only if it has already been evaluated, otherwise None (no extra pass over all elements)
+    if "bcb_monitor_motion" in bpy.app.driver_namespace.keys():
+        frame, motion = bpy.app.driver_namespace["bcb_monitor_motion"]
+        if frame == scene.frame_current: return motion
+    return None
+
+########################################
+
+def monitor_checkForRest(scene):
+
+    if debug: print("Calling checkForRest")
+
+    ###### Function
+    motion = monitor_getElementMotion(scene)
+    if motion == None: return 0
+    dispMax, veloMax, energy, dispMean = motion
+    if not "bcb_monitor_restCount" in bpy.app.driver_namespace.keys():
+        bpy.app.driver_namespace["bcb_monitor_restCount"] = 0
+    
+    ### Count consecutive frames below thresholds
+    if dispMax < restMaxDisplacement and energy < restMaxKineticEnergy:
+        bpy.app.driver_namespace["bcb_monitor_restCount"] += 1
+    else: bpy.app.driver_namespace["bcb_monitor_restCount"] = 0
+
+    if bpy.app.driver_namespace["bcb_monitor_restCount"] >= restDetectWindow:
+        ### Trim cache end to current frame and flag the monitor to stop baking
+        pointCache = scene.rigidbody_world.point_cache
+        if not "bcb_cacheFrameEndOrig" in scene.keys():
+            scene["bcb_cacheFrameEndOrig"] = pointCache.frame_end
+        pointCache.frame_end = scene.frame_current
+        bpy.app.driver_namespace["bcb_monitor_restFrame"] = scene.frame_current
+        ### Estimate time saved from the average frame time so far
+        if "bcb_time_start" in bpy.app.driver_namespace.keys() and scene.frame_current > scene.frame_start:
+            timeFrame = (time.time() -bpy.app.driver_namespace["bcb_time_start"]) /(scene.frame_current -scene.frame_start)
+        else: timeFrame = 0
+        timeSaved = timeFrame *(scene.frame_end -scene.frame_current)
+        print("Rest detected at frame %d (max. displacement: %0.6f m, kinetic energy: %0.3f J), stopping bake." %(scene.frame_current, dispMax, energy))
+        print("Skipped frames: %d - Estimated time saved: %0.2f s" %(scene.frame_end -scene.frame_current, timeSaved))
+        return 1
+
+    return 0
+
+################################################################################
+
+def monitor_adaptiveSteps(scene, cntBroken):
+
+    if debug: print("Calling adaptiveSteps")
+
+    rbw = scene.rigidbody_world
+    adaptive = bpy.app.driver_namespace["bcb_monitor_adaptiveSteps"]
+    stepsOrig = bpy.app.driver_namespace["bcb_monitor_originalStepsPerSecond"]
+    stepsMin = max(1, int(stepsOrig *adaptiveStepsFacMin))
+    stepsMax = int(stepsOrig *adaptiveStepsFacMax)
+
+    ###### Function
+    motion = monitor_getElementMotion(scene)
+    if motion != None: veloMax = motion[1]
+    else: veloMax = 0
+
+    ### Raise steps on spikes, lower them after a calm period
+    steps = rbw.steps_per_second
+    stepsNew = steps
+    if cntBroken >= adaptiveBrokenLimit or veloMax >= adaptiveVelocityLimit:
+        stepsNew = min(steps *2, stepsMax)
+        adaptive[0] = 0
+    else:
+        adaptive[0] += 1
+        if adaptive[0] >= adaptiveCalmFrames:
+            stepsNew = max(steps //2, stepsMin)
+            adaptive[0] = 0
+
+    if stepsNew != steps:
+        rbw.steps_per_second = stepsNew
+        print("Adaptive steps: %d -> %d steps/s (Brk: %d, Vmax: %0.2f m/s)" %(steps, stepsNew, cntBroken, veloMax))
+        ###### Rescale breaking thresholds of all existing constraints to new step rate
+        monitor_rescaleBreakingThresholds(scene)
+
+    ### Keep track of simulated substeps compared to fixed settings
+    substepsFac = rbw.time_scale /scene.render.fps
+    adaptive[1] += stepsNew *substepsFac
+    adaptive[2] += stepsOrig *substepsFac
+
+################################################################################
+
+def monitor_getFlatConstraints():
+
+    ### Gather all valid constraints and their original breaking thresholds once into flat lists (cached for bulk operations)
+    if not "bcb_monitor_flatConsts" in bpy.app.driver_namespace.keys():
+        connects = bpy.app.driver_namespace["bcb_monitor"]
+        flatConsts = []
+        brkThresBase = array.array('d')
+        for connect in connects:
+            consts = connect[4]
+            constsBrkThres = connect[13]
+            for i in range(len(consts)):
+                const = consts[i]
+                if const != None and const.rigid_body_constraint != None:
+                    flatConsts.append(const.rigid_body_constraint)
+                    brkThresBase.append(constsBrkThres[i])
+        bpy.app.driver_namespace["bcb_monitor_flatConsts"] = flatConsts, brkThresBase
+    return bpy.app.driver_namespace["bcb_monitor_flatConsts"]
+
+################################################################################
+
+def monitor_rescaleBreakingThresholds(scene):
+
+    if debug: print("Calling rescaleBreakingThresholds")
+
+    time_start = time.time()
+
+    ### Breaking thresholds are impulses and scale linearly with time_scale /steps_per_second,
+    ### so instead of a full rebuild they are derived from the original values stored on monitor init
+    baseStepRatio = bpy.app.driver_namespace["bcb_monitor_baseStepRatio"]
+    stepRatio = scene.rigidbody_world.time_scale /scene.rigidbody_world.steps_per_second
+    fac = stepRatio /baseStepRatio
+    # Preserve weakening which has already been applied
+    if "bcb_monitor_weakFactor" in bpy.app.driver_namespace.keys():
+        fac *= bpy.app.driver_namespace["bcb_monitor_weakFactor"]
+
+    ###### Get flat constraint list
+    flatConsts, brkThresBase = monitor_getFlatConstraints()
+    
+    brkThres = array.array('d', [val *fac for val in brkThresBase])
+    for con, val in zip(flatConsts, brkThres):
+        con.breaking_threshold = val
+
+    print("Rescaled breaking thresholds of %d constraints by %0.4f (%0.2f s)." %(len(flatConsts), fac, time.time()-time_start))
+            
+################################################################################
+
+def progressiveWeakening(scene, progrWeakVar):
+
+    if debug: print("Calling progressiveWeakening")
+
+    ###### Get flat constraint list so the weakening can be applied as a bulk operation
+    weakConsts, brkThresBase = monitor_getFlatConstraints()
+
+    ### Read and scale all breaking thresholds into a flat array, then write them back in a single pass
+    brkThres = array.array('d', [con.breaking_threshold *progrWeakVar for con in weakConsts])
+    for con, val in zip(weakConsts, brkThres):
+        con.breaking_threshold = val
+    # Keep track of the accumulated weakening for later rescaling
+    if "bcb_monitor_weakFactor" in bpy.app.driver_namespace.keys():
+        bpy.app.driver_namespace["bcb_monitor_weakFactor"] *= progrWeakVar
+    else: bpy.app.driver_namespace["bcb_monitor_weakFactor"] = progrWeakVar
+
+    ### Per-frame summary instead of per-item output
+    print("Weakening: %d constraints scaled by %0.4f" %(len(weakConsts), progrWeakVar))
+    if progrWeakLogFile:
+        try: f = open(os.path.join(logPath, progrWeakLogFile), "a")
+        except: print("Warning: Could not write weakening log file.")
+        else:
+            if len(brkThres): brkThresMin = min(brkThres); brkThresMax = max(brkThres)
+            else: brkThresMin = brkThresMax = 0
+            f.write("%d; %0.6f; %d; %0.6f; %0.6f\n" %(scene.frame_current, progrWeakVar, len(weakConsts), brkThresMin, brkThresMax))
+            f.close()
             
 ################################################################################
 
+def monitor_writeCheckpoint(scene):
+
+    if debug: print("Calling writeCheckpoint")
+
+    ### Skip this checkpoint if the previous one is still being written so the frame handler is never stalled
+    if "bcb_monitor_checkpointThread" in bpy.app.driver_namespace.keys():
+        if bpy.app.driver_namespace["bcb_monitor_checkpointThread"].is_alive():
+            print("Warning: Previous checkpoint still being written, skipping frame %d." %scene.frame_current)
+            return
+
+    connects = bpy.app.driver_namespace["bcb_monitor"]
+    flatConsts, brkThresBase = monitor_getFlatConstraints()
+    pointCache = scene.rigidbody_world.point_cache
+
+    ### Gather snapshot of the monitor state (only plain data, Blender data must not be accessed from another thread)
+    checkpoint = {}
+    checkpoint["version"] = bcb_version
+    checkpoint["filepath"] = bpy.data.filepath
+    checkpoint["frame"] = scene.frame_current
+    checkpoint["pointCache"] = [pointCache.use_disk_cache, pointCache.filepath, pointCache.name, pointCache.index]
+    checkpoint["timeScale"] = scene.rigidbody_world.time_scale
+    checkpoint["stepsPerSecond"] = scene.rigidbody_world.steps_per_second
+    checkpoint["solverIterations"] = scene.rigidbody_world.solver_iterations
+    checkpoint["mem"] = {}
+    for key in ["bcb_monitor_originalTimeScale", "bcb_monitor_originalSolverIterations", "bcb_monitor_originalStepsPerSecond", "bcb_monitor_adaptiveSteps", "bcb_monitor_baseStepRatio", "bcb_monitor_weakFactor", "bcb_progrWeakCurrent", "bcb_progrWeakTmp"]:
+        if key in bpy.app.driver_namespace.keys():
+            value = bpy.app.driver_namespace[key]
+            if isinstance(value, list): value = value.copy()  # Decouple from data still being modified by the monitor
+            checkpoint["mem"][key] = value
+    #                          0           1                2                3            4                 5           6           7
+    checkpoint["connects"] = [[connect[2], list(connect[5]), list(connect[6]), connect[12], list(connect[13]), connect[14], connect[15], connect[3]] for connect in connects]
+    checkpoint["consts"] = [[con.enabled, con.use_breaking, con.breaking_threshold] for con in flatConsts]
+    if "bcb_monitor_roi" in bpy.app.driver_namespace.keys():
+        checkpoint["roiActive"] = bpy.app.driver_namespace["bcb_monitor_roi"][1].copy()
+
+    ### Serialize, compress and write data on a background thread
+    thread = threading.Thread(target=monitor_writeCheckpointFile, args=(checkpoint, checkpointFile))
+    thread.start()
+    bpy.app.driver_namespace["bcb_monitor_checkpointThread"] = thread
+
+########################################
+
+def monitor_writeCheckpointFile(checkpoint, pathName):
+
+    ### Write to temporary file first and replace the old checkpoint afterwards so a crash while writing can't corrupt it
+    data = zlib.compress(pickle.dumps(checkpoint, 4), 1)
+    try: f = open(pathName +".tmp", "wb")
+    except:
+        print('Error: Could not write file:', pathName +".tmp")
+        return
+    else:
+        f.write(data)
+        f.close()
+    try: os.replace(pathName +".tmp", pathName)
+    except: print('Error: Could not write file:', pathName)
+
+########################################
+
+def monitor_readCheckpoint(pathName):
+
+    try: f = open(pathName, "rb")
+    except:
+        print('Error: Could not read file:', pathName)
+        return None
+    else:
+        try: checkpoint = pickle.loads(zlib.decompress(f.read()))
+        except:
+            print('Error: Checkpoint file is corrupted:', pathName)
+            checkpoint = None
+        f.close()
+        return checkpoint
+    
+########################################
+
+def monitor_restoreCheckpoint(scene, checkpoint):
+
+    if debug: print("Calling restoreCheckpoint")
+
+    ### Check if checkpoint is compatible with the current scene
+    if checkpoint["version"] != bcb_version:
+        print("Error: Version mismatch. Try to use the same version of the BCB for baking and resuming.")
+        return 1
+    if checkpoint["filepath"] != bpy.data.filepath:
+        print("Warning: Checkpoint was written for a different blend file:", checkpoint["filepath"])
+    if not checkpoint["pointCache"][0]:
+        print("Error: Checkpoint was written without disk cache enabled for the rigid body world, the simulation state can't be restored.")
+        return 1
+
+    ###### Function
+    if "bcb_monitor_flatConsts" in bpy.app.driver_namespace.keys():
+        del bpy.app.driver_namespace["bcb_monitor_flatConsts"]
+    monitor_initBuffers(scene)
+    connects = bpy.app.driver_namespace["bcb_monitor"]
+    if len(connects) != len(checkpoint["connects"]):
+        print("Error: Connection count mismatch between checkpoint and scene, rebuilding constraints is required.")
+        monitor_freeBuffers(scene)
+        return 1
+
+    ### Restore monitor bookkeeping
+    for connect, data in zip(connects, checkpoint["connects"]):
+        connect[2] = data[0]
+        connect[5] = data[1]
+        connect[6] = data[2]
+        connect[12] = data[3]
+        connect[13] = data[4]
+        connect[14] = data[5]
+        connect[15] = data[6]
+        connect[3] = data[7]  # Original angle, recalculating it from the already deformed elements would shift the reference
+    for key, value in checkpoint["mem"].items():
+        bpy.app.driver_namespace[key] = value
+
+    ### Restore constraint states
+    flatConsts, brkThresBase = monitor_getFlatConstraints()
+    if len(flatConsts) != len(checkpoint["consts"]):
+        print("Error: Constraint count mismatch between checkpoint and scene, rebuilding constraints is required.")
+        monitor_freeBuffers(scene)
+        return 1
+    for con, data in zip(flatConsts, checkpoint["consts"]):
+        con.enabled = data[0]
+        con.use_breaking = data[1]
+        con.breaking_threshold = data[2]
+    # Base thresholds have to be gathered again from the restored original values
+    del bpy.app.driver_namespace["bcb_monitor_flatConsts"]
+
+    ### Restore region of interest activation state
+    if "roiActive" in checkpoint.keys():
+        ###### Function
+        monitor_initRegionOfInterest(scene, checkpoint["roiActive"])
+
+    ### Restore rigid body world settings
+    scene.rigidbody_world.time_scale = checkpoint["timeScale"]
+    scene.rigidbody_world.steps_per_second = checkpoint["stepsPerSecond"]
+    scene.rigidbody_world.solver_iterations = checkpoint["solverIterations"]
+
+    bpy.app.driver_namespace["bcb_time"] = time.time()
+    print("Monitor state restored from checkpoint at frame %d." %checkpoint["frame"])
+    return 0
+
+################################################################################
+
 def monitor_freeBuffers(scene):
     
     if debug: print("Calling freeBuffers")
@@ -594,6 +1107,16 @@ def monitor_freeBuffers(scene):
             # Set original solver precision
             scene.rigidbody_world.solver_iterations = bpy.app.driver_namespace["bcb_monitor_originalSolverIterations"]
                 
+        if "bcb_monitor_originalStepsPerSecond" in bpy.app.driver_namespace.keys():
+            ### Report savings of adaptive steps compared to fixed settings
+            adaptive = bpy.app.driver_namespace["bcb_monitor_adaptiveSteps"]
+            if adaptive[2] > 0:
+                print("Adaptive steps: %d substeps simulated instead of %d with fixed settings (%0.1f%% saved)" %(adaptive[1], adaptive[2], (1 -adaptive[1] /adaptive[2]) *100))
+            # Set original steps per second
+            scene.rigidbody_world.steps_per_second = bpy.app.driver_namespace["bcb_monitor_originalStepsPerSecond"]
+            del bpy.app.driver_namespace["bcb_monitor_originalStepsPerSecond"]
+            del bpy.app.driver_namespace["bcb_monitor_adaptiveSteps"]
+                
         ### Move detonator force fields back to original layer(s) (Todo: Detonator not yet part of BCB)
         if "Detonator" in bpy.data.groups:
             for obj in bpy.data.groups["Detonator"].objects:
@@ -602,8 +1125,35 @@ def monitor_freeBuffers(scene):
                     obj.layers = [bool(i) for i in layers]  # Properties are automatically converted from original bool to int but .layers only accepts bool *shaking head*
                     del obj["Layers_BCB"]
 
+        ###### Write remaining telemetry records
+        telemetry_close()
+        ###### Write damage statistics summary
+        damage_close()
+
+        ### Restore original state of elements deactivated for the region of interest
+        if "bcb_monitor_roi" in bpy.app.driver_namespace.keys():
+            roiObjs = bpy.app.driver_namespace["bcb_monitor_roi"][0]
+            kinematicOrig = bpy.app.driver_namespace["bcb_monitor_roi"][6]
+            for k, kinematic in kinematicOrig.items():
+                if roiObjs[k].rigid_body != None: roiObjs[k].rigid_body.kinematic = kinematic
+            del bpy.app.driver_namespace["bcb_monitor_roi"]
+
+        # Wait for pending checkpoint to be written
+        if "bcb_monitor_checkpointThread" in bpy.app.driver_namespace.keys():
+            bpy.app.driver_namespace["bcb_monitor_checkpointThread"].join()
+            del bpy.app.driver_namespace["bcb_monitor_checkpointThread"]
+
         # Clear monitor properties
         del bpy.app.driver_namespace["bcb_monitor"]
+        for key in ["bcb_monitor_motion", "bcb_monitor_motionObjs", "bcb_monitor_motionLocs", "bcb_monitor_restCount", "bcb_monitor_restFrame", "bcb_monitor_changed"]:
+            if key in bpy.app.driver_namespace.keys():
+                del bpy.app.driver_namespace[key]
+        if "bcb_monitor_flatConsts" in bpy.app.driver_namespace.keys():
+            del bpy.app.driver_namespace["bcb_monitor_flatConsts"]
+        if "bcb_monitor_baseStepRatio" in bpy.app.driver_namespace.keys():
+            del bpy.app.driver_namespace["bcb_monitor_baseStepRatio"]
+        if "bcb_monitor_weakFactor" in bpy.app.driver_namespace.keys():
+            del bpy.app.driver_namespace["bcb_monitor_weakFactor"]
         if props.timeScalePeriod:
             del bpy.app.driver_namespace["bcb_monitor_originalTimeScale"]
             del bpy.app.driver_namespace["bcb_monitor_originalSolverIterations"]
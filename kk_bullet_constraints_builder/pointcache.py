@@ -0,0 +1,288 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Written within the scope of Inachus FP7 Project (607522):
+# "Technological and Methodological Solutions for Integrated
+# Wide Area Situation Awareness and Survivor Localisation to
+# Support Search and Rescue (USaR) Teams"
+# Versions 1 & 2 were developed at the Laurea University of Applied Sciences,
+# Finland. Later versions are independently developed.
+# Copyright (C) 2015-2018 Kai Kostack
+#
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+################################################################################
+
+### This module has no dependencies to Blender so baked rigid body simulations can be evaluated from a regular Python interpreter:
+### python pointcache.py read <cache folder> [<cache name>] [--start <frame>] [--end <frame>] [--processes <count>]
+### python pointcache.py fixture <cache folder> [<cache name>] [--objects <count>] [--frames <count>] [--compression <0 | 2>]
+
+import sys, os, re, mmap, lzma, struct, concurrent.futures
+import numpy
+
+### Blender point cache file format constants (see blenkernel/intern/pointcache.c)
+bphysMagic = b"BPHYSICS"
+bphysTypeRigidBody = 6
+bphysTypeFlagCompress = 1 <<16
+bphysTypeFlagExtraData = 1 <<17
+bphysTypeMask = 0xffff
+#                   Name          Bit  Data type and components
+bphysDataTypes = [("index",       0, numpy.uint32,  1),
+                  ("location",    1, numpy.float32, 3),
+                  ("velocity",    2, numpy.float32, 3),
+                  ("rotation",    3, numpy.float32, 4),   # Quaternion (w, x, y, z)
+                  ("avelocity",   4, numpy.float32, 3),
+                  ("size",        5, numpy.float32, 1),
+                  ("times",       6, numpy.float32, 3)]
+bphysFilePattern = re.compile(r"^(.*)_(\d{6})_(\d{2})\.bphys$")
+
+################################################################################
+
+def pointcache_getFileName(cacheName, frame, index=0):
+
+    ### Returns the file name Blender uses for a cache frame
+    return "%s_%06d_%02d.bphys" %(cacheName, frame, index)
+
+########################################
+
+def pointcache_listFrames(path, cacheName="", index=0):
+
+    ### Returns a sorted list of (frame, file path) tuples of all cache files in the folder, if no cache name is given the first one found is used
+    try: fileNames = os.listdir(path)
+    except:
+        print('Error: Could not read folder:', path)
+        return []
+    frames = []
+    for fileName in fileNames:
+        match = bphysFilePattern.match(fileName)
+        if match == None or int(match.group(3)) != index: continue
+        if not len(cacheName): cacheName = match.group(1)
+        if match.group(1) != cacheName: continue
+        frames.append((int(match.group(2)), os.path.join(path, fileName)))
+    frames.sort()
+    return frames
+
+########################################
+
+def pointcache_readFrame(pathName):
+
+    ### Memory-maps a cache file and decodes it into a dictionary of arrays {data type name: array [point][components]}
+    try:
+        f = open(pathName, "rb")
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except:
+        print('Error: Could not read file:', pathName)
+        return None
+    f.close()  # The mapping stays valid after closing the file
+    try:
+        if buf[:8] != bphysMagic:
+            print('Error: Not a point cache file:', pathName)
+            return None
+        typeFlag, cntPoints, dataTypes = struct.unpack_from("<III", buf, 8)
+        if typeFlag & bphysTypeMask != bphysTypeRigidBody:
+            print('Error: Not a rigid body point cache file:', pathName)
+            return None
+        types = [dataType for dataType in bphysDataTypes if dataTypes & (1 <<dataType[1])]
+        ofs = 20
+        data = {}
+
+        ### Uncompressed files store the data interleaved per point, so a structured view on the mapping can be used without copying
+        if not typeFlag & bphysTypeFlagCompress:
+            dtype = numpy.dtype([(name, numpy.dtype(typ).newbyteorder("<"), (cnt,)) for name, bit, typ, cnt in types])
+            records = numpy.frombuffer(buf, dtype=dtype, count=cntPoints, offset=ofs)
+            for name, bit, typ, cnt in types:
+                data[name] = numpy.array(records[name])  # Copy so the mapping can be released
+            del records
+
+        ### Compressed files store each data type as a separate block
+        else:
+            for name, bit, typ, cnt in types:
+                size = cntPoints *cnt *numpy.dtype(typ).itemsize
+                mode = buf[ofs]; ofs += 1
+                if mode == 0:
+                    block = buf[ofs:ofs+size]; ofs += size
+                elif mode == 2:
+                    sizeComp = struct.unpack_from("<I", buf, ofs)[0]; ofs += 4
+                    blockComp = buf[ofs:ofs+sizeComp]; ofs += sizeComp
+                    sizeProps = struct.unpack_from("<I", buf, ofs)[0]; ofs += 4
+                    props = buf[ofs:ofs+sizeProps]; ofs += sizeProps
+                    block = pointcache_decompressLZMA(blockComp, props, size)
+                else:
+                    print('Error: LZO compressed point cache is not supported, please use "Heavy" or no compression:', pathName)
+                    return None
+                data[name] = numpy.frombuffer(block, dtype=numpy.dtype(typ).newbyteorder("<"), count=cntPoints *cnt).reshape(cntPoints, cnt).copy()
+    finally:
+        buf.close()
+
+    return data
+
+########################################
+
+def pointcache_decompressLZMA(blockComp, props, size):
+
+    ### Blender writes raw LZMA streams with the 5 property bytes stored separately
+    lc = props[0] %9; lp = (props[0] //9) %5; pb = props[0] //45
+    dictSize = struct.unpack("<I", props[1:5])[0]
+    decomp = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=[{"id": lzma.FILTER_LZMA1, "dict_size": dictSize, "lc": lc, "lp": lp, "pb": pb}])
+    return decomp.decompress(blockComp, max_length=size)
+
+########################################
+
+def pointcache_readRange(path, cacheName="", frameStart=None, frameEnd=None, index=0):
+
+    ### Reads all cache frames within the range into arrays: frames [frame], locations [frame][point][xyz], rotations [frame][point][wxyz]
+    frames = [(frame, pathName) for frame, pathName in pointcache_listFrames(path, cacheName, index)
+              if (frameStart == None or frame >= frameStart) and (frameEnd == None or frame <= frameEnd)]
+    cntPoints = 0
+    datas = []
+    for frame, pathName in frames:
+        data = pointcache_readFrame(pathName)
+        if data == None or "location" not in data: continue
+        cntPoints = max(cntPoints, len(data["location"]))
+        datas.append((frame, data))
+    frameArr = numpy.zeros(len(datas), dtype=numpy.int32)
+    locs = numpy.full((len(datas), cntPoints, 3), numpy.nan, dtype=numpy.float32)
+    rots = numpy.full((len(datas), cntPoints, 4), numpy.nan, dtype=numpy.float32)
+    for i in range(len(datas)):
+        frame, data = datas[i]
+        frameArr[i] = frame
+        # Points not written in a frame are missing (only happens if an index block is present)
+        if "index" in data: idx = data["index"][:, 0]
+        else:               idx = numpy.arange(len(data["location"]))
+        locs[i, idx] = data["location"]
+        if "rotation" in data: rots[i, idx] = data["rotation"]
+    return frameArr, locs, rots
+
+########################################
+
+def pointcache_readParallel(path, cacheName="", frameStart=None, frameEnd=None, processes=None, index=0):
+
+    ### Reads the frame range split into chunks by parallel processes and joins the results
+    frames = [frame for frame, pathName in pointcache_listFrames(path, cacheName, index)
+              if (frameStart == None or frame >= frameStart) and (frameEnd == None or frame <= frameEnd)]
+    if not len(frames): return pointcache_readRange(path, cacheName, frameStart, frameEnd, index)
+    if processes == None: processes = os.cpu_count() or 1
+    cntChunk = max(1, (len(frames) +processes -1) //processes)
+    ranges = [(frames[i], frames[min(i +cntChunk, len(frames)) -1]) for i in range(0, len(frames), cntChunk)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [executor.submit(pointcache_readRange, path, cacheName, start, end, index) for start, end in ranges]
+        results = [future.result() for future in futures]
+    ### Pad chunks to the same point count
+    cntPoints = max([len(result[1][0]) for result in results if len(result[1])] +[0])
+    for i in range(len(results)):
+        frameArr, locs, rots = results[i]
+        if locs.shape[1] < cntPoints:
+            pad = ((0, 0), (0, cntPoints -locs.shape[1]), (0, 0))
+            results[i] = (frameArr, numpy.pad(locs, pad, constant_values=numpy.nan), numpy.pad(rots, pad, constant_values=numpy.nan))
+    return numpy.concatenate([r[0] for r in results]), numpy.concatenate([r[1] for r in results]), numpy.concatenate([r[2] for r in results])
+
+################################################################################
+
+def pointcache_writeFrame(pathName, locs, rots, compression=0):
+
+    ### Writes a rigid body point cache file in the same layout as Blender (used for test fixtures)
+    locs = numpy.asarray(locs, dtype="<f4").reshape(-1, 3)
+    rots = numpy.asarray(rots, dtype="<f4").reshape(-1, 4)
+    cntPoints = len(locs)
+    dataTypes = (1 <<1) | (1 <<3)
+    typeFlag = bphysTypeRigidBody
+    if compression: typeFlag |= bphysTypeFlagCompress
+    try: f = open(pathName, "wb")
+    except:
+        print('Error: Could not write file:', pathName)
+        return
+    f.write(bphysMagic)
+    f.write(struct.pack("<III", typeFlag, cntPoints, dataTypes))
+    if not compression:
+        records = numpy.empty(cntPoints, dtype=[("location", "<f4", (3,)), ("rotation", "<f4", (4,))])
+        records["location"] = locs; records["rotation"] = rots
+        f.write(records.tobytes())
+    else:
+        for block in (locs.tobytes(), rots.tobytes()):
+            comp = lzma.LZMACompressor(format=lzma.FORMAT_RAW, filters=[{"id": lzma.FILTER_LZMA1, "dict_size": 1 <<16, "lc": 3, "lp": 0, "pb": 2}])
+            blockComp = comp.compress(block) +comp.flush()
+            if len(blockComp) >= len(block):
+                f.write(struct.pack("<B", 0)); f.write(block)
+            else:
+                props = struct.pack("<BI", (2 *5 +0) *9 +3, 1 <<16)
+                f.write(struct.pack("<BI", 2, len(blockComp))); f.write(blockComp)
+                f.write(struct.pack("<I", len(props))); f.write(props)
+    f.close()
+
+########################################
+
+def pointcache_writeFixture(path, cacheName="RigidBodyWorld", cntObjs=100, frameStart=1, frameEnd=100, fps=25, compression=0, seed=0):
+
+    ### Writes a synthetic cache of objects falling and spinning from a grid onto the ground, returns the exact locations for comparison
+    if not os.path.exists(path): os.makedirs(path)
+    rnd = numpy.random.RandomState(seed)
+    side = int(numpy.ceil(cntObjs **(1 /3)))
+    grid = numpy.indices((side, side, side)).reshape(3, -1).T[:cntObjs].astype(numpy.float32)
+    locStart = grid *2 +numpy.array((0, 0, 1), dtype=numpy.float32)
+    angVel = rnd.uniform(-3, 3, (cntObjs, 3)).astype(numpy.float32)
+    locsAll = []
+    for frame in range(frameStart, frameEnd +1):
+        t = (frame -frameStart) /fps
+        locs = locStart.copy()
+        locs[:, 2] = numpy.maximum(locStart[:, 2] -9.81 /2 *t *t, 0)
+        angle = numpy.linalg.norm(angVel, axis=1) *t
+        axis = angVel /numpy.maximum(numpy.linalg.norm(angVel, axis=1), 1e-6)[:, None]
+        rots = numpy.concatenate([numpy.cos(angle /2)[:, None], axis *numpy.sin(angle /2)[:, None]], axis=1)
+        pointcache_writeFrame(os.path.join(path, pointcache_getFileName(cacheName, frame)), locs, rots, compression)
+        locsAll.append(locs)
+    return numpy.array(locsAll)
+
+################################################################################
+
+def pointcache_main(argv):
+
+    if len(argv) < 2 or argv[0] not in ("read", "fixture"):
+        print("Usage: python pointcache.py read <cache folder> [<cache name>] [--start <frame>] [--end <frame>] [--processes <count>]")
+        print("       python pointcache.py fixture <cache folder> [<cache name>] [--objects <count>] [--frames <count>] [--compression <0 | 2>]")
+        return 1
+    path = argv[1]
+    cacheName = ""
+    frameStart = None; frameEnd = None; processes = None
+    cntObjs = 100; cntFrames = 100; compression = 0
+    i = 2
+    while i < len(argv):
+        if   argv[i] == "--start":       i += 1; frameStart = int(argv[i])
+        elif argv[i] == "--end":         i += 1; frameEnd = int(argv[i])
+        elif argv[i] == "--processes":   i += 1; processes = int(argv[i])
+        elif argv[i] == "--objects":     i += 1; cntObjs = int(argv[i])
+        elif argv[i] == "--frames":      i += 1; cntFrames = int(argv[i])
+        elif argv[i] == "--compression": i += 1; compression = int(argv[i])
+        else: cacheName = argv[i]
+        i += 1
+    if argv[0] == "fixture":
+        pointcache_writeFixture(path, cacheName or "RigidBodyWorld", cntObjs, 1, cntFrames, compression=compression)
+        print("Fixture written to:", path)
+        return 0
+    frameArr, locs, rots = pointcache_readParallel(path, cacheName, frameStart, frameEnd, processes)
+    if not len(frameArr):
+        print("No cache frames found.")
+        return 1
+    print("Frames: %d - %d (%d), objects: %d" %(frameArr[0], frameArr[-1], len(frameArr), locs.shape[1]))
+    disp = numpy.linalg.norm(locs[-1] -locs[0], axis=1)
+    print("Displacement first to last frame: max %0.6f, mean %0.6f" %(numpy.nanmax(disp), numpy.nanmean(disp)))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(pointcache_main(sys.argv[1:]))
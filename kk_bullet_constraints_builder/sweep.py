@@ -0,0 +1,210 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Written within the scope of Inachus FP7 Project (607522):
+# "Technological and Methodological Solutions for Integrated
+# Wide Area Situation Awareness and Survivor Localisation to
+# Support Search and Rescue (USaR) Teams"
+# Versions 1 & 2 were developed at the Laurea University of Applied Sciences,
+# Finland. Later versions are independently developed.
+# Copyright (C) 2015-2018 Kai Kostack
+#
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+################################################################################
+
+### This module has no dependencies to Blender so scenario sweeps can be orchestrated from a regular Python interpreter:
+### python sweep.py <manifest.json> [--blender <path to Blender executable> | --stub] [--processes <count>]
+
+import sys, os, json, time, random, itertools, subprocess, concurrent.futures
+
+sweepManifestName = "sweep.json"       # Name of the manifest file describing all scenarios of a sweep
+sweepSummaryName = "sweep_summary.csv" # Name of the summary table written after all scenarios are finished
+sweepTelemetryName = "telemetry.csv"   # Name of the telemetry file written into each scenario folder
+
+################################################################################
+
+def sweep_expandGrid(grid):
+
+    ### Expands a parameter grid {name: [values, ...], ...} into a list of parameter dictionaries (cartesian product)
+    names = sorted(grid.keys())
+    scenarios = []
+    for values in itertools.product(*[grid[name] for name in names]):
+        scenarios.append(dict(zip(names, values)))
+    return scenarios
+
+########################################
+
+def sweep_runScenario(runner, scenario, manifest):
+
+    ### Wrapper for a single scenario run to be executed in a pool process
+    # Remove telemetry of earlier runs so a failed re-run can't report stale results
+    telemetryPath = os.path.join(scenario["dir"], sweepTelemetryName)
+    if os.path.isfile(telemetryPath): os.remove(telemetryPath)
+    time_start = time.time()
+    try: error = runner(scenario, manifest)
+    except Exception as e: error = str(e)
+    result = {"name": scenario["name"], "params": scenario["params"], "time": time.time() -time_start, "error": error}
+    result.update(sweep_readTelemetry(telemetryPath))
+    return result
+
+########################################
+
+def sweep_run(manifestPath, runner, processes=None, blenderPath=None):
+
+    ### Runs all scenarios of a manifest in parallel processes and writes a summary table
+    try: f = open(manifestPath, "r")
+    except:
+        print('Error: Could not read file:', manifestPath)
+        return None
+    manifest = json.load(f)
+    f.close()
+    # Blender path given on the command line overrides the manifest (only in memory, the manifest file stays untouched)
+    if blenderPath: manifest["blenderPath"] = blenderPath
+    
+    scenarios = manifest["scenarios"]
+    print("Running %d scenarios..." %len(scenarios))
+    time_start = time.time()
+    results = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(sweep_runScenario, runner, scenario, manifest) for scenario in scenarios]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            if result["error"]: print("Scenario %s failed: %s" %(result["name"], result["error"]))
+            else: print("Scenario %s done (%0.2f s)" %(result["name"], result["time"]))
+            results.append(result)
+    results.sort(key=lambda result: result["name"])
+
+    ###### Function
+    summaryPath = os.path.join(os.path.dirname(manifestPath), sweepSummaryName)
+    sweep_writeSummary(results, summaryPath)
+    print('-- Time total: %0.2f s' %(time.time()-time_start))
+    return results
+
+################################################################################
+
+def sweep_blenderRunner(scenario, manifest):
+
+    ### Runs the scenario in a background Blender process, the add-on needs to be installed for that Blender version
+    blenderPath = manifest["blenderPath"]
+    # Failures inside Blender have to be turned into a non-zero exit code, otherwise Blender always returns 0
+    expr = "import sys, tools; sys.exit(1) if tools.tool_runScenario(%r) else None" %scenario["dir"]
+    command = [blenderPath, "-b", manifest["blend"], "--addons", "kk_bullet_constraints_builder", "--python-exit-code", "1", "--python-expr", expr]
+    try: f = open(os.path.join(scenario["dir"], "blender.log"), "w")
+    except: return "Could not write log file"
+    p = subprocess.run(command, stdout=f, stderr=subprocess.STDOUT)
+    f.close()
+    if p.returncode != 0: return "Blender returned with code %d" %p.returncode
+    return None
+
+########################################
+
+def sweep_stubRunner(scenario, manifest):
+
+    ### Simulates a bake without Blender by writing plausible telemetry data, used for testing the orchestration
+    rnd = random.Random(json.dumps(scenario["params"], sort_keys=True))
+    connectCnt = manifest.get("connectCnt", 1000)
+    intact = connectCnt; broken = 0
+    try: f = open(os.path.join(scenario["dir"], sweepTelemetryName), "w")
+    except: return "Could not write telemetry file"
+    f.write("Frame; Time; Intact; Plastic; Broken; DispMax; DispMean; VeloMax; Energy\n")
+    for frame in range(manifest["frameStart"] +1, manifest["frameEnd"] +1):
+        cnt = min(intact, int(rnd.expovariate(1) *connectCnt *.002))
+        intact -= cnt; broken += cnt
+        dispMax = rnd.random() *.01 *(1 +cnt)
+        f.write("%d; %0.4f; %d; %d; %d; %0.6f; %0.6f; %0.6f; %0.6f\n" %(frame, rnd.random() *.01, intact, 0, broken, dispMax, dispMax /4, dispMax *25, dispMax *100))
+    f.close()
+    return None
+
+################################################################################
+
+def sweep_readTelemetry(pathName):
+
+    ### Aggregates the per-frame telemetry table of a scenario into a few key values
+    summary = {"frames": 0, "bakeTime": 0, "intact": 0, "plastic": 0, "broken": 0, "dispMax": 0}
+    try: f = open(pathName, "r")
+    except: return summary
+    header = [name.strip() for name in f.readline().split(";")]
+    try:
+        iTime = header.index("Time"); iIntact = header.index("Intact"); iPlastic = header.index("Plastic")
+        iBroken = header.index("Broken"); iDispMax = header.index("DispMax")
+    except:
+        f.close(); return summary
+    for line in f:
+        values = line.split(";")
+        if len(values) < len(header): continue
+        summary["frames"] += 1
+        summary["bakeTime"] += float(values[iTime])
+        summary["intact"] = int(float(values[iIntact]))
+        summary["plastic"] = int(float(values[iPlastic]))
+        summary["broken"] = int(float(values[iBroken]))
+        summary["dispMax"] = max(summary["dispMax"], float(values[iDispMax]))
+    f.close()
+    return summary
+
+########################################
+
+def sweep_writeSummary(results, pathName):
+
+    ### Writes one line per scenario with its parameters and aggregated telemetry values
+    paramNames = []
+    for result in results:
+        for name in result["params"].keys():
+            if name not in paramNames: paramNames.append(name)
+    columns = ["Scenario"] +paramNames +["Frames", "Bake Time", "Intact", "Plastic", "Broken", "DispMax", "Status"]
+    try: f = open(pathName, "w")
+    except:
+        print('Error: Could not write file:', pathName)
+        return
+    f.write("; ".join(columns) +"\n")
+    print("; ".join(columns))
+    for result in results:
+        line = [result["name"]] +[str(result["params"].get(name, "")) for name in paramNames]
+        line += ["%d" %result["frames"], "%0.2f" %result["bakeTime"], "%d" %result["intact"], "%d" %result["plastic"], "%d" %result["broken"], "%0.6f" %result["dispMax"]]
+        if result["error"]: line.append("Error: " +result["error"])
+        else: line.append("OK")
+        f.write("; ".join(line) +"\n")
+        print("; ".join(line))
+    f.close()
+    print("Summary written to:", pathName)
+
+################################################################################
+
+def sweep_main(argv):
+
+    if len(argv) < 1:
+        print("Usage: python sweep.py <manifest.json> [--blender <path to Blender executable> | --stub] [--processes <count>]")
+        return 1
+    manifestPath = argv[0]
+    runner = sweep_blenderRunner
+    processes = None
+    blenderPath = None
+    i = 1
+    while i < len(argv):
+        if argv[i] == "--stub": runner = sweep_stubRunner
+        elif argv[i] == "--processes": i += 1; processes = int(argv[i])
+        elif argv[i] == "--blender": i += 1; blenderPath = argv[i]
+        i += 1
+    results = sweep_run(manifestPath, runner, processes, blenderPath)
+    if results == None: return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(sweep_main(sys.argv[1:]))
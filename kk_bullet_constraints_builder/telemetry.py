@@ -0,0 +1,172 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Written within the scope of Inachus FP7 Project (607522):
+# "Technological and Methodological Solutions for Integrated
+# Wide Area Situation Awareness and Survivor Localisation to
+# Support Search and Rescue (USaR) Teams"
+# Versions 1 & 2 were developed at the Laurea University of Applied Sciences,
+# Finland. Later versions are independently developed.
+# Copyright (C) 2015-2018 Kai Kostack
+#
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+
+################################################################################
+
+import bpy, sys, os, time, array, json, struct, threading, collections
+mem = bpy.app.driver_namespace
+
+### Import submodules
+from global_vars import *      # Contains global variables
+
+################################################################################
+
+def telemetry_getSettings():
+
+    ### Returns telemetry format and file path, these can be overridden for external scenario runs
+    if "bcb_telemetry_settings" in mem.keys():
+        return mem["bcb_telemetry_settings"]
+    return telemetryFormat, os.path.join(logPath, "bcb-telemetry." +telemetryFormat)
+
+########################################
+
+def telemetry_init(scene, connects):
+
+    if debug: print("Calling telemetry_init")
+
+    telemetryFormat, pathName = telemetry_getSettings()
+    if telemetryFormat not in {"csv", "jsonl", "bin"}:
+        print("Warning: Unknown telemetry format '%s', telemetry disabled." %telemetryFormat)
+        return
+
+    elemGrps = mem["elemGrps"]
+    try: objsEGrp = scene["bcb_objsEGrp"]
+    except: objsEGrp = []; print("Error: bcb_objsEGrp property not found, telemetry disabled."); return
+
+    ### Precompute element group index for every monitored connection (group of the first element is used)
+    connectsEGrp = array.array('i', [objsEGrp[connect[0][1]] for connect in connects])
+
+    ### Column names of a record
+    columns = ["Frame", "Time", "Intact", "Plastic", "Broken", "DispMax", "DispMean", "VeloMax", "Energy"]
+    for elemGrp in elemGrps:
+        name = elemGrp[EGSidxName]
+        if not len(name): name = "Default"
+        columns.extend([name +" Intact", name +" Plastic", name +" Broken"])
+
+    ### Create new file and write header if required
+    try: f = open(pathName, "w")
+    except:
+        print('Error: Could not write file:', pathName)
+        return
+    if telemetryFormat == "csv":
+        f.write("; ".join(columns) +"\n")
+    f.close()
+    print("Telemetry recording to:", pathName)
+
+    #                       0             1        2         3 (ring buffer)                                    4 (writer thread)  5 (dropped records)  6
+    mem["bcb_telemetry"] = [connectsEGrp, columns, pathName, collections.deque(maxlen=telemetryBufferSize), None, 0, telemetryFormat]
+
+########################################
+
+def telemetry_record(scene, connects, timeStep, motion):
+
+    ### Gathers one record per frame, the file writing is done asynchronously in larger chunks
+    if not "bcb_telemetry" in mem.keys(): return
+    telemetry = mem["bcb_telemetry"]
+    connectsEGrp = telemetry[0]
+    elemGrpCnt = len(mem["elemGrps"])
+
+    ### Count connection states per element group (0 = intact, 1 = plastic, 2+ = broken)
+    counts = [0] *(elemGrpCnt *3)
+    for k, connect in zip(connectsEGrp, connects):
+        conMode = connect[12]
+        if conMode > 2: conMode = 2
+        counts[k *3 +conMode] += 1
+    totals = [sum(counts[0::3]), sum(counts[1::3]), sum(counts[2::3])]
+
+    if motion != None: dispMax, veloMax, energy, dispMean = motion
+    else: dispMax = veloMax = energy = dispMean = 0
+
+    buffer = telemetry[3]
+    if len(buffer) == buffer.maxlen: telemetry[5] += 1  # Oldest record gets overwritten
+    buffer.append([scene.frame_current, timeStep] +totals +[dispMax, dispMean, veloMax, energy] +counts)
+
+    if len(buffer) >= telemetryFlushInterval:
+        ###### Function
+        telemetry_flush()
+
+########################################
+
+def telemetry_flush(qWait=0):
+
+    if not "bcb_telemetry" in mem.keys(): return
+    telemetry = mem["bcb_telemetry"]
+    thread = telemetry[4]
+
+    ### Don't stall the frame handler if the previous chunk is still being written, the ring buffer keeps collecting meanwhile
+    if thread != None and thread.is_alive():
+        if qWait: thread.join()
+        else: return
+    buffer = telemetry[3]
+    if len(buffer):
+        records = list(buffer)
+        buffer.clear()
+        thread = telemetry[4] = threading.Thread(target=telemetry_writeRecords, args=(records, telemetry[1], telemetry[2], telemetry[6]))
+        thread.start()
+    if qWait and thread != None: thread.join()
+
+########################################
+
+def telemetry_writeRecords(records, columns, pathName, telemetryFormat):
+
+    try: f = open(pathName, "ab")
+    except:
+        print('Error: Could not write file:', pathName)
+        return
+    if telemetryFormat == "csv":
+        for record in records:
+            f.write(("; ".join([str(val) for val in record]) +"\n").encode())
+    elif telemetryFormat == "jsonl":
+        for record in records:
+            f.write((json.dumps(dict(zip(columns, record))) +"\n").encode())
+    elif telemetryFormat == "bin":
+        ### Columnar chunk: record count, column count, column names as JSON and then every column as float64 array
+        names = json.dumps(columns).encode()
+        f.write(struct.pack("<4sIII", b"BCBT", len(records), len(columns), len(names)))
+        f.write(names)
+        for i in range(len(columns)):
+            column = array.array('d', [record[i] for record in records])
+            if sys.byteorder != 'little': column.byteswap()  # Columns are always stored little-endian like the header
+            column.tofile(f)
+    f.close()
+
+########################################
+
+def telemetry_close():
+
+    if debug: print("Calling telemetry_close")
+
+    if not "bcb_telemetry" in mem.keys(): return
+    ###### Write remaining records
+    telemetry_flush(qWait=1)
+    telemetry = mem["bcb_telemetry"]
+    if telemetry[5] > 0:
+        print("Warning: %d telemetry records were dropped because the writer couldn't keep up, consider increasing telemetryBufferSize." %telemetry[5])
+    del mem["bcb_telemetry"]
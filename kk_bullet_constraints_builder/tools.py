@@ -30,7 +30,7 @@
 
 ################################################################################
 
-import bpy, bmesh, os, array
+import bpy, bmesh, os, time, array, json, struct, threading, queue, collections, numpy
 from mathutils import Vector
 from mathutils import Color
 mem = bpy.app.driver_namespace
@@ -39,6 +39,12 @@ mem = bpy.app.driver_namespace
 from global_vars import *      # Contains global variables
 from builder_prep import *     # Contains preparation steps functions called by the builder
 from file_io import *          # Contains file input & output functions
+from dispatcher import *       # Contains unified frame change event handler dispatcher
+from builder import *          # Contains constraints builder function
+from monitor import *          # Contains baking monitor event handler
+from telemetry import *        # Contains telemetry recorder for the baking monitor
+from sweep import *            # Contains scenario sweep orchestration functions (independent from Blender)
+from pointcache import *       # Contains rigid body point cache file reader (independent from Blender)
 
 import kk_import_motion_from_text_file    # Contains earthquake motion import function
 import kk_mesh_fracture                   # Contains boolean based discretization function
@@ -1295,12 +1301,8 @@ def tool_groundMotion(scene):
 
 def stopPlaybackAndReturnToStart(scene):
 
-    try: bpy.app.handlers.frame_change_pre.remove(tool_exportLocationHistory_eventHandler)
-    except: pass
-    else: print("Removed event handler: tool_exportLocationHistory_eventHandler")
-    try: bpy.app.handlers.frame_change_pre.remove(tool_exportForceHistory_eventHandler)
-    except: pass
-    else: print("Removed event handler: tool_exportForceHistory_eventHandler")
+    dispatcher_unregister(tool_exportLocationHistory_eventHandler)
+    dispatcher_unregister(tool_exportForceHistory_eventHandler)
     if bpy.context.screen.is_animation_playing:
         bpy.ops.screen.animation_play()           # Stop animation playback
     scene.frame_current = scene.frame_start  # Reset to start frame
@@ -1308,6 +1310,29 @@ def stopPlaybackAndReturnToStart(scene):
 
 ########################################
 
+def tool_exportLocationHistory_getObjects(scene, name):
+
+    ### Returns list of objects to be tracked: all objects of a group with the given name, the object with the given name or the current selection if no name is given
+    qFM = hasattr(bpy.types.DATA_PT_modifiers, 'FRACTURE') and asciiExportName in scene.objects
+
+    ### Official Blender
+    if not qFM:
+        if not len(name):
+            return [obj for obj in scene.objects if obj.select and obj.type == 'MESH']
+        if name in bpy.data.groups:
+            return [obj for obj in bpy.data.groups[name].objects if obj.name in scene.objects]
+        try: return [scene.objects[name]]
+        except: return []
+
+    ### Fracture Modifier
+    else:
+        md = scene.objects[asciiExportName].modifiers["Fracture"]
+        if not len(name): return [ob for ob in md.mesh_islands]
+        try: return [md.mesh_islands[name]]
+        except: return []
+
+########################################
+
 def tool_exportLocationHistory_eventHandler(scene):
     
     ### Vars
@@ -1316,67 +1341,54 @@ def tool_exportLocationHistory_eventHandler(scene):
     props = bpy.context.window_manager.bcb
     filenamePath = props.postprocTools_lox_nam
     logPath = filenamePath
-    name = props.postprocTools_lox_elm
+    qFM = hasattr(bpy.types.DATA_PT_modifiers, 'FRACTURE') and asciiExportName in scene.objects
 
-    ###### Get data
-
-    ### Official Blender
-    if not hasattr(bpy.types.DATA_PT_modifiers, 'FRACTURE') or not asciiExportName in scene.objects:
-        try: ob = scene.objects[name]
-        except:
-            print('Error: Defined object not found. Removing event handler.')
-            stopPlaybackAndReturnToStart(scene); return
-        else:
-            data = ob.matrix_world.to_translation()  # Get actual Bullet object's position as .location only returns its simulation starting position
-
-    ### Fracture Modifier
-    else:
-        try: ob = scene.objects[asciiExportName]
-        except:
-            print('Error: Fracture Modifier object not found. Removing event handler.')
+    ###### On first run
+    if "log_lox" not in bpy.app.driver_namespace.keys():
+        ###### Get objects
+        objs = tool_exportLocationHistory_getObjects(scene, props.postprocTools_lox_elm)
+        if not len(objs):
+            print('Error: Defined object(s) not found. Removing event handler.')
             stopPlaybackAndReturnToStart(scene); return
-        else:
-            md = ob.modifiers["Fracture"]
-            try: ob = md.mesh_islands[name]
+        print("Tracking %d objects." %len(objs))
+        objNames = [obj.name for obj in objs]
+
+        pathName = None
+        if len(filenamePath):
+            # Stupid Windows interprets "Con." in path as system variable and writes into console
+            if len(objNames) == 1: filename = removeBadCharsFromFilename(objNames[0].replace(".", "_"))
+            else:                  filename = "Location_History"
+            if locHistoryFormat == "bin": filename += ".bin"
+            else:                         filename += ".csv"
+            pathName = os.path.join(logPath, filename)
+            print("Creating file:", pathName)
+            # Create new log file and write header
+            try: f = open(pathName, "wb")
             except:
-                print('Error: Defined object not found. Removing event handler.')
+                print('Error: Could not open file.')
                 stopPlaybackAndReturnToStart(scene); return
+            if locHistoryFormat == "bin":
+                ### Binary columnar file: header with object names as JSON followed by chunks (see tool_exportLocationHistory_writeChunk)
+                names = json.dumps(objNames).encode()
+                f.write(struct.pack("<4sIII", b"BCBL", logMode, len(objNames), len(names)))
+                f.write(names)
+            elif len(objNames) == 1:
+                f.write(("Time; X; Y; Z; RW; RX; RY; RZ; Name: %s\n" %objNames[0]).encode("CP850","replace"))
             else:
-                data = ob.rigidbody.location.copy()  # Get actual Bullet object's position as .location only returns its simulation starting position
-    
-    # If filepath is empty then print data into console
-    if len(filenamePath) == 0:
-        print("Data:", data)
-
-    else:
-
-        ###### Export data
-        
-        ### On first run
-        if "log_files_open" not in bpy.app.driver_namespace.keys():
-            # Create object list of selected objects
-            objNames = [name]
-            if len(objNames) > 0:
-                bpy.app.driver_namespace["log_objNames"] = objNames
-            files = []
-            for objName in objNames:
-                # Stupid Windows interprets "Con." in path as system variable and writes into console
-                filename = removeBadCharsFromFilename(objName.replace(".", "_")) +".csv"
-                filename = os.path.join(logPath, filename)
-                print("Creating file:", filename)
-                # Remove old log file at start frame
-                try: os.remove(filename)
-                except: pass
-                # Create new log file
-                try: f = open(filename, "w")
-                except:
-                    print('Error: Could not open file.')
-                    stopPlaybackAndReturnToStart(scene); return
-                else:
-                    line = "Time; X; Y; Z; Name: %s\n" %objName.encode("CP850","replace").decode("CP850")
-                    f.write(line)
-                    files.append(f)
-            bpy.app.driver_namespace["log_files_open"] = files
+                f.write("Time; Name; X; Y; Z; RW; RX; RY; RZ\n".encode())
+            f.close()
+
+        # The writer thread must not access bpy, so settings are handed over in its state dict
+        state = {"logMode":logMode, "fps":scene.render.fps}
+        # Chunks are handed over through a queue so a slow writer never stalls the frame handler, written frame buffers go back into the pool for reuse
+        chunks = queue.Queue()
+        pool = collections.deque()
+        if pathName != None:
+            thread = threading.Thread(target=tool_exportLocationHistory_writer, args=(chunks, pool, objNames, pathName, state))
+            thread.start()
+        else: thread = None
+        #                                             0     1         2         3 (frame chunk)  4 (writer thread)  5 (writer state)  6 (chunk queue)  7 (buffer pool)
+        bpy.app.driver_namespace["log_lox"] = [objs, objNames, pathName, [], thread, state, chunks, pool]
 
     ### Check if last frame is reached
     if scene.frame_current == scene.frame_end:
@@ -1385,65 +1397,126 @@ def tool_exportLocationHistory_eventHandler(scene):
 
     ### If animation playback has stopped (can also be done by user) then unload the event handler and free all monitor data
     if not bpy.context.screen.is_animation_playing:
-        try: bpy.app.handlers.frame_change_pre.remove(tool_exportLocationHistory_eventHandler)
-        except: pass
-        else: print("Removed event handler: tool_exportLocationHistory_eventHandler")
+        dispatcher_unregister(tool_exportLocationHistory_eventHandler)
         scene.frame_current == scene.frame_start  # Reset to start frame
-        ### Close log files
-        try: files = bpy.app.driver_namespace["log_files_open"]
-        except: pass
-        else:
-            for f in files: f.close()
-        ### Delete keys
-        keys = [key for key in bpy.app.driver_namespace.keys()]
-        for key in keys:
-            if "log_" in key:
-                del bpy.app.driver_namespace[key]
+        ###### Write remaining data and wait for writer thread
+        tool_exportLocationHistory_flush(qWait=1)
+        ### Delete only own keys, other consumers stopping on the same frame still need theirs for their clean up
+        del bpy.app.driver_namespace["log_lox"]
         bpy.context.screen.scene = scene  # Hack to update other event handlers once again to finish their clean up
         return
 
-    if len(filenamePath):
-
-        ### For every frame
-        if "log_objNames" in bpy.app.driver_namespace.keys():
-            objNames = bpy.app.driver_namespace["log_objNames"]
-            files = bpy.app.driver_namespace["log_files_open"]
-            time = (scene.frame_current -scene.frame_start -1) /scene.render.fps
-
-            for k in range(len(objNames)):
-                objName = objNames[k]
-                loc = data
-                #if obj.parent != None:
-                #    loc = loc *obj.parent.matrix_world
-
-                if logMode == 0:
-                    data = loc
-                elif logMode == 1:
-                    if "log_loc_start_" +objName not in bpy.app.driver_namespace.keys():
-                        bpy.app.driver_namespace["log_loc_start_" +objName] = loc
-                        loc = Vector((0, 0, 0))
-                    else:
-                        loc -= bpy.app.driver_namespace["log_loc_start_" +objName]
-                    data = loc
-                if logMode >= 2:
-                    if "log_loc_" +objName not in bpy.app.driver_namespace.keys():
-                        bpy.app.driver_namespace["log_loc_" +objName] = loc
-                        vel = Vector((0, 0, 0))
-                    else:
-                        vel = (bpy.app.driver_namespace["log_loc_" +objName] -loc) *scene.render.fps
-                        bpy.app.driver_namespace["log_loc_" +objName] = loc
-                    data = vel
-                if logMode == 3:
-                    if "log_vel_" +objName not in bpy.app.driver_namespace.keys():
-                        bpy.app.driver_namespace["log_vel_" +objName] = vel
-                        accel = Vector((0, 0, 0))
+    ### For every frame
+    objs, objNames, pathName, chunk = bpy.app.driver_namespace["log_lox"][:4]
+    pool = bpy.app.driver_namespace["log_lox"][7]
+    time = (scene.frame_current -scene.frame_start -1) /scene.render.fps
+
+    ### Capture locations and rotations into a frame buffer from the pool (x, y, z, rw, rx, ry, rz per object)
+    try: data = pool.pop()
+    except IndexError: data = array.array('d', bytes(8 *7 *len(objs)))
+    if not qFM:
+        snapshot = dispatcher_getSnapshot(scene)
+        for i in range(len(objs)):
+            loc, rot = dispatcher_getTransform(snapshot, objs[i])  # Get actual Bullet object's position as .location only returns its simulation starting position
+            j = i *7
+            data[j] = loc[0]; data[j+1] = loc[1]; data[j+2] = loc[2]
+            data[j+3] = rot[0]; data[j+4] = rot[1]; data[j+5] = rot[2]; data[j+6] = rot[3]
+    else:
+        for i in range(len(objs)):
+            rb = objs[i].rigidbody
+            loc = rb.location; rot = rb.rotation
+            j = i *7
+            data[j] = loc[0]; data[j+1] = loc[1]; data[j+2] = loc[2]
+            data[j+3] = rot[0]; data[j+4] = rot[1]; data[j+5] = rot[2]; data[j+6] = rot[3]
+
+    # If filepath is empty then print data into console
+    if pathName == None:
+        for i in range(len(objs)):
+            print("Data:", objNames[i], data[i*7:i*7+3])
+        pool.append(data)
+        return
+
+    chunk.append((time, data))
+    if len(chunk) >= locHistoryChunkSize:
+        ###### Function
+        tool_exportLocationHistory_flush()
+
+########################################
+
+def tool_exportLocationHistory_flush(qWait=0):
+
+    ### Hands the collected frames over to the background writer thread (the queue keeps them in order without waiting)
+    if "log_lox" not in bpy.app.driver_namespace.keys(): return
+    lox = bpy.app.driver_namespace["log_lox"]
+    if len(lox[3]) and lox[2] != None:
+        lox[6].put(lox[3])
+        lox[3] = []
+    ### Stop writer thread after all queued chunks are written
+    if qWait and lox[4] != None:
+        lox[6].put(None)
+        lox[4].join()
+        lox[4] = None
+
+########################################
+
+def tool_exportLocationHistory_writer(chunks, pool, objNames, pathName, state):
+
+    ### Writes queued chunks in order until None is received and returns the frame buffers into the pool
+    while 1:
+        chunk = chunks.get()
+        if chunk == None: break
+        tool_exportLocationHistory_writeChunk(chunk, objNames, pathName, state)
+        for time, data in chunk: pool.append(data)
+
+########################################
+
+def tool_exportLocationHistory_writeChunk(chunk, objNames, pathName, state):
+
+    logMode = state["logMode"]
+    fps = state["fps"]
+
+    ### Derive relative locations, velocities or accelerations from absolute locations
+    if logMode > 0:
+        for time, data in chunk:
+            if "start" not in state:
+                state["start"] = data[:]
+                state["loc"] = data[:]
+                state["vel"] = array.array('d', bytes(len(data) *8))
+            start = state["start"]; locLast = state["loc"]; velLast = state["vel"]
+            loc = data[:]
+            for i in range(0, len(data), 7):
+                for j in range(i, i+3):
+                    if logMode == 1: data[j] = loc[j] -start[j]
                     else:
-                        accel = (bpy.app.driver_namespace["log_vel_" +objName] -vel) *scene.render.fps
-                        bpy.app.driver_namespace["log_vel_" +objName] = vel
-                    data = accel
+                        vel = (locLast[j] -loc[j]) *fps
+                        if logMode == 2: data[j] = vel
+                        else: data[j] = (velLast[j] -vel) *fps
+                        velLast[j] = vel
+            state["loc"] = loc
 
-                line = "%0.4f; %0.6f; %0.6f; %0.6f\n" %(time, data[0], data[1], data[2])
-                files[k].write(line)
+    try: f = open(pathName, "ab")
+    except:
+        print('Error: Could not write file:', pathName)
+        return
+    if locHistoryFormat == "bin":
+        ### Chunk: frame count, times as float64 and then 7 columns (x, y, z, rw, rx, ry, rz) as float32 arrays [frame][object]
+        f.write(struct.pack("<4sI", b"CHNK", len(chunk)))
+        array.array('d', [time for time, data in chunk]).tofile(f)
+        for k in range(7):
+            column = array.array('f')
+            for time, data in chunk: column.extend(data[k::7])
+            column.tofile(f)
+    else:
+        lines = []
+        for time, data in chunk:
+            if len(objNames) == 1:
+                lines.append("%0.4f; %0.6f; %0.6f; %0.6f; %0.6f; %0.6f; %0.6f; %0.6f\n" %((time,) +tuple(data[:7])))
+                continue
+            for i in range(len(objNames)):
+                j = i *7
+                lines.append("%0.4f; %s; %0.6f; %0.6f; %0.6f; %0.6f; %0.6f; %0.6f; %0.6f\n" %((time, objNames[i]) +tuple(data[j:j+7])))
+        f.write("".join(lines).encode("CP850","replace"))
+    f.close()
 
 ########################################
 
@@ -1456,18 +1529,19 @@ def tool_exportLocationHistory(scene):
     except: pass
 
     print('Init location export event handler.')
-    bpy.app.handlers.frame_change_pre.append(tool_exportLocationHistory_eventHandler)
+    dispatcher_register(tool_exportLocationHistory_eventHandler)
     # Start animation playback
     if not bpy.context.screen.is_animation_playing:
         bpy.ops.screen.animation_play()
 
 ################################################################################
 
-def tool_constraintForce_getData(scene, name):
+def tool_constraintForce_getHandles(scene, name, qStop=1):
     
-    props = bpy.context.window_manager.bcb
-
-    ###### Get data
+    ### Resolves the constraints belonging to a connection, this is done only once per connection and then kept in an index
+    ### (with qStop=0 a missing connection only returns None instead of stopping playback, so callers can skip it)
+    index = bpy.app.driver_namespace.setdefault("log_consIndex", {})
+    if name in index: return index[name]
 
     ### Official Blender
     if not hasattr(bpy.types.DATA_PT_modifiers, 'FRACTURE') or not asciiExportName in scene.objects:
@@ -1476,10 +1550,12 @@ def tool_constraintForce_getData(scene, name):
         except:
             try: ob = scene.objects[name]
             except:
+                if not qStop: return None
                 print('Error: Defined object not found. Removing event handler.')
                 stopPlaybackAndReturnToStart(scene); return None
         try: cons = [ob.rigid_body_constraint]
         except:
+            if not qStop: return None
             print('Error: Defined object no constraint. Removing event handler.')
             stopPlaybackAndReturnToStart(scene); return None
         else:
@@ -1505,6 +1581,7 @@ def tool_constraintForce_getData(scene, name):
             except:
                 try: cons = [md.mesh_constraints[name]]
                 except:
+                    if not qStop: return None
                     print('Error: Defined object not found. Removing event handler.')
                     stopPlaybackAndReturnToStart(scene); return None
             ### Try to find more constraints for the connection
@@ -1515,7 +1592,18 @@ def tool_constraintForce_getData(scene, name):
                 try: cons.append(md.mesh_constraints[nameNew])
                 except: qEnd = 1
 
-    try: data = [con.appliedImpulse() for con in cons]
+    index[name] = cons
+    return cons
+
+########################################
+
+def tool_constraintForce_getData(scene, name):
+    
+    ###### Get data
+    cons = tool_constraintForce_getHandles(scene, name)
+    if cons == None: return None
+
+    try: data = numpy.fromiter((con.appliedImpulse() for con in cons), dtype=numpy.float64, count=len(cons))
     except:
         print("Error: Data could not be read, Blender version with Fracture Modifier required!")
         stopPlaybackAndReturnToStart(scene); return None
@@ -1526,11 +1614,13 @@ def tool_constraintForce_getData(scene, name):
 
 def tool_exportForceHistory_eventHandler(scene):
 
+    timeStart = time.perf_counter()
     props = bpy.context.window_manager.bcb
     rbw_steps_per_second = scene.rigidbody_world.steps_per_second
     rbw_time_scale = scene.rigidbody_world.time_scale
     name = props.postprocTools_fcx_con
-    result = tool_constraintForce_getData(scene, name)
+    # Constraint data is shared with other consumers like the force visualization
+    result = dispatcher_getData(dispatcher_getSnapshot(scene), ("cons", name), tool_constraintForce_getData, scene, name)
 
     if result != None:
         data = result[0]
@@ -1544,7 +1634,7 @@ def tool_exportForceHistory_eventHandler(scene):
                 break
 
         # Conversion from impulse to force
-        data = [val /rbw_time_scale *rbw_steps_per_second for val in data]
+        data = data *(rbw_steps_per_second /rbw_time_scale)
         
         filenamePath = props.postprocTools_fcx_nam
         logPath = filenamePath
@@ -1572,8 +1662,8 @@ def tool_exportForceHistory_eventHandler(scene):
                     # Remove old log file at start frame
                     try: os.remove(filename)
                     except: pass
-                    # Create new log file
-                    try: f = open(filename, "w")
+                    # Create new log file (large buffer so that lines are written to disk in chunks instead of every frame)
+                    try: f = open(filename, "w", buffering=forceHistoryBufferSize)
                     except:
                         print('Error: Could not open file.')
                         stopPlaybackAndReturnToStart(scene); return
@@ -1582,6 +1672,7 @@ def tool_exportForceHistory_eventHandler(scene):
                         f.write(line)
                         files.append(f)
                 bpy.app.driver_namespace["log_files_open"] = files
+                bpy.app.driver_namespace["log_fcx_cost"] = [0, 0, 0]  # Frames, total time, maximum time
             
     ### Check if last frame is reached
     if scene.frame_current == scene.frame_end:
@@ -1590,19 +1681,22 @@ def tool_exportForceHistory_eventHandler(scene):
 
     ### If animation playback has stopped (can also be done by user) then unload the event handler and free all monitor data
     if not bpy.context.screen.is_animation_playing:
-        try: bpy.app.handlers.frame_change_pre.remove(tool_exportForceHistory_eventHandler)
-        except: pass
-        else: print("Removed event handler: tool_exportForceHistory_eventHandler")
+        dispatcher_unregister(tool_exportForceHistory_eventHandler)
         scene.frame_current == scene.frame_start  # Reset to start frame
         ### Close log files
         try: files = bpy.app.driver_namespace["log_files_open"]
         except: pass
         else:
             for f in files: f.close()
-        ### Delete keys
-        keys = [key for key in bpy.app.driver_namespace.keys()]
-        for key in keys:
-            if "log_" in key:
+        ### Report per-frame cost
+        try: cost = bpy.app.driver_namespace["log_fcx_cost"]
+        except: pass
+        else:
+            if cost[0] > 0:
+                print("Force export cost per frame: %0.3f ms average, %0.3f ms maximum (%d frames)" %(cost[1] /cost[0] *1000, cost[2] *1000, cost[0]))
+        ### Delete only own keys, other consumers stopping on the same frame still need theirs for their clean up
+        for key in ["log_files_open", "log_objNames", "log_fcx_cost", "log_consIndex"]:
+            if key in bpy.app.driver_namespace.keys():
                 del bpy.app.driver_namespace[key]
         bpy.context.screen.scene = scene  # Hack to update other event handlers once again to finish their clean up
         return
@@ -1611,22 +1705,19 @@ def tool_exportForceHistory_eventHandler(scene):
     if "log_objNames" in bpy.app.driver_namespace.keys():
         objNames = bpy.app.driver_namespace["log_objNames"]
         files = bpy.app.driver_namespace["log_files_open"]
-        time = (scene.frame_current -scene.frame_start-1) /scene.render.fps
+        timeSim = (scene.frame_current -scene.frame_start-1) /scene.render.fps
 
         for k in range(len(objNames)):
             if qIntact:
-                line = "%0.4f" %time
-
-                fmax = data[0]
-                for val in data: fmax = max(fmax, abs(val))  # Evaluate maximum force
-                line += "; %0.6f" %fmax
-
-                for val in data:
-                    line += "; %0.6f" %val
-                line += "\n"
-
+                fmax = numpy.abs(data).max()  # Evaluate maximum force
+                line = "%0.4f; %0.6f; " %(timeSim, fmax) +"; ".join(["%0.6f" %val for val in data.tolist()]) +"\n"
                 files[k].write(line)
 
+        ### Measure per-frame cost
+        cost = bpy.app.driver_namespace["log_fcx_cost"]
+        timeFrame = time.perf_counter() -timeStart
+        cost[0] += 1; cost[1] += timeFrame; cost[2] = max(cost[2], timeFrame)
+
 ########################################
 
 def tool_exportForceHistory(scene):
@@ -1648,7 +1739,7 @@ def tool_exportForceHistory(scene):
         else: obj.location = obj.location
 
     print('Init constraint force export event handler.')
-    bpy.app.handlers.frame_change_pre.append(tool_exportForceHistory_eventHandler)
+    dispatcher_register(tool_exportForceHistory_eventHandler)
     # Start animation playback
     if not bpy.context.screen.is_animation_playing:
         bpy.ops.screen.animation_play()
@@ -1736,8 +1827,6 @@ def tool_forcesVisualization_eventHandler(scene):
     props = bpy.context.window_manager.bcb
     elemGrps = mem["elemGrps"]
 
-    rbw_steps_per_second = scene.rigidbody_world.steps_per_second
-    rbw_time_scale = scene.rigidbody_world.time_scale
     objRangeName = props.postprocTools_fcv_con
 
     # Detect if official Blender or Fracture Modifier is in use
@@ -1862,7 +1951,7 @@ def tool_forcesVisualization_eventHandler(scene):
                 qUse_foundation = qUse
 
                 ### Skip horizontal connections by comparing relations of both element centroids to constraint location
-                ### This code is used 3x, keep changes consistent in: builder_prep.py, builder_setc.py, and tools.py
+                ### This code is also used in core.py, keep changes consistent with core_isVertical() in core.py
                 qUse = 1
                 if 0:  # Experimental and thus disabled
                     if not qFM: dirVecA = objConst.location -objA.matrix_world.to_translation()  # Use actual locations (taking parent relationships into account)
@@ -1896,190 +1985,16 @@ def tool_forcesVisualization_eventHandler(scene):
         # Store connection data for next frame use
         bpy.app.driver_namespace["log_connectsViz"] = connectsViz
 
-        ### Create list of visualization object names
-        vizObjNames = []
-        for i in range(len(connectsViz)):
-            connect = connectsViz[i]
-            name = connect[1]
-            vizObjNames.append(name)
-
         # Generate gradient materials
         initMaterials()
 
-        ### Prepare visualization objects
-        print("Preparing visualization objects... (%d)" %len(connectsViz))
-        grpName = grpNameVisualization
-        try: grp = bpy.data.groups[grpName]
-        except: grp = bpy.data.groups.new(grpName)
-        vizObjs = []
-        for i in range(len(connectsViz)):
-            sys.stdout.write('\r' +"%d" %i)
-            connect = connectsViz[i]
-            name = connect[1]
-            nameViz = "Viz_" +name
-            try: obj = scene.objects[nameViz]
-            except:
-                # Create sphere
-                bpy.ops.mesh.primitive_ico_sphere_add(subdivisions=4, size=1, view_align=False, enter_editmode=False, location=(0, 0, 0))
-                bpy.ops.object.shade_smooth()  # Shade smooth
-                obj = bpy.context.scene.objects.active
-                obj.name = nameViz
-                #obj.scale = Vector((0, 0, 0))
-                obj.select = 0
-            k = 1
-            while 1:  # Delete values in case there are old ones and we are using sampling
-                key = name +'.%d N' %k
-                if key in obj.keys(): del obj[key]
-                else: break
-                k += 1
-            vizObjs.append(obj)
-            # Add to visualization group
-            try: grp.objects.link(obj)
-            except: pass
-        print()
-        
-        # Store visualization object list for next frame use
-        if len(vizObjs):
-            bpy.app.driver_namespace["log_vizObjs"] = vizObjs
-        
-    ### For every frame
-    if "log_vizObjs" in bpy.app.driver_namespace.keys():
-        connectsViz = bpy.app.driver_namespace["log_connectsViz"]
-        vizObjs = bpy.app.driver_namespace["log_vizObjs"]
-        
-        for i in range(len(connectsViz)):
-            connect = connectsViz[i]
-            objConst, name, loc, length, objA, objB, a = connect
-          
-            normal = Vector((1.0, 0.0, 0.0))
-            if not qFM: normal.rotate(objConst.rotation_quaternion)
-            else:       normal.rotate(objConst.rotation)
-                
-            # Write some properties into visualization objects for user review
-            vizObjs[i]["Obj.A"] = objA.name
-            vizObjs[i]["Obj.B"] = objB.name 
-            vizObjs[i]['Normal'] = normal
-            vizObjs[i]['ContactArea mm²'] = a
-            
-#            ### Set location to center of (possibly moving) element pair (comment out for original connection position)
-#            try: locA = objA.matrix_world.to_translation()  # Get actual Bullet object's position as .location only returns its simulation starting position
-#            except: locA = objA.rigidbody.location  # If the above fails it's an FM object, so we have to derive the location differently
-#            try: locB = objB.matrix_world.to_translation()
-#            except: locB = objB.rigidbody.location
-#            loc = (locA +locB) /2 
-            
-            result = tool_constraintForce_getData(scene, name)
+        ###### Prepare visualization object
+        tool_forcesVisualization_createMesh(scene, connectsViz)
 
-            if result != None:
-                data = result[0]
-                cons = result[1]
-                
-                ### Check if connection is broken
-                samples = 10  # Sampling of values over multiple frames to reduce simulation noise (0 = off)
-                qIntact = 0
-                for con in cons:
-                    #if (con.type == 'GENERIC' or con.type == 'FIXED' or con.type == 'POINT') and \
-                    if con.enabled and (not hasattr(con, 'isIntact') or con.isIntact()):  # Needs Fracture Modifier build
-                        qIntact = 1
-                        break
-
-                vizObjs[i]['#Intact'] = qIntact
-
-                if qIntact:
-                    # Conversion from impulse to force (absolute values preferred for sampling)
-                    data = [abs(val /rbw_time_scale *rbw_steps_per_second) for val in data]
-
-                    ### Sampling of values over multiple frames
-                    if samples:
-                        for k in range(len(cons)):
-                            val = data[k]
-                            try: valAcc = vizObjs[i][name +'.%d N' %k]
-                            except: pass
-                            else: val = (val +(valAcc *(samples-1))) /samples
-                            data[k] = val
-
-                    ### Evaluate total connection load by summarizing all forces
-                    ### (very simple, inaccurate for fixed connections)
-                    #fmax = 0
-                    #for val in data: fmax += val
-
-                    ### Evaluate total connection load by picking the maximum value
-                    ### (simple, good for fixed connections but might be inaccurate for complex structures with lots of lateral and angular forces)
-                    fmax = 0
-                    for val in data: fmax = max(fmax, val)
-
-                    ### Evaluate total connection load by combining individual force components (best in theory)
-#                    # First detect orientation (x = connection normal)
-#                    flx = 0; fly = 0; flz = 0
-#                    fax = 0; fay = 0; faz = 0
-#                    for k in range(len(cons)):
-#                        con = cons[k]
-#                        val = data[k]
-#                        if   con.use_limit_lin_x and val != 0: flx += val  # Usually only one force per axis should exist
-#                        elif con.use_limit_lin_y and val != 0: fly += val  # but to make sure we are not ignoring forces
-#                        elif con.use_limit_lin_z and val != 0: flz += val  # we adding them up
-#                        elif con.use_limit_ang_x and val != 0: fax = max(val, fax)  # For angles we are using the maximum
-#                        elif con.use_limit_ang_y and val != 0: fay = max(val, fay)  # because some connection types are
-#                        elif con.use_limit_ang_z and val != 0: faz = max(val, faz)  # sharing two or three axis
-#                    # For linear forces we are using the good old Pythagoras
-#                    fl = (flx**2 +fly**2 +flz**2)**0.5
-#                    # Convert moments to forces by using the elements distances to the pivot point
-#                    if not qFM: dirVec = objConst.location -objA.matrix_world.to_translation()  # Use actual locations (taking parent relationships into account)
-#                    else: dirVec = objConst.location -objA.rigidbody.location
-#                    distA = dirVec.length
-#                    if not qFM: dirVec = objConst.location -objB.matrix_world.to_translation()  # Use actual locations (taking parent relationships into account)
-#                    else: dirVec = objConst.location -objB.rigidbody.location
-#                    distB = dirVec.length
-#                    dist = (distA +distB) /2  # Use average distance
-#                    fa = (fax +fay +faz) #/dist  # Angular forces (moments) are added up and divided by the distance (lever) to get a linear force
-#                    # Add linear and linearized angular forces
-#                    fmax = fl +fa
-#                    # Debug prints
-#                    #if name == "Con.6243":
-#                    #    print("fl: %0.2f %0.2f %0.2f = %0.2f" %(flx,fly,flz,fl))
-#                    #    print("fa: %0.2f %0.2f %0.2f = %0.2f" %(fax,fay,faz,fa))
-#                    #    print("fmax: %0.2f" %fmax)
-                    
-                    ### Write forces properties into visualization objects for user review
-                    vizObjs[i]['#Fmax N'] = fmax
-                    vizObjs[i]['#Fmax N/mm²'] = fmax /a
-                    for k in range(len(cons)):
-                        vizObjs[i][name +'.%d N' %k] = data[k]
-                        vizObjs[i][name +'.%d N/mm²' %k] = data[k] /a
-
-                    ### Normalization to maximum force defined by user
-                    dataNorm = []
-                    for k in range(len(cons)):
-                        brkThres = cons[k].breaking_threshold /rbw_time_scale *rbw_steps_per_second  # Conversion from impulse to force
-                        impulse = data[k]
-                        if props.postprocTools_fcv_nbt:
-                            val = impulse /brkThres  # Visualize force normalized to breaking threshold
-                        else:
-                            val = impulse /a /props.postprocTools_fcv_max  # Visualize relative force per connection 
-                            #val = impulse /props.postprocTools_fcv_max  # Visualize absolute force per connection 
-                        #if val <= 1.25:  # Skip values over the threshold for cases connection is not breakable, then we don't want to include them
-                        #    if a >= 70000: # Skip values with a too small contact area (mm²)
-                        dataNorm.append(val)
-
-                    # Finding the maximum strain of all constraints
-                    if len(dataNorm) > 0:
-                        fmax = dataNorm[0]
-                        for val in dataNorm: fmax = min(max(fmax, val), 1)
-                    else: fmax = 0
-
-                ### Adding settings to visualization objects
-                obj = vizObjs[i]
-                obj.location = loc
-                
-                ### Scaling by force
-                if qIntact:
-                    size = fmax *visualizerDrawSize
-                    obj.scale = Vector((size, size, size))
-                    changeMaterials(obj, fmax)
-                else:
-                    obj.scale = Vector((.5, .5, .5)) *visualizerDrawSize
-                    #obj.scale = Vector((0, 0, 0))
-                    changeMaterials(obj, 0, qIntact=0)
+    ### For every frame
+    if "log_viz" in bpy.app.driver_namespace.keys():
+        ###### Function
+        tool_forcesVisualization_update(scene)
 
     ### Check if last frame is reached
     if scene.frame_current == scene.frame_end \
@@ -2097,47 +2012,55 @@ def tool_forcesVisualization_eventHandler(scene):
         limMin = 0               # Minimum limit for values to be counted (0 = off)
         limMax = 0               # Maximum limit for values to be counted (0 = off)
         qText = 0                # Generate text objects
-        vizObjs = bpy.app.driver_namespace["log_vizObjs"]
 
-        ### Summarize all values
-        objs = []
         sum = 0
         cnt = 0
-        for obj in vizObjs:
-            if keyVal in obj.keys() and keyLim in obj.keys():
-                val = obj[keyVal]
-                limVal = obj[keyLim]
-                if (not limMin or limVal >= limMin) and (not limMax or limVal <= limMax):
-                    objs.append((obj, val))
-                    sum += val
-                    cnt += 1
-                else: obj.select = 0
-            else: obj.select = 0
-
-        ### Create text objects
-        if qText:
-            # Deselect all objects
-            bpy.ops.object.select_all(action='DESELECT')
-           
-            textObjs = []
-            for obj, val in objs:
-                name = "Text_" +obj.name
-                loc = obj.location.copy()
-                loc += Vector((.25, -.15, 1.5))
-                if name not in scene.objects:
-                    bpy.ops.object.text_add(view_align=True, enter_editmode=False, location=(0, 0, 0))
-                    textObj = bpy.context.scene.objects.active
-                    textObj.name = name
-                    textObj.location = loc
-                else:
-                    textObj = scene.objects[name]
-                textObj.data.body = "%0.0f" %(val /1000 /9.81) # tons
-                textObj.data.align_y = 'TOP'
-                textObj.data.align_x = 'LEFT'
-                textObj.scale = (.6, .6, .6)
-                textObjs.append(textObj)
-            # Select all texts
-            for obj in textObjs: obj.select = 1
+        if "log_viz" in bpy.app.driver_namespace.keys():
+            obj, connectsViz = bpy.app.driver_namespace["log_viz"][:2]
+            areas = bpy.app.driver_namespace["log_viz"][5]
+            centers = bpy.app.driver_namespace["log_viz"][6]
+            fmax, intact = bpy.app.driver_namespace["log_viz"][10:12]
+
+            ### Write per connection properties into the visualization object for user review (indices match the spheres in the mesh)
+            obj["Connections"] = [connect[1] for connect in connectsViz]
+            obj["Obj.A"] = [connect[4].name for connect in connectsViz]
+            obj["Obj.B"] = [connect[5].name for connect in connectsViz]
+            obj[keyLim] = areas.tolist()
+            obj[keyVal] = fmax.tolist()
+            obj["#Fmax N/mm²"] = (fmax /areas).tolist()
+            obj["#Intact"] = intact.astype(numpy.int32).tolist()
+
+            ### Summarize all values
+            mask = fmax > 0
+            if limMin: mask &= areas >= limMin
+            if limMax: mask &= areas <= limMax
+            sum = fmax[mask].sum()
+            cnt = int(mask.sum())
+
+            ### Create text objects
+            if qText:
+                # Deselect all objects
+                bpy.ops.object.select_all(action='DESELECT')
+               
+                textObjs = []
+                for i in numpy.nonzero(mask)[0]:
+                    name = "Text_" +connectsViz[i][1]
+                    loc = Vector(centers[i].tolist())
+                    loc += Vector((.25, -.15, 1.5))
+                    if name not in scene.objects:
+                        bpy.ops.object.text_add(view_align=True, enter_editmode=False, location=(0, 0, 0))
+                        textObj = bpy.context.scene.objects.active
+                        textObj.name = name
+                        textObj.location = loc
+                    else:
+                        textObj = scene.objects[name]
+                    textObj.data.body = "%0.0f" %(fmax[i] /1000 /9.81) # tons
+                    textObj.data.align_y = 'TOP'
+                    textObj.data.align_x = 'LEFT'
+                    textObj.scale = (.6, .6, .6)
+                    textObjs.append(textObj)
+                # Select all texts
+                for obj in textObjs: obj.select = 1
                  
         print()
         print(keyVal +" sum = %0.0f acting on %d connections." %(sum, cnt))
@@ -2148,20 +2071,155 @@ def tool_forcesVisualization_eventHandler(scene):
 
         ###### Unload the event handler and free all monitor data
 
-        try: bpy.app.handlers.frame_change_pre.remove(tool_forcesVisualization_eventHandler)
-        except: pass
-        else: print("Removed event handler: tool_forcesVisualization_eventHandler")
+        dispatcher_unregister(tool_forcesVisualization_eventHandler)
         #scene.frame_current == scene.frame_start  # Reset to start frame
-        ### Delete keys
-        keys = [key for key in bpy.app.driver_namespace.keys()]
-        for key in keys:
-            if "log_" in key:
+        ### Delete only own keys, other consumers stopping on the same frame still need theirs for their clean up
+        for key in ["log_connectsViz", "log_viz"]:
+            if key in bpy.app.driver_namespace.keys():
                 del bpy.app.driver_namespace[key]
         bpy.context.screen.scene = scene  # Hack to update other event handlers once again to finish their clean up
         return
 
 ########################################
 
+def tool_forcesVisualization_createMesh(scene, connectsViz):
+
+    ### Creates a single mesh object containing one sphere per connection, which is then updated in bulk every frame
+    ### Vars
+    displaySteps = 300       # Gradient steps / material count to be used for visualization (keep consistent with initMaterials())
+    sphereSubdiv = 4         # Subdivisions of the ico spheres (polygon count multiplies by 4 per level)
+    nameViz = "Viz_Forces"
+
+    ### Resolve constraint handles once and flatten them into a single list with start offsets per connection
+    ### Connections whose constraints can't be found are skipped instead of aborting the whole visualization
+    print("Preparing visualization object... (%d)" %len(connectsViz))
+    connectsVizValid = []
+    consFlat = []
+    offsets = []
+    for connect in connectsViz:
+        cons = tool_constraintForce_getHandles(scene, connect[1], qStop=0)
+        if cons == None: continue
+        connectsVizValid.append(connect)
+        offsets.append(len(consFlat))
+        consFlat.extend(cons)
+    if len(connectsVizValid) < len(connectsViz):
+        print("Warning: Constraints not found, connections skipped:", len(connectsViz) -len(connectsVizValid))
+    connectsViz = connectsVizValid
+    cntConns = len(connectsViz)
+    if cntConns == 0:
+        print("Warning: No connections found for visualization.")
+        return
+    
+    ### Sphere template
+    bm = bmesh.new()
+    bmesh.ops.create_icosphere(bm, subdivisions=sphereSubdiv, diameter=1)
+    templCo = numpy.array([v.co[:] for v in bm.verts], dtype=numpy.float32)
+    templFaces = numpy.array([[v.index for v in f.verts] for f in bm.faces], dtype=numpy.int32)
+    bm.free()
+    cntVerts = len(templCo); cntFaces = len(templFaces)
+
+    ### Build mesh with one sphere per connection
+    centers = numpy.array([connect[2][:] for connect in connectsViz], dtype=numpy.float32)
+    me = bpy.data.meshes.new(nameViz)
+    me.vertices.add(cntConns *cntVerts)
+    me.loops.add(cntConns *cntFaces *3)
+    me.polygons.add(cntConns *cntFaces)
+    me.vertices.foreach_set("co", (centers[:, None, :] +templCo[None, :, :] *.5 *visualizerDrawSize).ravel())
+    me.loops.foreach_set("vertex_index", (templFaces[None, :, :] +(numpy.arange(cntConns, dtype=numpy.int32) *cntVerts)[:, None, None]).ravel())
+    me.polygons.foreach_set("loop_start", numpy.arange(0, cntConns *cntFaces *3, 3, dtype=numpy.int32))
+    me.polygons.foreach_set("loop_total", numpy.full(cntConns *cntFaces, 3, dtype=numpy.int32))
+    me.polygons.foreach_set("use_smooth", numpy.ones(cntConns *cntFaces, dtype=numpy.bool_))
+    me.update(calc_edges=True)
+    # Gradient materials are addressed by polygon material indices
+    for step in range(displaySteps +1):
+        me.materials.append(bpy.data.materials[materialName +"%03d" %step])
+
+    ### Replace old visualization object if present
+    if nameViz in bpy.data.objects:
+        obj = bpy.data.objects[nameViz]
+        meOld = obj.data
+        if obj.name in scene.objects: scene.objects.unlink(obj)
+        bpy.data.objects.remove(obj)
+        if meOld.users == 0: bpy.data.meshes.remove(meOld)
+    obj = bpy.data.objects.new(nameViz, me)
+    scene.objects.link(obj)
+    # Add to visualization group
+    grpName = grpNameVisualization
+    try: grp = bpy.data.groups[grpName]
+    except: grp = bpy.data.groups.new(grpName)
+    try: grp.objects.link(obj)
+    except: pass
+
+    ### Static per connection data
+    consSamples = 10  # Sampling of values over multiple frames to reduce simulation noise (1 = off)
+    areas = numpy.array([connect[6] for connect in connectsViz], dtype=numpy.float64)
+    offsets = numpy.array(offsets, dtype=numpy.int64)
+    counts = numpy.diff(numpy.append(offsets, len(consFlat)))
+    # Store visualization data for next frame use
+    #                                          0    1          2         3        4        5       6         7          8 (rolling sample buffer)                                   9 (frame counter)  10 (Fmax N)                 11 (intact)
+    bpy.app.driver_namespace["log_viz"] = [obj, connectsViz, consFlat, offsets, counts, areas, centers, templCo, numpy.zeros((consSamples, len(consFlat)), dtype=numpy.float64), 0, numpy.zeros(cntConns), numpy.zeros(cntConns, dtype=numpy.bool_)]
+
+########################################
+
+def tool_forcesVisualization_update(scene):
+
+    ### Updates sizes and colors of all spheres of the visualization mesh in one bulk write
+    ### Vars
+    displaySteps = 300       # Gradient steps / material count to be used for visualization (keep consistent with initMaterials())
+
+    props = bpy.context.window_manager.bcb
+    rbw_steps_per_second = scene.rigidbody_world.steps_per_second
+    rbw_time_scale = scene.rigidbody_world.time_scale
+    viz = bpy.app.driver_namespace["log_viz"]
+    obj, connectsViz, consFlat, offsets, counts, areas, centers, templCo, samples = viz[:9]
+    if not len(consFlat): return
+
+    ### Gather constraint data
+    try: impulses = numpy.fromiter((con.appliedImpulse() for con in consFlat), dtype=numpy.float64, count=len(consFlat))
+    except:
+        print("Error: Data could not be read, Blender version with Fracture Modifier required!")
+        stopPlaybackAndReturnToStart(scene); return
+    if hasattr(consFlat[0], 'isIntact'):  # Needs Fracture Modifier build
+          intactFlat = numpy.fromiter((con.enabled and con.isIntact() for con in consFlat), dtype=numpy.bool_, count=len(consFlat))
+    else: intactFlat = numpy.fromiter((con.enabled for con in consFlat), dtype=numpy.bool_, count=len(consFlat))
+    # Connection is considered intact as long as one of its constraints is intact
+    intact = numpy.add.reduceat(intactFlat, offsets) > 0
+
+    ### Sampling of values over multiple frames in a rolling buffer
+    # Conversion from impulse to force (absolute values preferred for sampling)
+    samples[viz[9] %len(samples)] = numpy.abs(impulses) *(rbw_steps_per_second /rbw_time_scale)
+    viz[9] += 1
+    forces = samples[:min(viz[9], len(samples))].mean(axis=0)
+
+    ### Evaluate total connection load by picking the maximum value
+    ### (simple, good for fixed connections but might be inaccurate for complex structures with lots of lateral and angular forces)
+    fmax = numpy.maximum.reduceat(forces, offsets)
+    viz[10] = numpy.where(intact, fmax, viz[10])
+    viz[11] = intact
+
+    ### Normalization to maximum force defined by user
+    if props.postprocTools_fcv_nbt:
+        # Visualize force normalized to breaking threshold
+        brkThres = numpy.fromiter((con.breaking_threshold for con in consFlat), dtype=numpy.float64, count=len(consFlat))
+        brkThres *= rbw_steps_per_second /rbw_time_scale  # Conversion from impulse to force
+        dataNorm = numpy.divide(forces, brkThres, out=numpy.zeros_like(forces), where=brkThres > 0)
+    else:
+        # Visualize relative force per connection
+        dataNorm = forces /numpy.repeat(areas, counts) /props.postprocTools_fcv_max
+    # Finding the maximum strain of all constraints
+    fmaxNorm = numpy.minimum(numpy.maximum.reduceat(dataNorm, offsets), 1)
+
+    ### Scaling by force and coloring by gradient materials, broken connections use the last special material
+    sizes = numpy.where(intact, fmaxNorm, .5) *visualizerDrawSize
+    matIdx = numpy.where(intact, numpy.minimum((fmaxNorm *displaySteps).astype(numpy.int32), displaySteps -1), displaySteps)
+    me = obj.data
+    cntFaces = len(me.polygons) //len(connectsViz)
+    me.vertices.foreach_set("co", (centers[:, None, :] +templCo[None, :, :] *sizes[:, None, None].astype(numpy.float32)).ravel())
+    me.polygons.foreach_set("material_index", numpy.repeat(matIdx, cntFaces).astype(numpy.int16))
+    me.update()
+
+########################################
+
 def tool_forcesVisualization(scene):
 
     print("\nGenerating constraint force visualization...")
@@ -2184,7 +2242,7 @@ def tool_forcesVisualization(scene):
     scene.frame_current = scene.frame_start
 
     print('Init constraint force visualization event handler.')
-    bpy.app.handlers.frame_change_pre.append(tool_forcesVisualization_eventHandler)
+    dispatcher_register(tool_forcesVisualization_eventHandler)
     # Start animation playback
     if not bpy.context.screen.is_animation_playing:
         bpy.ops.screen.animation_play()
@@ -2239,3 +2297,134 @@ def tool_cavityDetection(scene):
     # Revert to start selection
     for obj in selection: obj.select = 1
     bpy.context.scene.objects.active = selectionActive
+
+################################################################################
+
+def tool_sweepExport(scene, gridPath=sweepGridFile, sweepPath=sweepPath):
+
+    ### Generates one config file per scenario of a parameter grid and a manifest to be run by sweep.py
+    print("\nExporting scenario sweep...")
+
+    props = bpy.context.window_manager.bcb
+    try: f = open(gridPath, "r")
+    except:
+        print('Error: Could not read file:', gridPath)
+        return 1
+    try: grid = json.load(f)
+    except:
+        print('Error: Parameter grid file is no valid JSON:', gridPath)
+        f.close(); return 1
+    f.close()
+
+    ### Backup current settings to restore them after export
+    elemGrps = mem["elemGrps"]
+    elemGrpsBak = [elemGrp.copy() for elemGrp in elemGrps]
+    propsBak = {}
+    for name in grid.keys():
+        if not name.startswith("EGSidx"):
+            try: propsBak[name] = getattr(props, name)
+            except: print("Error: Unknown parameter in grid:", name); return 1
+
+    manifest = {"blend": bpy.data.filepath, "blenderPath": bpy.app.binary_path, "frameStart": scene.frame_start, "frameEnd": scene.frame_end, "scenarios": []}
+    manifest["connectCnt"] = len(scene["bcb_connectsPair"]) if "bcb_connectsPair" in scene.keys() else 0
+    
+    paramsList = sweep_expandGrid(grid)
+    for i in range(len(paramsList)):
+        params = paramsList[i]
+        ### Apply parameters, element group columns are given as "EGSidxName" for all groups or "EGSidxName:k" for group k only
+        for name, value in params.items():
+            if name.startswith("EGSidx"):
+                key = name.split(":")
+                try: col = globals()[key[0]]
+                except: print("Error: Unknown element group column in grid:", name); continue
+                if len(key) > 1: elemGrps[int(key[1])][col] = value
+                else:
+                    for elemGrp in elemGrps: elemGrp[col] = value
+            else: setattr(props, name, value)
+        scenarioName = "scenario_%03d" %i
+        scenarioDir = os.path.join(sweepPath, scenarioName)
+        if not os.path.exists(scenarioDir): os.makedirs(scenarioDir)
+        ###### Export config data
+        exportConfigData(scene, pathName=os.path.join(scenarioDir, "bcb.cfg"))
+        f = open(os.path.join(scenarioDir, "scenario.json"), "w")
+        json.dump({"name": scenarioName, "params": params}, f, indent=1)
+        f.close()
+        manifest["scenarios"].append({"name": scenarioName, "params": params, "dir": scenarioDir})
+        ### Restore settings for next scenario
+        for k in range(len(elemGrps)): elemGrps[k] = elemGrpsBak[k].copy()
+        for name, value in propsBak.items(): setattr(props, name, value)
+
+    manifestPath = os.path.join(sweepPath, sweepManifestName)
+    f = open(manifestPath, "w")
+    json.dump(manifest, f, indent=1)
+    f.close()
+    print("%d scenarios exported, run them with: python sweep.py %s" %(len(paramsList), manifestPath))
+    return 0
+
+########################################
+
+def tool_runScenario(scenarioDir):
+
+    ### Builds and bakes one sweep scenario in a background Blender process (called by sweep.py)
+    print("\nRunning scenario:", scenarioDir)
+
+    scene = bpy.context.scene
+    props = bpy.context.window_manager.bcb
+    f = open(os.path.join(scenarioDir, "scenario.json"), "r")
+    scenario = json.load(f)
+    f.close()
+
+    ###### Import config data
+    if importConfigData(scene, pathName=os.path.join(scenarioDir, "bcb.cfg")): return 1
+    qGroundMotion = 0
+    for name, value in scenario["params"].items():
+        if not name.startswith("EGSidx"):
+            setattr(props, name, value)
+            if name.startswith("preprocTools_gnd"): qGroundMotion = 1
+    if qGroundMotion: tool_groundMotion(scene)
+
+    ### Redirect telemetry into scenario folder
+    mem["bcb_telemetry_settings"] = "csv", os.path.join(scenarioDir, sweepTelemetryName)
+
+    ###### Build and bake
+    bpy.ops.bcb.build()
+    tool_bakeHeadless(scene)
+    del mem["bcb_telemetry_settings"]
+
+    bpy.ops.wm.save_as_mainfile(filepath=os.path.join(scenarioDir, "scenario.blend"))
+    return 0
+
+########################################
+
+def tool_bakeHeadless(scene):
+
+    ### Bakes with monitor by stepping through frames directly, as animation playback is not available in background mode
+    scene.frame_set(scene.frame_start)
+    dispatcher_register(monitor_eventHandler)
+    monitor_eventHandler(scene)  # Init at start frame before starting simulation
+    for frame in range(scene.frame_start +1, scene.frame_end +1):
+        scene.frame_set(frame)
+        if "bcb_monitor_restFrame" in mem.keys() or os.path.isfile(commandStop): break
+    dispatcher_unregister(monitor_eventHandler)
+    # Convert animation point cache to fixed bake data 
+    contextFix = bpy.context.copy()
+    contextFix['point_cache'] = scene.rigidbody_world.point_cache
+    bpy.ops.ptcache.bake_from_cache(contextFix)
+    ###### Free all monitor related data
+    monitor_freeBuffers(scene)
+
+################################################################################
+
+def tool_pointCache_getInfo(scene):
+
+    ### Returns folder and name of the disk point cache of the rigid body world and the object names in point order, to be used with pointcache.py
+    pointCache = scene.rigidbody_world.point_cache
+    if pointCache.use_external:
+        path = bpy.path.abspath(pointCache.filepath)
+    else:
+        blendName = os.path.splitext(bpy.path.basename(bpy.data.filepath))[0]
+        path = bpy.path.abspath("//blendcache_%s" %blendName)
+    # Points are stored in the order of the rigid body world group
+    try: names = [obj.name for obj in scene.rigidbody_world.group.objects]
+    except: names = []
+    return path, pointCache.name, names
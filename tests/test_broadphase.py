@@ -0,0 +1,63 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Reference test for the contact geometry of the parallel workers (broadphase.py), runs from a regular Python interpreter:
+# python -m unittest discover tests
+#
+# The expected values were calculated by hand following calculateContactAreaBasedOnBoundaryBoxesForPair in builder_prep.py
+# for two boxes touching with a gap of 0.01 m:
+# A: x [-0.5, 0.5], y [-0.5, 0.5], z [-0.5, 0.5]
+# B: x [0.51, 1.01], y [-0.3, 0.5], z [-0.5, 0.5]
+
+################################################################################
+
+import sys, os, unittest
+
+pathTests = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(pathTests), "kk_bullet_constraints_builder"))
+
+from broadphase import *       # Contains parallel connection search and contact estimation workers (independent from Blender)
+
+### Vars
+searchDist = 0.02
+
+################################################################################
+
+class TestContactGeometry(unittest.TestCase):
+
+    def setUp(self):
+        self.path = broadphase_exportShared(broadphase_createBoxes([(0, 0, 0), (0.76, 0.1, 0)], [(1, 1, 1), (0.5, 0.8, 1)]))
+        broadphase_initWorker(self.path)
+
+    def tearDown(self):
+        broadphase_removeShared(self.path)
+
+    def checkGeometry(self, result, geoRef, locRef):
+        geo, loc = result
+        for value, valueRef in zip(geo, geoRef):
+            self.assertAlmostEqual(value, valueRef, places=9)
+        for value, valueRef in zip(loc, locRef):
+            self.assertAlmostEqual(value, valueRef, places=9)
+
+    def test_simple(self):
+
+        ### Boundary box overlaps are clamped to <= 0: X = -0.01, Y = 0, Z = 0 -> area 0,
+        ### so the smallest side of the smaller element is used as fallback: min(0.5 *0.8, 0.5 *1, 0.8 *1) = 0.4
+        self.checkGeometry(broadphase_contactGeometry(0, 1, searchDist, 0, 0, 0), [0.4, 0, 0, 1, 2, 3, 1], [0.505, 0.1, 0])
+
+    def test_accurate(self):
+
+        ### Faces within search range: +X of A (area 1.0) and -X of B (area 0.8), face boundary box overlap X = -0.01, Y = 0.8, Z = 1.0
+        ### area = 0.8 *1.0 -0.01 *1.0 -0.01 *0.8 = 0.782 (smaller than the face area 0.8, so it is kept and the volume correction is flagged)
+        self.checkGeometry(broadphase_contactGeometry(0, 1, searchDist, 0, 0, 1), [0.782, 0.8, 1.0, 1, 2, 3, 1], [0.505, 0.1, 0])
+
+    def test_accurateThickness(self):
+
+        ### Surface thickness is added along the contact width: 0.782 +1.0 *0.1
+        self.checkGeometry(broadphase_contactGeometry(0, 1, searchDist, 0.1, 0, 1), [0.882, 0.8, 1.0, 1, 2, 3, 1], [0.505, 0.1, 0])
+
+################################################################################
+
+if __name__ == "__main__":
+    unittest.main()
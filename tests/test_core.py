@@ -0,0 +1,75 @@
+##############################
+# Bullet Constraints Builder #
+##############################
+#
+# Regression and speed test for the headless connection table builder (core.py), runs from a regular Python interpreter:
+# python -m unittest discover tests
+#
+# The reference data in tests/data was created with:
+# python core.py fixture core_fixture.npz --objects 3
+# python core.py build core_fixture.npz core_fixture.csv
+# Rebuild the reference table only when a change of the builder results is intended.
+
+################################################################################
+
+import sys, os, time, unittest
+
+pathTests = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(pathTests), "kk_bullet_constraints_builder"))
+
+from core import *             # Contains headless connection table builder operating on geometry bundles (independent from Blender)
+
+### Vars
+pathBundle = os.path.join(pathTests, "data", "core_fixture.npz")
+pathTable = os.path.join(pathTests, "data", "core_fixture.csv")
+timeMax = 2.0                  # Time limit for a single build of the fixture in seconds (takes about 0.05 s)
+
+################################################################################
+
+class TestCoreBuild(unittest.TestCase):
+
+    def setUp(self):
+        self.arrays, self.props = core_loadBundle(pathBundle)
+        self.assertIsNotNone(self.arrays)
+        self.reference = core_readTable(pathTable)
+        self.assertIsNotNone(self.reference)
+
+    def test_reference(self):
+
+        ### The build has to reproduce the reference table within the time limit
+        time_start = time.time()
+        table = core_build(self.arrays, self.props)
+        timeBuild = time.time() -time_start
+        self.assertEqual(core_compareTables(table, self.reference), [])
+        self.assertLess(timeBuild, timeMax)
+
+    def test_referenceParallel(self):
+
+        ### Parallel workers have to produce the same table as the serial build
+        table = core_build(self.arrays, self.props, processes=2)
+        self.assertEqual(core_compareTables(table, self.reference), [])
+
+    def test_breakingThresholds(self):
+
+        ### Breaking thresholds of the reference table follow from the fixture expressions independently from the builder:
+        ### default group "35", "5.2", "155", "1.0", "1.3" *a (mm²), doubled for connections to the passive "Base" group (boundary condition)
+        exprs = {"btC": 35, "btT": 5.2, "btS": 155, "btB": 1.0, "btP": 1.3}
+        idx = {name: core_tableHeader.index(name) for name in core_tableHeader}
+        cntChecked = 0
+        for row in self.reference:
+            if int(row[idx["CT"]]) != 15: continue
+            a = float(row[idx["area"]]) *1000000
+            qBase = "Base" in (str(self.arrays["egName"][self.arrays["objsEGrp"][int(row[idx["objA"]])]]),
+                               str(self.arrays["egName"][self.arrays["objsEGrp"][int(row[idx["objB"]])]]))
+            mul = 2 if qBase else 1
+            for name, value in exprs.items():
+                self.assertAlmostEqual(float(row[idx[name]]), value *a *mul, delta=value *a *mul *1e-6)
+            self.assertEqual(float(row[idx["btS9"]]), -1)
+            self.assertEqual(float(row[idx["btB9"]]), -1)
+            cntChecked += 1
+        self.assertGreater(cntChecked, 0)
+
+################################################################################
+
+if __name__ == "__main__":
+    unittest.main()